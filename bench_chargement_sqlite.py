@@ -0,0 +1,90 @@
+#
+# Banc d'essai du chargement SQLite
+#
+# Compare l'ancien chargement (iterrows + un commit par action, réglages SQLite par défaut)
+# et le chargement en masse (colonnes du DataFrame, une transaction par lot, WAL / synchronous=NORMAL)
+# sur des données synthétiques :
+#   - premier chargement : historique complet de nb_actions actions
+#   - chargement incrémental : une nouvelle séance pour chaque action
+#
+# Utilisation:
+#   python bench_chargement_sqlite.py [nb_actions] [nb_seances]
+#
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from chargement_sqlite import configurer_connexion, inserer_actions_en_masse, lignes_actions
+from maj_cours_euronext import create_table
+
+def historique_synthetique(dates, rng):
+    """DataFrame au format yfinance (index de dates, colonnes OHLCV + dividendes)"""
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({
+        'Open': close * 0.999, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(1000, 1_000_000, len(dates)),
+        'Dividends': 0.0, 'Stock Splits': 0.0,
+    }, index=pd.DatetimeIndex(dates, tz='Europe/Paris'))
+
+def chargement_ancien(conn, historiques):
+    """Reproduction du chargement d'origine : iterrows puis executemany + commit par action"""
+    insert_sql = """
+    INSERT OR IGNORE INTO actions
+    (date, Open, High, Low, Close, Volume, Dividends, [Stock Splits], action)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    for action, historical_data in historiques.items():
+        data_to_insert = []
+        for id, row in historical_data.iterrows():
+            data_to_insert.append((id.date(), row['Open'], row['High'], row['Low'], row['Close'],
+                                   row['Volume'], row['Dividends'], row['Stock Splits'], action))
+        cursor = conn.cursor()
+        cursor.executemany(insert_sql, data_to_insert)
+        conn.commit()
+
+def chargement_en_masse(conn, historiques):
+    data = []
+    for action, historical_data in historiques.items():
+        data.extend(lignes_actions(historical_data, action))
+    inserer_actions_en_masse(conn, data)
+
+def mesurer(nom, chargement, historiques_complets, historiques_increment, en_masse):
+    with tempfile.TemporaryDirectory() as repertoire:
+        conn = sqlite3.connect(os.path.join(repertoire, "bench.db"))
+        if en_masse:
+            configurer_connexion(conn)
+        create_table(conn)
+
+        nb_lignes = sum(len(h) for h in historiques_complets.values())
+        t0 = time.perf_counter()
+        chargement(conn, historiques_complets)
+        duree_initiale = time.perf_counter() - t0
+
+        nb_increment = sum(len(h) for h in historiques_increment.values())
+        t0 = time.perf_counter()
+        chargement(conn, historiques_increment)
+        duree_increment = time.perf_counter() - t0
+        conn.close()
+
+    print(f"{nom:<12} premier chargement : {nb_lignes:>8} lignes en {duree_initiale:>7.2f}s "
+          f"({nb_lignes / duree_initiale:>9.0f} lignes/s) | incrémental : {nb_increment:>5} lignes en "
+          f"{duree_increment:>6.3f}s ({nb_increment / duree_increment:>8.0f} lignes/s)")
+
+if __name__ == "__main__":
+    nb_actions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    nb_seances = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rng = np.random.default_rng(0)
+
+    dates = pd.bdate_range(end='2025-10-31', periods=nb_seances + 1)
+    historiques = {f"A{i:03d}.PA": historique_synthetique(dates, rng) for i in range(nb_actions)}
+    historiques_complets  = {action: h.iloc[:-1] for action, h in historiques.items()}
+    historiques_increment = {action: h.iloc[-1:] for action, h in historiques.items()}
+
+    mesurer("Ancien", chargement_ancien, historiques_complets, historiques_increment, en_masse=False)
+    mesurer("En masse", chargement_en_masse, historiques_complets, historiques_increment, en_masse=True)
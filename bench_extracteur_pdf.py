@@ -0,0 +1,58 @@
+#
+# Banc d'essai de l'extracteur de composition
+#
+# Compare parser_composition_pdf (maj_cours_euronext.py) et extraire_composition (extracteur_pdf.py)
+# sur les PDF déjà stockés dans cache_pdf/objets : temps d'analyse et égalité des lignes extraites.
+#
+# Utilisation:
+#   python bench_extracteur_pdf.py                   (tous les PDF du cache)
+#   python bench_extracteur_pdf.py fichier1.pdf ...  (PDF choisis)
+#
+
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from extracteur_pdf import extraire_composition, nombre_pages
+from maj_cours_euronext import parser_composition_pdf
+
+def chronometrer(fonction, contenu, repetitions):
+    """Meilleur temps sur `repetitions` exécutions, et résultat de la dernière"""
+    meilleur = None
+    for _ in range(repetitions):
+        t0 = time.perf_counter()
+        rows = fonction(contenu)
+        duree = time.perf_counter() - t0
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur, rows
+
+if __name__ == "__main__":
+    fichiers = sys.argv[1:] or sorted(glob.glob(os.path.join("cache_pdf", "objets", "*.pdf")))
+    if not fichiers:
+        print("Aucun PDF à tester : lancer maj_cours_euronext.py pour remplir cache_pdf/ ou passer des fichiers en argument")
+        sys.exit(1)
+    repetitions = 3
+
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Démarrage des processus hors chronométrage
+        pool.submit(nombre_pages, open(fichiers[0], 'rb').read()).result()
+
+        print(f"{'PDF':<20} {'Pages':>5} {'Lignes':>6} {'Actuel':>9} {'Vectorisé':>10} {'Pool':>9} {'Gain':>6}  Identique")
+        total_actuel = total_pool = 0
+        for fichier in fichiers:
+            with open(fichier, 'rb') as f:
+                contenu = f.read()
+            t_actuel, rows_actuel = chronometrer(parser_composition_pdf, contenu, repetitions)
+            t_vecto, rows_vecto   = chronometrer(extraire_composition, contenu, repetitions)
+            t_pool, rows_pool     = chronometrer(lambda c: extraire_composition(c, executor=pool), contenu, repetitions)
+            identique = rows_actuel == rows_vecto == rows_pool
+            total_actuel += t_actuel
+            total_pool   += t_pool
+            print(f"{os.path.basename(fichier)[:20]:<20} {nombre_pages(contenu):>5} {len(rows_actuel):>6} "
+                  f"{t_actuel:>8.3f}s {t_vecto:>9.3f}s {t_pool:>8.3f}s {t_actuel / t_pool:>5.1f}x  "
+                  f"{'✅' if identique else '❌'}")
+
+        print(f"\nTotal : actuel {total_actuel:.3f}s, pool {total_pool:.3f}s ({total_actuel / total_pool:.1f}x)")
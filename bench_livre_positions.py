@@ -0,0 +1,100 @@
+#
+# Banc d'essai du livre des positions
+#
+# Compare, sur des transactions synthétiques (achat puis vente de chaque position) :
+#   - l'ancien portefeuille : DataFrame rempli par portefeuille.loc[len(portefeuille)] = [...] puis ventes
+#     écrites champ par champ avec .at, comme dans les scripts DCA
+#   - LivrePositions une transaction à la fois (moteurs en boucle)
+#   - LivrePositions par lots (moteur vectorisé)
+# Temps par ajout d'achat, temps par vente et mémoire occupée par transaction.
+#
+# Utilisation:
+#   python bench_livre_positions.py [nb_transactions]
+#
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from livre_positions import LivrePositions
+
+COLONNES_ACHAT = ['action', 'date_acquisition', 'prix_unitaire_achat', 'quantite_actions', 'frais_acquisition',
+                  'cout_acquisition_brut', 'cout_acquisition_net']
+
+def transactions_synthetiques(nb, rng):
+    """Achats mensuels de 40 actions et leur vente 12 mois plus tard"""
+    actions = np.array([f"A{i:02d}.PA" for i in rng.integers(0, 40, nb)], dtype=object)
+    dates_achat = np.datetime64('2015-01-02') + np.sort(rng.integers(0, 3650, nb)).astype('timedelta64[D]')
+    dates_vente = dates_achat + np.timedelta64(365, 'D')
+    prix_achat = rng.uniform(5, 90, nb)
+    quantites = np.floor(99 / prix_achat).astype(np.int64)
+    prix_vente = prix_achat * rng.lognormal(0.05, 0.2, nb)
+    return actions, dates_achat, prix_achat, quantites, dates_vente, prix_vente
+
+def dataframe_ancien(actions, dates_achat, prix_achat, quantites, dates_vente, prix_vente):
+    """Portefeuille d'origine : ajout ligne à ligne puis colonnes de vente écrites avec .at"""
+    dates_achat, dates_vente = np.datetime_as_string(dates_achat).tolist(), np.datetime_as_string(dates_vente).tolist()
+    portefeuille = pd.DataFrame(columns=COLONNES_ACHAT)
+    t0 = time.perf_counter()
+    for action, date, prix, quantite in zip(actions, dates_achat, prix_achat.tolist(), quantites.tolist()):
+        portefeuille.loc[len(portefeuille)] = [action, date, prix, quantite, 1.0, quantite * prix, quantite * prix + 1.0]
+    duree_achats = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for index, date_cession, prix_unitaire_vente in zip(portefeuille.index, dates_vente, prix_vente.tolist()):
+        quantite_actions = portefeuille.at[index, 'quantite_actions']
+        portefeuille.at[index, 'date_cession']         = date_cession
+        portefeuille.at[index, 'prix_unitaire_vente']  = prix_unitaire_vente
+        portefeuille.at[index, 'frais_cession']        = 1.0
+        portefeuille.at[index, 'produit_cession_brut'] = prix_unitaire_vente * quantite_actions
+        portefeuille.at[index, 'produit_cession_net']  = prix_unitaire_vente * quantite_actions - 1.0
+        portefeuille.at[index, 'plus_value_brute']     = portefeuille.at[index, 'produit_cession_brut'] - portefeuille.at[index, 'cout_acquisition_brut']
+        portefeuille.at[index, 'plus_value_nette']     = portefeuille.at[index, 'produit_cession_net'] - portefeuille.at[index, 'cout_acquisition_net']
+        portefeuille.at[index, 'duree_detention_mois'] = 12
+        portefeuille.at[index, 'performance_brute_%']  = portefeuille.at[index, 'plus_value_brute'] / portefeuille.at[index, 'cout_acquisition_brut'] * 100
+        portefeuille.at[index, 'performance_net_%']    = portefeuille.at[index, 'plus_value_nette'] / portefeuille.at[index, 'cout_acquisition_net'] * 100
+    duree_ventes = time.perf_counter() - t0
+    return duree_achats, duree_ventes, portefeuille.memory_usage(deep=True).sum()
+
+def memoire_livre(livre):
+    """Octets du livre : tableau des positions, liste des noms d'actions et leurs codes (comme memory_usage(deep=True))"""
+    noms = sum(sys.getsizeof(action) for action in livre.actions)
+    return livre.positions().nbytes + sys.getsizeof(livre.actions) + sys.getsizeof(livre._codes) + noms
+
+def livre_boucle(actions, dates_achat, prix_achat, quantites, dates_vente, prix_vente):
+    """LivrePositions rempli une transaction à la fois"""
+    dates_achat, dates_vente = np.datetime_as_string(dates_achat).tolist(), np.datetime_as_string(dates_vente).tolist()
+    livre = LivrePositions()
+    t0 = time.perf_counter()
+    for action, date, prix, quantite in zip(actions, dates_achat, prix_achat.tolist(), quantites.tolist()):
+        livre.ajouter_achat(action, date, prix, quantite, 1.0)
+    duree_achats = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for index, (date_cession, prix_unitaire_vente) in enumerate(zip(dates_vente, prix_vente.tolist())):
+        livre.enregistrer_vente(index, date_cession, prix_unitaire_vente, 1.0, 12.0)
+    duree_ventes = time.perf_counter() - t0
+    return duree_achats, duree_ventes, memoire_livre(livre)
+
+def livre_lots(actions, dates_achat, prix_achat, quantites, dates_vente, prix_vente):
+    """LivrePositions rempli par un lot d'achats puis un lot de ventes"""
+    livre = LivrePositions(len(actions))
+    t0 = time.perf_counter()
+    indices = livre.ajouter_achats(actions, dates_achat, prix_achat, quantites, 1.0)
+    duree_achats = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    livre.enregistrer_ventes(indices, dates_vente, prix_vente, 1.0, 12.0)
+    duree_ventes = time.perf_counter() - t0
+    return duree_achats, duree_ventes, memoire_livre(livre)
+
+if __name__ == "__main__":
+    nb_transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    transactions = transactions_synthetiques(nb_transactions, np.random.default_rng(0))
+
+    print(f"{nb_transactions} transactions (achat puis vente)")
+    for nom, methode in (("DataFrame", dataframe_ancien), ("Livre", livre_boucle), ("Livre lots", livre_lots)):
+        duree_achats, duree_ventes, octets = methode(*transactions)
+        print(f"{nom:<11} achat : {duree_achats / nb_transactions * 1e6:>9.2f} µs | vente : {duree_ventes / nb_transactions * 1e6:>9.2f} µs"
+              f" | mémoire : {octets / nb_transactions:>6.0f} octets par transaction")
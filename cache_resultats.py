@@ -0,0 +1,138 @@
+#
+# Cache des résultats de backtest, invalidé par version des données
+#
+# version_donnees   : une empreinte par action des cours stockés (nombre de lignes, première et dernière date,
+#                     sommes des colonnes). maj_cours_euronext.py la met à jour après chaque téléchargement :
+#                     seules les actions dont les cours ont changé reçoivent une nouvelle version.
+# cache_resultats   : résultat calculé pour (stratégie, empreinte des paramètres, élément), avec la version des
+#                     données utilisée et la durée du calcul. Un élément est en général une action.
+#                     Quand le résultat dépend de tout l'univers (dca_v0.1.py), l'élément est la simulation entière
+#                     et sa version combine celles des actions (version_ensemble).
+#
+# Un backtest relancé avec les mêmes paramètres relit les actions dont la version n'a pas changé et ne
+# recalcule que les autres. Le résumé affiche les résultats relus, les recalculs et le temps économisé.
+#
+# Utilisation:
+#   python cache_resultats.py [cac40_data.db]      (mise à jour des versions)
+#
+
+import hashlib
+import json
+import pickle
+import time
+from datetime import datetime
+
+# À incrémenter quand un calcul mis en cache change : les résultats enregistrés auparavant sont ignorés
+VERSION_CACHE = 3
+
+SQL_TABLE_VERSIONS = """
+CREATE TABLE IF NOT EXISTS version_donnees (
+    action   TEXT PRIMARY KEY,
+    version  TEXT NOT NULL,
+    date_maj TEXT NOT NULL
+)
+"""
+
+SQL_TABLE_CACHE = """
+CREATE TABLE IF NOT EXISTS cache_resultats (
+    strategie    TEXT NOT NULL,
+    parametres   TEXT NOT NULL,
+    element      TEXT NOT NULL,
+    version      TEXT NOT NULL,
+    resultat     BLOB NOT NULL,
+    duree_calcul REAL NOT NULL,
+    date_calcul  TEXT NOT NULL,
+    PRIMARY KEY (strategie, parametres, element)
+)
+"""
+
+# Empreinte des cours d'une action : toute ligne ajoutée, supprimée ou corrigée la modifie
+SQL_EMPREINTES = """
+SELECT action, count(*), min(date), max(date), total(Open), total(High), total(Low), total(Close),
+       total(Volume), total(Dividends), total([Stock Splits])
+FROM actions
+{filtre}
+GROUP BY action
+"""
+
+def _empreinte(valeurs):
+    return hashlib.sha1(json.dumps(valeurs, default=str).encode('utf-8')).hexdigest()[:16]
+
+def mettre_a_jour_versions(conn, actions=None):
+    """Recalcule l'empreinte des actions (toutes par défaut). Retourne le nombre de versions modifiées"""
+    conn.execute(SQL_TABLE_VERSIONS)
+    if actions is None:
+        rows = conn.execute(SQL_EMPREINTES.format(filtre="")).fetchall()
+    else:
+        actions = list(actions)
+        rows = conn.execute(SQL_EMPREINTES.format(filtre=f"WHERE action IN ({','.join('?' * len(actions))})"), actions).fetchall()
+    connues = dict(conn.execute("SELECT action, version FROM version_donnees").fetchall())
+    maintenant = datetime.now().isoformat(timespec='seconds')
+    modifiees = [(row[0], _empreinte(row[1:]), maintenant) for row in rows if connues.get(row[0]) != _empreinte(row[1:])]
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO version_donnees VALUES (?, ?, ?)", modifiees)
+    return len(modifiees)
+
+def versions(conn, actions):
+    """{action: version} ; les actions sans version (base jamais mise à jour depuis) sont calculées à la volée"""
+    conn.execute(SQL_TABLE_VERSIONS)
+    actions = list(actions)
+    requete = f"SELECT action, version FROM version_donnees WHERE action IN ({','.join('?' * len(actions))})"
+    resultat = dict(conn.execute(requete, actions).fetchall())
+    manquantes = [action for action in actions if action not in resultat]
+    if manquantes:
+        mettre_a_jour_versions(conn, manquantes)
+        resultat.update(conn.execute(requete, actions).fetchall())
+    return resultat
+
+def version_ensemble(versions_actions, *autres):
+    """Version unique d'un résultat qui dépend de plusieurs actions (et d'autres données : sélection, ...)"""
+    return _empreinte([sorted(versions_actions.items())] + [sorted(autre.items()) if isinstance(autre, dict) else autre
+                                                              for autre in autres])
+
+class CacheResultats:
+    """Résultats par élément d'une stratégie pour un jeu de paramètres"""
+
+    def __init__(self, conn, strategie, parametres):
+        self.conn = conn
+        self.strategie = strategie
+        self.parametres = _empreinte([VERSION_CACHE] + sorted(parametres.items()))
+        self.nb_relus = 0
+        self.nb_calcules = 0
+        self.temps_economise = 0.0
+        self.temps_calcul = 0.0
+        with conn:
+            conn.execute(SQL_TABLE_CACHE)
+
+    def lire(self, element, version):
+        """Résultat en cache pour cette version des données, None sinon"""
+        row = self.conn.execute(
+            "SELECT resultat, duree_calcul FROM cache_resultats WHERE strategie=? AND parametres=? AND element=? AND version=?",
+            (self.strategie, self.parametres, element, version)).fetchone()
+        if row is None:
+            return None
+        self.nb_relus += 1
+        self.temps_economise += row[1]
+        return pickle.loads(row[0])
+
+    def ecrire(self, element, version, resultat, duree_calcul):
+        self.nb_calcules += 1
+        self.temps_calcul += duree_calcul
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO cache_resultats VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (self.strategie, self.parametres, element, version,
+                               pickle.dumps(resultat, protocol=pickle.HIGHEST_PROTOCOL), duree_calcul,
+                               datetime.now().isoformat(timespec='seconds')))
+
+    def afficher_resume(self):
+        print(f"Cache {self.strategie} : {self.nb_relus} résultat(s) relu(s), {self.nb_calcules} recalculé(s) "
+              f"en {self.temps_calcul:.2f}s, temps économisé ~{self.temps_economise:.2f}s")
+
+if __name__ == "__main__":
+    import sqlite3
+    import sys
+    debut = time.perf_counter()
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else "cac40_data.db")
+    nb_modifiees = mettre_a_jour_versions(conn)
+    conn.close()
+    print(f"Versions des données : {nb_modifiees} action(s) modifiée(s) en {time.perf_counter() - debut:.2f}s")
@@ -0,0 +1,78 @@
+#
+# Chargement en masse dans SQLite
+#
+# Les lignes sont construites directement à partir des colonnes du DataFrame (pas d'iterrows),
+# puis insérées par lots, chaque lot dans une seule transaction.
+# La connexion est réglée pour l'ingestion : journal WAL, synchronous=NORMAL et cache agrandi.
+#
+
+import sqlite3
+
+from schema_v2 import est_schema_v2, jour_depuis_date
+
+TAILLE_LOT = 50000
+
+def configurer_connexion(conn, cache_mo=64):
+    """Réglages SQLite pour l'ingestion : WAL, synchronous=NORMAL, cache de cache_mo Mo"""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{cache_mo * 1024}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+def lignes_actions(historical_data, action):
+    """Lignes (date, Open, High, Low, Close, Volume, Dividends, Stock Splits, action) lues colonne par colonne"""
+    dates = historical_data.index.strftime('%Y-%m-%d').tolist()
+    colonnes = [historical_data[colonne].to_numpy(dtype=float).tolist()
+                for colonne in ('Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits')]
+    return list(zip(dates, *colonnes, [action] * len(dates)))
+
+def lignes_composition(df_data, current_date):
+    """Lignes pour cac40_composition lues colonne par colonne"""
+    nb = len(df_data)
+    return list(zip([current_date] * nb,
+                    df_data['Company'].tolist(),
+                    df_data['MNEMO'].tolist(),
+                    df_data['Sector (ICB)'].tolist(),
+                    df_data['Weight (%)'].tolist(),
+                    df_data['ticker_yahoo'].tolist(),
+                    df_data['Nom Indice'].tolist()))
+
+def inserer_en_masse(conn, insert_sql, data, taille_lot=TAILLE_LOT):
+    """Insère data par lots de taille_lot lignes, une transaction par lot. Retourne le nombre de lignes insérées"""
+    inserted_count = 0
+    try:
+        for i in range(0, len(data), taille_lot):
+            with conn:      # BEGIN ... COMMIT (ROLLBACK en cas d'erreur)
+                cursor = conn.executemany(insert_sql, data[i:i + taille_lot])
+                inserted_count += cursor.rowcount
+    except sqlite3.Error as e:
+        print(f"Erreur lors de l'insertion: {e}")
+    return inserted_count
+
+def inserer_actions_en_masse(conn, data, taille_lot=TAILLE_LOT):
+    if est_schema_v2(conn):
+        return inserer_cours_v2(conn, data, taille_lot)
+    insert_sql = """
+    INSERT OR IGNORE INTO actions
+    (date, Open, High, Low, Close, Volume, Dividends, [Stock Splits], action)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    return inserer_en_masse(conn, insert_sql, data, taille_lot)
+
+def inserer_cours_v2(conn, data, taille_lot=TAILLE_LOT):
+    """Schéma v2 : écrit directement dans tickers / cours (clé entière) sans passer par la vue actions"""
+    if not data:
+        return 0
+    actions = sorted({ligne[8] for ligne in data})
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO tickers (action) VALUES (?)", [(action,) for action in actions])
+    ticker_ids = dict(conn.execute(
+        f"SELECT action, ticker_id FROM tickers WHERE action IN ({','.join('?' * len(actions))})", actions).fetchall())
+
+    data_v2 = [(ticker_ids[ligne[8]], jour_depuis_date(ligne[0])) + tuple(ligne[1:8]) for ligne in data]
+    insert_sql = """
+    INSERT OR IGNORE INTO cours
+    (ticker_id, jour, Open, High, Low, Close, Volume, Dividends, [Stock Splits])
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    return inserer_en_masse(conn, insert_sql, data_v2, taille_lot)
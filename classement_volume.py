@@ -0,0 +1,143 @@
+#
+# Classement mensuel des volumes
+#
+# Table classement_volume_mensuel : pour chaque mois, la première séance du mois (toutes actions
+# confondues) et le rang de chaque action selon son volume ce jour-là (1 = plus fort volume).
+# Le classement est calculé avec ROW_NUMBER() OVER (PARTITION BY mois ORDER BY Volume DESC).
+#
+# La sélection de dca_v0.1.py (action de l'indice au plus fort volume le premier jour du mois) devient
+# une seule lecture de cette table pour toute la simulation, au lieu d'une requête par mois sur
+# strftime('%Y', date) / strftime('%m', date) de toute la table actions.
+#
+# maj_cours_euronext.py met la table à jour après les cours : seuls les mois modifiés sont recalculés
+# (nouveaux mois, nouvelle première séance, nombre d'actions différent à la première séance).
+# selection_mensuelle() ne fait que lire la table : elle ne la construit pas si elle est absente.
+#
+# Utilisation:
+#   python classement_volume.py [cac40_data.db]      (construction / mise à jour)
+#
+
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from symboles import table_composition
+
+SQL_TABLE_CLASSEMENT = """
+CREATE TABLE IF NOT EXISTS classement_volume_mensuel (
+    mois   TEXT NOT NULL,
+    date   DATE NOT NULL,
+    action TEXT NOT NULL,
+    Volume INTEGER,
+    rang   INTEGER NOT NULL,
+    PRIMARY KEY (mois, rang)
+) WITHOUT ROWID
+"""
+
+# Rangs des actions à la première séance de chaque mois de [debut, fin[
+SQL_CLASSER = """
+INSERT INTO classement_volume_mensuel (mois, date, action, Volume, rang)
+WITH premieres AS (
+    SELECT strftime('%Y-%m', date) AS mois, min(date) AS date
+    FROM actions
+    WHERE date >= ? AND date < ?
+    GROUP BY strftime('%Y-%m', date)
+)
+SELECT p.mois, p.date, a.action, a.Volume,
+       ROW_NUMBER() OVER (PARTITION BY p.mois ORDER BY a.Volume DESC, a.action)
+FROM premieres p
+JOIN actions a ON a.date = p.date
+"""
+
+def initialiser(conn):
+    with conn:
+        conn.execute(SQL_TABLE_CLASSEMENT)
+
+def _debut_mois(mois):
+    return f"{mois}-01"
+
+def _mois_suivant(mois):
+    return (datetime.strptime(mois, '%Y-%m') + relativedelta(months=1)).strftime('%Y-%m-%d')
+
+def _recalculer(conn, debut, fin):
+    """Recalcule les mois compris entre les dates debut (incluse) et fin (exclue)"""
+    conn.execute("DELETE FROM classement_volume_mensuel WHERE mois >= ? AND mois < ?", (debut[:7], fin[:7]))
+    conn.execute(SQL_CLASSER, (debut, fin))
+
+def mois_a_recalculer(conn):
+    """
+    Plages [debut, fin[ à recalculer : mois antérieurs au premier mois classé, dernier mois classé et suivants,
+    et mois classés dont la première séance ou le nombre d'actions à cette séance a changé.
+    Nombre d'actions de chaque séance en une requête groupée (parcours de l'index sur la date) : la première
+    séance de chaque mois et son nombre d'actions sont comparés en mémoire au classement.
+    """
+    classes = conn.execute("""
+        SELECT mois, date, count(*) FROM classement_volume_mensuel GROUP BY mois ORDER BY mois
+    """).fetchall()
+    if not classes:
+        return [("0000-01-01", "9999-12-31")]
+
+    actuels = {}
+    for date, nb_actions in conn.execute("SELECT date, count(*) FROM actions WHERE date IS NOT NULL GROUP BY date ORDER BY date"):
+        actuels.setdefault(date[:7], (date, nb_actions))
+    plages = []
+    premier_mois, dernier_mois = classes[0][0], classes[-1][0]
+    if any(mois < premier_mois for mois in actuels):
+        plages.append(("0000-01-01", _debut_mois(premier_mois)))
+    for mois, date, nb_actions in classes[:-1]:
+        if actuels.get(mois) != (date, nb_actions):
+            plages.append((_debut_mois(mois), _mois_suivant(mois)))
+    plages.append((_debut_mois(dernier_mois), "9999-12-31"))
+    return plages
+
+def mettre_a_jour_classement(conn):
+    """Construction ou mise à jour incrémentale du classement"""
+    debut = time.perf_counter()
+    initialiser(conn)
+    plages = mois_a_recalculer(conn)
+    with conn:
+        for debut_plage, fin_plage in plages:
+            _recalculer(conn, debut_plage, fin_plage)
+    nb_mois = conn.execute("SELECT count(DISTINCT mois) FROM classement_volume_mensuel").fetchone()[0]
+    print(f"Classement mensuel des volumes : {len(plages)} plage(s) de mois recalculée(s), {nb_mois} mois "
+          f"en {time.perf_counter() - debut:.2f}s")
+
+def selection_mensuelle(conn, date_debut, date_fin, nom_indice='CAC_40', composition=None):
+    """
+    {'AAAA-MM': action} : action de l'indice au plus fort volume à la première séance de chaque mois
+    de [date_debut, date_fin]. Une seule lecture de la table.
+    Indice pris dans sa dernière composition, ou à la date de la séance si composition (CompositionHistorique) est fourni.
+    """
+    existe = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'classement_volume_mensuel'").fetchone()
+    if existe is None or conn.execute("SELECT 1 FROM classement_volume_mensuel LIMIT 1").fetchone() is None:
+        raise RuntimeError("Classement mensuel des volumes absent : lancer maj_cours_euronext.py ou python classement_volume.py")
+    mois_debut, mois_fin = date_debut.strftime('%Y-%m'), date_fin.strftime('%Y-%m')
+    if composition is None:
+        cursor = conn.execute(f"""
+            SELECT mois, action, min(rang)
+            FROM classement_volume_mensuel
+            WHERE mois >= ? AND mois <= ?
+              AND action in (SELECT ticker_yahoo FROM {table_composition(conn)} where nom_indice=? and date_maj=(select max(date_maj) from cac40_composition))
+            GROUP BY mois
+        """, (mois_debut, mois_fin, nom_indice))
+        return {mois: action for mois, action, _ in cursor.fetchall()}
+
+    lignes = conn.execute("""
+        SELECT mois, date, action FROM classement_volume_mensuel WHERE mois >= ? AND mois <= ? ORDER BY mois, rang
+    """, (mois_debut, mois_fin)).fetchall()
+    if not lignes:
+        return {}
+    mois, dates, actions = (np.array(colonne) for colonne in zip(*lignes))
+    membre = composition.est_membre(nom_indice, dates, actions)
+    # Lignes triées par (mois, rang) : le premier membre de chaque mois est retenu
+    mois_membres, premiers = np.unique(mois[membre], return_index=True)
+    return dict(zip(mois_membres.tolist(), actions[membre][premiers].tolist()))
+
+if __name__ == "__main__":
+    import sqlite3
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else "cac40_data.db")
+    mettre_a_jour_classement(conn)
+    conn.close()
@@ -0,0 +1,127 @@
+#
+# Composition des indices à date (point-in-time)
+#
+# Chaque exécution de maj_cours_euronext.py ajoute une photo de la composition des indices dans
+# cac40_composition (date_maj). Une photo est valable de sa date jusqu'à la photo suivante du même
+# indice : une action est membre de l'indice sur la réunion des intervalles des photos où elle figure.
+#
+# Avant la première photo, la composition n'est pas connue : elle est supposée égale à la première
+# photo (même hypothèse que l'utilisation de la dernière composition, mais limitée à la période
+# sans historique).
+#
+# Les photos d'un indice sont rangées dans une matrice booléenne (photos x actions) : la composition
+# à une date est la ligne de la dernière photo antérieure (recherche dichotomique), et le masque
+# d'appartenance sur une grille (dates x actions) s'obtient par une seule indexation.
+#
+# Les tickers sont lus dans la vue composition_yahoo (symboles.py) : une correspondance MNEMO -> ticker
+# corrigée après coup s'applique à toutes les photos sans les réécrire.
+#
+# Utilisation:
+#   python composition_historique.py [cac40_data.db] [CAC_40]      (intervalles d'appartenance)
+#
+
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+from symboles import table_composition
+
+def actions_indice(conn, nom_indice='CAC_40', toutes_les_photos=False):
+    """
+    Actions ayant des cours et membres de l'indice dans sa dernière photo (univers des scripts DCA),
+    ou dans l'une quelconque de ses photos si toutes_les_photos (univers sans biais de survie)
+    """
+    table = table_composition(conn)
+    if toutes_les_photos:
+        cursor = conn.execute(f"SELECT DISTINCT action FROM actions where action in (SELECT ticker_yahoo FROM {table} where nom_indice=?) ORDER BY action",
+                              (nom_indice,))
+    else:
+        cursor = conn.execute(f"SELECT DISTINCT action FROM actions where action in (SELECT ticker_yahoo FROM {table} where nom_indice=? and date_maj=(select max(date_maj) from cac40_composition) limit 300) ORDER BY action",
+                              (nom_indice,))
+    return [row[0] for row in cursor.fetchall()]
+
+class CompositionIndice:
+    """Photos successives de la composition d'un indice"""
+
+    def __init__(self, dates, membres):
+        """dates : dates des photos (triées), membres : ensemble des tickers de chaque photo"""
+        self.dates = np.array(dates, dtype='datetime64[D]')
+        self.actions = sorted(set().union(*membres)) if membres else []
+        self.index = {action: j for j, action in enumerate(self.actions)}
+        # Une colonne de plus, toujours fausse, pour les actions qui n'ont jamais été membres (colonne -1)
+        self.matrice = np.zeros((len(self.dates), len(self.actions) + 1), dtype=bool)
+        for i, tickers in enumerate(membres):
+            self.matrice[i, [self.index[action] for action in tickers]] = True
+
+    def photos(self, dates):
+        """Indice de la photo en vigueur à chaque date (la première pour les dates antérieures)"""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        return np.maximum(np.searchsorted(self.dates, dates, side='right') - 1, 0)
+
+    def colonnes(self, actions):
+        """Colonne de chaque action dans la matrice (-1 si elle n'a jamais été membre)"""
+        return np.array([self.index.get(action, -1) for action in actions], dtype=np.int64)
+
+class CompositionHistorique:
+    """Composition à date de tous les indices présents dans cac40_composition"""
+
+    def __init__(self, indices):
+        self.indices = indices
+
+    @classmethod
+    def charger(cls, conn):
+        """Lit toutes les photos en une requête"""
+        photos = defaultdict(lambda: defaultdict(set))
+        for nom_indice, date_maj, ticker in conn.execute(
+                f"SELECT nom_indice, date_maj, ticker_yahoo FROM {table_composition(conn)} ORDER BY nom_indice, date_maj"):
+            photos[nom_indice][date_maj].add(ticker)
+        return cls({nom_indice: CompositionIndice(list(par_date), list(par_date.values()))
+                    for nom_indice, par_date in photos.items()})
+
+    def actions(self, nom_indice):
+        """Toutes les actions ayant été membres de l'indice (univers sans biais de survie)"""
+        return list(self.indices[nom_indice].actions)
+
+    def constituants(self, nom_indice, date):
+        """Actions membres de l'indice à la date donnée"""
+        indice = self.indices[nom_indice]
+        if not len(indice.dates):
+            return []
+        ligne = indice.matrice[indice.photos([date])[0]]
+        return [action for action, membre in zip(indice.actions, ligne) if membre]
+
+    def masque(self, nom_indice, dates, actions):
+        """Matrice booléenne (dates x actions) : action membre de l'indice à la date"""
+        indice = self.indices[nom_indice]
+        return indice.matrice[indice.photos(dates)[:, None], indice.colonnes(actions)[None, :]]
+
+    def est_membre(self, nom_indice, dates, actions):
+        """Version couple par couple de masque : dates[k] et actions[k] (tableaux de même longueur)"""
+        indice = self.indices[nom_indice]
+        return indice.matrice[indice.photos(dates), indice.colonnes(actions)]
+
+    def intervalles(self, nom_indice):
+        """{action: [(début, fin)]} intervalles d'appartenance, fin exclue (NaT = toujours membre)"""
+        indice = self.indices[nom_indice]
+        bornes = np.append(indice.dates, np.datetime64('NaT'))
+        resultat = {}
+        for action, j in indice.index.items():
+            colonne = np.concatenate([[False], indice.matrice[:, j], [False]]).astype(np.int8)
+            changements = np.diff(colonne)
+            entrees = np.flatnonzero(changements == 1)
+            sorties = np.flatnonzero(changements == -1)
+            resultat[action] = [(bornes[e], bornes[s]) for e, s in zip(entrees, sorties)]
+        return resultat
+
+if __name__ == "__main__":
+    import sqlite3
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else "cac40_data.db")
+    nom_indice = sys.argv[2] if len(sys.argv) > 2 else "CAC_40"
+    historique = CompositionHistorique.charger(conn)
+    conn.close()
+    indice = historique.indices[nom_indice]
+    print(f"{nom_indice} : {len(indice.dates)} photo(s) de {indice.dates[0]} à {indice.dates[-1]}, {len(indice.actions)} action(s)")
+    for action, periodes in sorted(historique.intervalles(nom_indice).items()):
+        texte = ", ".join(f"{debut} -> {'...' if np.isnat(fin) else fin}" for debut, fin in periodes)
+        print(f"{action:<12} {texte}")
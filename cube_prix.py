@@ -0,0 +1,162 @@
+#
+# Cube de prix en colonnes, projeté en mémoire (memory-mapped)
+#
+# Pour chaque champ (Open, High, Low, Close, Volume, Dividends, Stock Splits) un fichier binaire
+# float64 de forme (nb_dates, nb_actions), ligne = date de séance, colonne = action (NaN si pas de cours).
+# dates.bin contient l'axe des dates commun (int64, jours depuis le 01/01/1970), meta.json la liste
+# des actions et la forme du cube.
+#
+# Les fichiers sont rangés date par date : une mise à jour n'ajoute que les nouvelles séances en fin
+# de fichier. Un backtest charge tout l'univers avec np.memmap, sans copie et sans requête SQL.
+#
+# Utilisation:
+#   python cube_prix.py [cac40_data.db] [cube_prix]     (construction / mise à jour puis test de chargement)
+#
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+CHAMPS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+class CubePrix:
+    """Cube chargé : dates (datetime64[D]), actions, index action -> colonne et un tableau par champ"""
+
+    def __init__(self, dates, actions, champs):
+        self.dates   = dates
+        self.actions = actions
+        self.index   = {action: i for i, action in enumerate(actions)}
+        self.champs  = champs
+
+    def __getitem__(self, champ):
+        return self.champs[champ]
+
+    def colonne(self, champ, action):
+        return self.champs[champ][:, self.index[action]]
+
+def _fichier(repertoire, champ):
+    return os.path.join(repertoire, champ.replace(' ', '_') + '.bin')
+
+def _lire_meta(repertoire):
+    chemin = os.path.join(repertoire, 'meta.json')
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+def _ecrire_meta(repertoire, meta):
+    chemin = os.path.join(repertoire, 'meta.json')
+    with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(chemin + '.tmp', chemin)    # meta.json n'est remplacé qu'une fois les données écrites
+
+def _lire_lignes(conn, date_min=None):
+    """Lignes de la table actions (toutes, ou postérieures à date_min) sous forme de tableaux numpy"""
+    sql = f"SELECT date, action, {', '.join('[' + c + ']' for c in CHAMPS)} FROM actions"
+    params = ()
+    if date_min is not None:
+        sql += " WHERE date > ?"
+        params = (date_min,)
+    rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=object), np.empty((0, len(CHAMPS)))
+    dates, actions, *valeurs = zip(*rows)
+    dates = np.array(dates, dtype='datetime64[D]')
+    valeurs = np.array(valeurs, dtype=float).T     # None -> NaN
+    return dates, np.array(actions, dtype=object), valeurs
+
+def _matrices(dates, actions, valeurs, axe_dates, liste_actions):
+    """Répartit les lignes (date, action, valeurs) dans des matrices (axe_dates x liste_actions)"""
+    i = np.searchsorted(axe_dates, dates)
+    index = {action: k for k, action in enumerate(liste_actions)}
+    j = np.fromiter((index[a] for a in actions), dtype=np.int64, count=len(actions))
+    matrices = {}
+    for k, champ in enumerate(CHAMPS):
+        m = np.full((len(axe_dates), len(liste_actions)), np.nan)
+        m[i, j] = valeurs[:, k]
+        matrices[champ] = m
+    return matrices
+
+def construire_cube(conn, repertoire="cube_prix"):
+    """Construction complète du cube à partir de la table actions"""
+    os.makedirs(repertoire, exist_ok=True)
+    dates, actions, valeurs = _lire_lignes(conn)
+    liste_actions = sorted(set(actions.tolist()))
+    axe_dates = np.unique(dates)
+    matrices = _matrices(dates, actions, valeurs, axe_dates, liste_actions)
+
+    axe_dates.astype('int64').tofile(os.path.join(repertoire, 'dates.bin'))
+    for champ, m in matrices.items():
+        m.tofile(_fichier(repertoire, champ))
+    _ecrire_meta(repertoire, {
+        'actions': liste_actions,
+        'nb_dates': len(axe_dates),
+        'derniere_date': str(axe_dates[-1]) if len(axe_dates) else None,
+        'nb_lignes': len(dates),
+    })
+    return len(axe_dates), len(liste_actions)
+
+def mettre_a_jour_cube(conn, repertoire="cube_prix"):
+    """
+    Mise à jour incrémentale : ajoute en fin de fichier les séances postérieures à la dernière date du cube.
+    Reconstruction complète si de nouvelles actions sont apparues ou si des cours antérieurs ont été ajoutés.
+    """
+    debut = time.perf_counter()
+    meta = _lire_meta(repertoire)
+    if meta is None or meta['derniere_date'] is None:
+        nb_dates, nb_actions = construire_cube(conn, repertoire)
+        print(f"Cube de prix construit : {nb_dates} dates x {nb_actions} actions en {time.perf_counter() - debut:.2f}s")
+        return
+
+    nb_lignes_connues = conn.execute("SELECT count(*) FROM actions WHERE date <= ?", (meta['derniere_date'],)).fetchone()[0]
+    dates, actions, valeurs = _lire_lignes(conn, meta['derniere_date'])
+    nouvelles_actions = set(actions.tolist()) - set(meta['actions'])
+    if nb_lignes_connues != meta['nb_lignes'] or nouvelles_actions:
+        nb_dates, nb_actions = construire_cube(conn, repertoire)
+        print(f"Cube de prix reconstruit : {nb_dates} dates x {nb_actions} actions en {time.perf_counter() - debut:.2f}s")
+        return
+    if len(dates) == 0:
+        print("Cube de prix déjà à jour")
+        return
+
+    axe_dates = np.unique(dates)
+    matrices = _matrices(dates, actions, valeurs, axe_dates, meta['actions'])
+    nb_colonnes = len(meta['actions'])
+    # Troncature à la taille connue (écriture interrompue) puis ajout des nouvelles lignes
+    for chemin, taille_element, donnees in [(os.path.join(repertoire, 'dates.bin'), 8, axe_dates.astype('int64'))] + \
+            [(_fichier(repertoire, champ), 8 * nb_colonnes, m) for champ, m in matrices.items()]:
+        with open(chemin, 'r+b') as f:
+            f.truncate(meta['nb_dates'] * taille_element)
+            f.seek(0, os.SEEK_END)
+            f.write(donnees.tobytes())
+    meta['nb_dates']     += len(axe_dates)
+    meta['derniere_date'] = str(axe_dates[-1])
+    meta['nb_lignes']    += len(dates)
+    _ecrire_meta(repertoire, meta)
+    print(f"Cube de prix : {len(axe_dates)} nouvelle(s) séance(s) ajoutée(s) en {time.perf_counter() - debut:.2f}s")
+
+def charger_cube(repertoire="cube_prix"):
+    """Charge le cube en lecture seule par projection mémoire (aucune copie des données)"""
+    meta = _lire_meta(repertoire)
+    if meta is None:
+        raise FileNotFoundError(f"Pas de cube de prix dans {repertoire} : lancer maj_cours_euronext.py")
+    forme = (meta['nb_dates'], len(meta['actions']))
+    dates = np.memmap(os.path.join(repertoire, 'dates.bin'), dtype='int64', mode='r', shape=(forme[0],))
+    champs = {champ: np.memmap(_fichier(repertoire, champ), dtype='float64', mode='r', shape=forme)
+              for champ in CHAMPS}
+    return CubePrix(dates.view('datetime64[D]'), meta['actions'], champs)
+
+if __name__ == "__main__":
+    import sqlite3
+    db_file    = sys.argv[1] if len(sys.argv) > 1 else "cac40_data.db"
+    repertoire = sys.argv[2] if len(sys.argv) > 2 else "cube_prix"
+    conn = sqlite3.connect(db_file)
+    mettre_a_jour_cube(conn, repertoire)
+    conn.close()
+
+    debut = time.perf_counter()
+    cube = charger_cube(repertoire)
+    print(f"Chargement : {len(cube.dates)} dates x {len(cube.actions)} actions en {(time.perf_counter() - debut) * 1000:.1f} ms")
@@ -0,0 +1,62 @@
+#
+# Analyse glissante de dca_cac40.py : résultat du DCA pour chaque mois de départ possible
+#
+# Relancer la simulation avec chaque date_debut coûte un temps quadratique en nombre de mois. Or un achat
+# ne dépend pas de la date de début : la simulation démarrant au mois s contient exactement les achats
+# (et leurs ventes) des mois >= s de la simulation complète. Les montants investis et récupérés de chaque
+# couple (mois, action) sont donc rangés dans deux matrices (mois x actions), puis cumulés une fois : le
+# total d'un départ s est une différence de sommes cumulées, soit un coût linéaire en nombre de mois.
+#
+# Le résultat est la table (mois de départ x actions) de la « Performance globale NETTE » (metriques.py) :
+# (ventes nettes réalisées - investissement net) / investissement net, prête pour une carte de chaleur.
+# Avec duree_fenetre, chaque départ ne garde que duree_fenetre mois d'achats au lieu d'aller jusqu'à date_fin.
+#
+
+import numpy as np
+import pandas as pd
+
+from moteur_vectorise import MatriceCours, calculer_achats, calculer_ventes, calendrier_mensuel
+
+def sommes_par_depart(flux, duree_fenetre=None):
+    """Somme des lignes [s, s + duree_fenetre[ (ou [s, fin[) de flux (mois x actions) pour chaque départ s"""
+    nb_mois = len(flux)
+    cumul = np.vstack([np.zeros((1, flux.shape[1])), np.cumsum(flux, axis=0)])
+    departs = np.arange(nb_mois)
+    fins = np.full(nb_mois, nb_mois) if duree_fenetre is None else np.minimum(departs + duree_fenetre, nb_mois)
+    return cumul[fins] - cumul[departs]
+
+def performances_glissantes(store, actions, date_debut, date_fin, montant_mensuel, frais_acquisition, frais_cession,
+                            duree_investissement, duree_fenetre=None, composition=None):
+    """
+    Retourne deux DataFrame (index 'AAAA-MM' du mois de départ, une colonne par action) : performance globale
+    nette en % et gain/perte net en €. NaN quand aucun achat n'a lieu à partir de ce départ.
+    """
+    matrice = MatriceCours(store, actions)
+    mois = calendrier_mensuel(date_debut, date_fin)
+    livre, colonnes, dates_achat, rangs = calculer_achats(matrice, mois, montant_mensuel, frais_acquisition, composition)
+    positions = calculer_ventes(matrice, livre, colonnes, dates_achat, duree_investissement, frais_cession).positions()
+
+    # Flux de chaque couple (rang du mois d'achat, action)
+    investi = np.zeros((len(mois), len(actions)))
+    vendu   = np.zeros((len(mois), len(actions)))
+    investi[rangs, colonnes] = positions['cout_acquisition_net']
+    vendu[rangs, colonnes]   = np.nan_to_num(positions['produit_cession_net'])
+
+    total_investi = sommes_par_depart(investi, duree_fenetre)
+    total_vendu   = sommes_par_depart(vendu, duree_fenetre)
+    gains = np.where(total_investi > 0, total_vendu - total_investi, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        performances = gains / total_investi * 100
+
+    index = pd.Index(np.datetime_as_string(mois, unit='M'), name='depart')
+    return pd.DataFrame(performances, index=index, columns=actions), pd.DataFrame(gains, index=index, columns=actions)
+
+def resume_glissant(performances):
+    """Par action : part des mois de départ en gain, pire, médiane et meilleure performance"""
+    return pd.DataFrame({
+        'departs':             performances.notna().sum(),
+        'departs_en_gain_%':   (performances > 0).sum() / performances.notna().sum() * 100,
+        'pire_%':              performances.min(),
+        'mediane_%':           performances.median(),
+        'meilleure_%':         performances.max(),
+    })
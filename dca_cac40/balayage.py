@@ -0,0 +1,65 @@
+#
+# Balayage des durées de détention pour dca_cac40.py
+#
+# Les achats sont calculés une seule fois, puis les ventes de toutes les durées demandées
+# sont résolues en un seul appel sur la matrice des cours. Le résultat est un tableau markdown
+# au format de resultats_sur_5_ans.md / resultats_sur_10_ans.md : gain/perte net par action
+# et par durée, total, et nombre d'actions avec perte / sans gain / avec gain.
+#
+
+import numpy as np
+
+from moteur_vectorise import MatriceCours, TROUVE, calculer_achats, calendrier_mensuel, mois_de_vente
+
+def balayer_durees(store, actions, date_debut, date_fin, montant_mensuel, frais_acquisition, frais_cession, durees,
+                   composition=None):
+    """Retourne {durée: gain/perte net par action} (tableau aligné sur actions)"""
+    matrice = MatriceCours(store, actions)
+    livre, colonnes, dates_achat, _ = calculer_achats(matrice, calendrier_mensuel(date_debut, date_fin),
+                                                      montant_mensuel, frais_acquisition, composition)
+    quantites = livre.positions()['quantite_actions']
+    cout_net  = livre.positions()['cout_acquisition_net']
+    nb_actions = len(actions)
+    total_investi = np.bincount(colonnes, weights=cout_net, minlength=nb_actions)
+
+    # Ventes de toutes les durées en une passe : (durées x achats)
+    nb_achats = len(livre)
+    mois_vente = np.concatenate([mois_de_vente(dates_achat, duree) for duree in durees])
+    colonnes_vente = np.tile(colonnes, len(durees))
+    indices_vente, statut_vente = matrice.cours_asap(mois_vente, colonnes_vente)
+    vendu = statut_vente == TROUVE
+    produit_net = np.where(vendu, matrice.prix[indices_vente, colonnes_vente] * np.tile(quantites, len(durees)) - frais_cession, 0.0)
+
+    gains = {}
+    for k, duree in enumerate(durees):
+        tranche = slice(k * nb_achats, (k + 1) * nb_achats)
+        total_vente = np.bincount(colonnes, weights=produit_net[tranche], minlength=nb_actions)
+        gains[duree] = total_vente - total_investi
+    return gains
+
+def format_euros(valeur):
+    """1026.79 -> '1 026,79 €'"""
+    return f"{valeur:,.2f} €".replace(',', ' ').replace('.', ',')
+
+def tableau_markdown(actions, gains, montant_mensuel, nb_annees):
+    """Tableau au format des rapports resultats_sur_N_ans.md"""
+    durees = list(gains)
+
+    def ligne(*cellules):
+        return f"| {cellules[0]:<10} " + "".join(f"| {cellule:<14} " for cellule in cellules[1:]) + "|"
+
+    separateur = "|" + "-" * 12 + ("|" + "-" * 16) * len(durees) + "|"
+    lignes = [f"**Analyse des Résultats avec une durée d'investissement de {nb_annees} ans**", "",
+              ligne("Action", *["Gain/Perte net"] * len(durees)), separateur]
+    for j, action in enumerate(actions):
+        lignes.append(ligne(action, *[format_euros(gains[duree][j]) for duree in durees]))
+    lignes.append(separateur)
+    lignes.append(ligne("Total", *[format_euros(gains[duree].sum()) for duree in durees]))
+    lignes.append(ligne("Analyse", *[f"{montant_mensuel:.0f}€/{duree} mois" for duree in durees]))
+    lignes.append(separateur)
+    # Arrondi au centime comme dans le tableau : 0,00 € compte comme « sans gain »
+    arrondis = {duree: np.round(gains[duree], 2) for duree in durees}
+    lignes.append(ligne("Avec perte", *[str(int(np.count_nonzero(arrondis[duree] < 0))) for duree in durees]))
+    lignes.append(ligne("Sans gain",  *[str(int(np.count_nonzero(arrondis[duree] == 0))) for duree in durees]))
+    lignes.append(ligne("Avec gain",  *[str(int(np.count_nonzero(arrondis[duree] > 0))) for duree in durees]))
+    return "\n".join(lignes) + "\n"
@@ -0,0 +1,259 @@
+#
+# Métriques de dca_cac40.py calculées pour toutes les actions en une passe
+#
+# Au lieu de filtrer le portefeuille action par action, chaque statistique est une agrégation groupée par
+# action sur tout le portefeuille (transactions gagnantes / perdantes calculées une fois, intervalles entre
+# achats par différence sur le portefeuille trié). Le résultat est un tableau typé : une ligne par action,
+# colonnes float64 / int64.
+#
+# lignes_resultats() en tire les lignes [métrique, valeur, commentaire] écrites dans resultat_valeurs_seules.csv,
+# afficher_analyse() l'affichage console détaillé d'une action.
+#
+
+import numpy as np
+import pandas as pd
+
+COLONNES_NUMERIQUES = ['cout_acquisition_brut', 'cout_acquisition_net', 'produit_cession_brut', 'produit_cession_net',
+                       'frais_acquisition', 'frais_cession', 'duree_detention_mois', 'performance_net_%']
+
+def _colonnes(portefeuille):
+    """Colonnes utiles en float64 (les ventes peuvent manquer, ou être de type object en mode boucle)"""
+    return pd.DataFrame({colonne: pd.to_numeric(portefeuille[colonne], errors='coerce').astype(float)
+                         if colonne in portefeuille else np.full(len(portefeuille), np.nan)
+                         for colonne in COLONNES_NUMERIQUES}, index=portefeuille.index)
+
+def calculer_metriques(portefeuille, actions, taux_sans_risque):
+    """
+    Tableau des métriques par action (index = actions, dans cet ordre).
+    Sommes sans les valeurs manquantes, taux de réussite rapporté à toutes les transactions (vendues ou non),
+    intervalles en jours entre achats successifs d'une même action.
+    """
+    valeurs = _colonnes(portefeuille)
+    valeurs['action'] = pd.Categorical(portefeuille['action'], categories=actions)
+    valeurs['date_acquisition'] = portefeuille['date_acquisition']
+    duree_annees = valeurs['duree_detention_mois'] / 12
+    valeurs['rendement_annualise_brut_%'] = ((valeurs['produit_cession_brut'] / valeurs['cout_acquisition_brut']) ** (1 / duree_annees) - 1) * 100
+    valeurs['rendement_annualise_net_%']  = ((valeurs['produit_cession_net']  / valeurs['cout_acquisition_net'])  ** (1 / duree_annees) - 1) * 100
+    valeurs['rendement_pondere_brut'] = valeurs['rendement_annualise_brut_%'] * valeurs['cout_acquisition_brut']
+    valeurs['rendement_pondere_net']  = valeurs['rendement_annualise_net_%'] * valeurs['cout_acquisition_net']
+    performance = valeurs['performance_net_%']
+    valeurs['performance_gagnante'] = performance.where(performance > 0)
+    valeurs['performance_perdante'] = performance.where(performance <= 0)
+
+    groupes = valeurs.groupby('action', observed=False, sort=True)
+    m = groupes.agg(
+        date_acquisition_debut=('date_acquisition', 'min'),
+        date_acquisition_fin=('date_acquisition', 'max'),
+        nb_transactions=('action', 'size'),
+        total_investi_brut=('cout_acquisition_brut', 'sum'),
+        total_investi=('cout_acquisition_net', 'sum'),
+        total_vente_brut=('produit_cession_brut', 'sum'),
+        total_vente=('produit_cession_net', 'sum'),
+        frais_acquisition=('frais_acquisition', 'sum'),
+        frais_cession=('frais_cession', 'sum'),
+        rendement_pondere_brut=('rendement_pondere_brut', 'sum'),
+        rendement_pondere_net=('rendement_pondere_net', 'sum'),
+        volatilite_performances=('performance_net_%', 'std'),
+        volatilite_rendement_annualise=('rendement_annualise_net_%', 'std'),
+        meilleure_performance=('performance_net_%', 'max'),
+        pire_performance=('performance_net_%', 'min'),
+        performance_moyenne=('performance_net_%', 'mean'),
+        performance_mediane=('performance_net_%', 'median'),
+        nb_gagnantes=('performance_gagnante', 'count'),
+        nb_perdantes=('performance_perdante', 'count'),
+        gain_moyen_gagnantes=('performance_gagnante', 'mean'),
+        perte_moyenne_perdantes=('performance_perdante', 'mean'),
+    )
+
+    m['gain_net']  = m['total_vente'] - m['total_investi']
+    m['gain_brut'] = m['total_vente_brut'] - m['total_investi_brut']
+    m['total_frais'] = m['frais_acquisition'] + m['frais_cession']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m['performance_globale_brute'] = m['gain_brut'] / m['total_investi_brut'] * 100
+        m['performance_globale_nette'] = m['gain_net'] / m['total_investi'] * 100
+        m['impact_frais'] = m['performance_globale_brute'] - m['performance_globale_nette']
+        m['ratio_frais_gains'] = np.where(m['gain_brut'] != 0, m['total_frais'] / m['gain_brut'].abs() * 100, 0.0)
+        m['taux_frais'] = m['total_frais'] / m['total_investi'] * 100
+        m['rendement_annualise_brut_moyen'] = m['rendement_pondere_brut'] / m['total_investi_brut']
+        m['rendement_annualise_net_moyen']  = m['rendement_pondere_net'] / m['total_investi']
+        m['ratio_sharpe'] = (m['rendement_annualise_net_moyen'] - taux_sans_risque) / m['volatilite_rendement_annualise']
+        m['taux_reussite'] = np.where(m['nb_transactions'] > 0, m['nb_gagnantes'] / m['nb_transactions'] * 100, 0.0)
+        perte = m['perte_moyenne_perdantes']
+        m['ratio_gain_perte'] = np.where(perte != 0, -m['gain_moyen_gagnantes'] / perte, np.inf)
+
+    # Intervalles entre achats successifs : tri par (action, date) puis différence avec la ligne précédente
+    triees = valeurs[['action']].assign(date=pd.to_datetime(valeurs['date_acquisition'])).sort_values(['action', 'date'], kind='stable')
+    codes = triees['action'].cat.codes.to_numpy()
+    meme_action = np.append(False, codes[1:] == codes[:-1])
+    intervalles = pd.DataFrame({'action': triees['action'][meme_action],
+                                'jours': triees['date'].diff().dt.days[meme_action].astype(float)})
+    m = m.join(intervalles.groupby('action', observed=False).agg(
+        nb_intervalles=('jours', 'count'),
+        intervalle_min=('jours', 'min'),
+        intervalle_max=('jours', 'max'),
+        intervalle_moyen=('jours', 'mean'),
+        intervalle_median=('jours', 'median'),
+        intervalle_ecart_type=('jours', 'std'),
+    ))
+
+    m.index = pd.Index(actions, name='action')
+    return m.drop(columns=['frais_acquisition', 'frais_cession', 'rendement_pondere_brut', 'rendement_pondere_net'])
+
+def lignes_resultats(ligne, action, duree_investissement, taux_sans_risque):
+    """Lignes [métrique, valeur, commentaire] d'une action pour resultat_valeurs_seules.csv"""
+    resultats = []
+    if ligne['nb_intervalles'] > 0:
+        resultats.append(["Intervalle MIN", f"{ligne['intervalle_min']:.0f} jours", ""])
+        resultats.append(["Intervalle MAX", f"{ligne['intervalle_max']:.0f} jours", ""])
+        resultats.append(["Intervalle MOYEN", f"{ligne['intervalle_moyen']:.1f} jours", ""])
+        resultats.append(["Intervalle MÉDIAN", f"{ligne['intervalle_median']:.1f} jours", ""])
+        resultats.append(["Écart-type", f"{ligne['intervalle_ecart_type']:.1f} jours", ""])
+
+    resultats.append(["MÉTRIQUES GLOBALES", "", ""])
+    resultats.append(["Action", action, ""])
+    resultats.append(["Date acquisition début", ligne['date_acquisition_debut'], ""])
+    resultats.append(["Date acquisition fin",   ligne['date_acquisition_fin'], ""])
+
+    resultats.append(["Total investi (net)", f"{ligne['total_investi']:.2f}€", ""])
+    resultats.append(["Total vendu (net)", f"{ligne['total_vente']:.2f}€", ""])
+    resultats.append(["Gain/Perte net", f"{ligne['gain_net']:.2f}€", ""])
+    resultats.append(["Total frais", f"{ligne['total_frais']:.2f}€", ""])
+    resultats.append(["Performance globale BRUTE", f"{ligne['performance_globale_brute']:.2f}%", ""])
+    resultats.append(["Performance globale NETTE", f"{ligne['performance_globale_nette']:.2f}%", ""])
+    resultats.append(["Durée de détention", f"{duree_investissement} mois", ""])
+    resultats.append(["Nombre de transactions", f"{ligne['nb_transactions']}", ""])
+
+    resultats.append(["", "", ""])
+    resultats.append(["IMPACT DES FRAIS", "", ""])
+    resultats.append(["Impact des frais sur la performance", f"-{ligne['impact_frais']:.2f}%", ""])
+    resultats.append(["Ratio frais/gains bruts", f"{ligne['ratio_frais_gains']:.2f}%", ""])
+    resultats.append(["Taux de frais sur le total investi", f"{ligne['taux_frais']:.2f}%", ""])
+
+    resultats.append(["", "", ""])
+    resultats.append(["PERFORMANCES INDIVIDUELLES", "", ""])
+    resultats.append(["Meilleure performance nette sur une transaction", f"{ligne['meilleure_performance']:.2f}%", ""])
+    resultats.append(["Pire performance nette sur une transaction (Max Drawdown)", f"{ligne['pire_performance']:.2f}%", ""])
+    resultats.append(["Performance nette moyenne par transaction", f"{ligne['performance_moyenne']:.2f}%", ""])
+    resultats.append(["Performance nette médiane par transaction", f"{ligne['performance_mediane']:.2f}%", ""])
+    resultats.append(["", "", ""])
+
+    resultats.append(["", "", ""])
+    resultats.append(["MÉTRIQUES DE RENDEMENT", "", ""])
+    resultats.append(["RENDEMENTS ANNUALISÉS MOYENS", "", ""])
+    resultats.append(["Rendement annualisé BRUT moyen", f"{ligne['rendement_annualise_brut_moyen']:+.2f}% par an", ""])
+    resultats.append(["Rendement annualisé NET moyen", f"{ligne['rendement_annualise_net_moyen']:+.2f}% par an", ""])
+
+    resultats.append(["Volatilité des performances nettes par transaction", f"{ligne['volatilite_performances']:.2f}%", ""])
+    resultats.append(["Ratio de Sharpe", f"{ligne['ratio_sharpe']:.2f}", f"rf={taux_sans_risque}%"])
+
+    resultats.append(["MÉTRIQUES DE RÉUSSITE DES TRANSACTIONS", "", ""])
+    resultats.append(["Taux de réussite des transactions", f"{ligne['taux_reussite']:.2f}%", ""])
+    resultats.append(["Nombre de transactions gagnantes", f"{ligne['nb_gagnantes']}", ""])
+    resultats.append(["Nombre de transactions perdantes", f"{ligne['nb_perdantes']}", ""])
+    resultats.append(["Gain moyen par transaction gagnante", f"{ligne['gain_moyen_gagnantes']:.2f}%", ""])
+    resultats.append(["Perte moyenne par transaction perdante", f"{ligne['perte_moyenne_perdantes']:.2f}%", ""])
+    resultats.append(["Ratio gain/perte", f"{ligne['ratio_gain_perte']:.2f}", ""])
+    return resultats
+
+def afficher_analyse(ligne, duree_investissement, taux_sans_risque):
+    """Affichage console d'une action, à partir de sa ligne de métriques"""
+    print(f"\n=== 📊 MÉTRIQUES GLOBALES ===")
+    print(f"Total investi (net)        : {ligne['total_investi']:.2f}€")
+    print(f"Total vendu (net)          : {ligne['total_vente']:.2f}€")
+    print(f"Gain/Perte net             : {ligne['gain_net']:.2f}€")
+    print(f"Total frais                : {ligne['total_frais']:.2f}€")
+    print(f"Performance globale BRUTE  : {ligne['performance_globale_brute']:.2f}%")
+    print(f"Performance globale NETTE  : {ligne['performance_globale_nette']:.2f}%")
+
+    print(f"\nDurée de détention: {duree_investissement} mois")
+    print(f"Nombre de transactions: {ligne['nb_transactions']}")
+
+    print(f"\n--- IMPACT DES FRAIS ---")
+    # Impact sur performance : Si vous avez -2.5 points, cela signifie que les frais vous ont fait perdre 2.5% de rendement
+    print(f"Impact des frais sur la performance: -{ligne['impact_frais']:.2f}%")
+    # Frais/Gains bruts : Si = 15%, cela signifie que 15% de vos gains bruts partent en frais
+    ratio_frais_gains = ligne['ratio_frais_gains']
+    print(f"Ratio frais/gains bruts: {ratio_frais_gains:.2f}%")
+    if ratio_frais_gains<0:
+        print("\tGain négatif : 🚨 Les frais amplifient les pertes")
+    elif ratio_frais_gains<5:
+        print("\t< 5%   : ✅ Très bon (frais optimisés)")
+    elif ratio_frais_gains<10:
+        print("\t5-10%  : ⚠️ Acceptable  ")
+    elif ratio_frais_gains<15:
+        print("\t10-15% : ❌ Élevé (revoir la stratégie)")
+    else:
+        print("\t> 15%  : 🚨 Très élevé (frais trop importants)")
+    # Taux de frais : Représente le coût fixe des frais par rapport à votre investissement total
+    print(f"Taux de frais sur le total investi: {ligne['taux_frais']:.2f}%")
+
+    print(f"\n=== 📈 MÉTRIQUES DE RENDEMENT ===")
+    print(f"\n--- RENDEMENTS ANNUALISÉS MOYENS ---")
+    print(f"Rendement annualisé BRUT moyen   : {ligne['rendement_annualise_brut_moyen']:+.2f}% par an")
+    print(f"Rendement annualisé NET moyen    : {ligne['rendement_annualise_net_moyen']:+.2f}% par an")
+    print(f"Volatilité des performances nettes par transaction: {ligne['volatilite_performances']:.2f}%")
+
+    ratio_sharpe = ligne['ratio_sharpe']
+    print(f"Ratio de Sharpe  avec rf={taux_sans_risque}: {ratio_sharpe:.2f}")
+    if ratio_sharpe < 0:
+        print("\t< 0 : 🚨 Mauvais (le rendement est en dessous du taux sans risque)"    )
+    elif ratio_sharpe < 1:
+        print("\t0 - 1 : ⚠️ Rendement insuffisant pour le risque pris" )
+    elif ratio_sharpe < 2:
+        print("\t1 - 2 : ✅ Bon compromis rendement/risque" )
+    elif ratio_sharpe < 3:
+        print("\t2 : 👍 Très bon" )
+    else:
+        print("\t3 : 🌟 Excellent rendement ajusté du risque" )
+
+    # Taux frais effectif pour l'efficacité opérationnelle
+    taux_frais_effectif = ligne['taux_frais']
+    print(f"Taux de frais effectif sur le total investi: {taux_frais_effectif:.2f}%")
+    if taux_frais_effectif < 0.5:
+        print("🎯 < 0,5%   : EXCELLENT (Professionnel)")
+    elif taux_frais_effectif < 1.0:
+        print("✅ 0,5-1%   : TRÈS BON (Compétitif)")
+    elif taux_frais_effectif < 2.0:
+        print("⚠️  1-2%     : ACCEPTABLE (Standard)")
+    elif taux_frais_effectif < 3.0:
+        print("❌ 2-3%     : ÉLEVÉ (Pénalisant)")
+    else:
+        print("🚨 > 3%     : TRÈS ÉLEVÉ (À éviter)")
+
+    print("=======================")
+    print(f"Meilleure performance nette sur une transaction: {ligne['meilleure_performance']:.2f}%")
+    print(f"Pire performance nette sur une transaction (Max Drawdown): {ligne['pire_performance']:.2f}%")
+    print("=" * 40)
+    print(f"Performance nette moyenne par transaction: {ligne['performance_moyenne']:.2f}%")
+    print(f"Performance nette médiane par transaction: {ligne['performance_mediane']:.2f}%")
+    print("=" * 40)
+
+    print("\n=== 🎯 MÉTRIQUES DE RÉUSSITE DES TRANSACTIONS ===")
+    print(f"Taux de réussite des transactions: {ligne['taux_reussite']:.2f}%")
+    print(f"Nombre de transactions gagnantes: {ligne['nb_gagnantes']}")
+    print(f"Nombre de transactions perdantes: {ligne['nb_perdantes']}")
+    print(f"Gain moyen par transaction gagnante: {ligne['gain_moyen_gagnantes']:.2f}%")
+    print(f"Perte moyenne par transaction perdante: {ligne['perte_moyenne_perdantes']:.2f}%")
+    print(f"Ratio gain/perte: {ligne['ratio_gain_perte']:.2f}")
+    print("=" * 40)
+
+    print(f"\n=== 📈 MÉTRIQUES DE RENDEMENT POUR 6 MOIS ===")
+    print('=' * 40)
+    if ligne['nb_intervalles'] > 0:
+        print(f"Intervalle MIN: {ligne['intervalle_min']:.0f} jours")
+        print(f"Intervalle MAX: {ligne['intervalle_max']:.0f} jours")
+        print(f"Intervalle MOYEN: {ligne['intervalle_moyen']:.1f} jours")
+        print(f"Intervalle MÉDIAN: {ligne['intervalle_median']:.1f} jours")
+        print(f"Écart-type: {ligne['intervalle_ecart_type']:.1f} jours")
+        ecart_type = ligne['intervalle_ecart_type']
+        if ecart_type < 5:
+            regularite = "✅ TRÈS RÉGULIER"
+        elif ecart_type < 10:
+            regularite = "✅ RÉGULIER"
+        elif ecart_type < 20:
+            regularite = "⚠️  ASSEZ RÉGULIER"
+        else:
+            regularite = "❌ PEU RÉGULIER"
+        print(f"Régularité: {regularite}")
+    else:
+        print("Données insuffisantes pour l'analyse des intervalles")
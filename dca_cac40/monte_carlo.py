@@ -0,0 +1,178 @@
+#
+# Robustesse de dca_cac40.py au biais de période : simulation de Monte Carlo par bootstrap par blocs
+#
+# Pour chaque action, nb_chemins trajectoires de cours synthétiques sont construites en tirant au hasard
+# des blocs de longueur_bloc rendements journaliers (log) consécutifs dans tout l'historique stocké de
+# l'action. Les blocs conservent la volatilité groupée et l'autocorrélation de court terme des cours réels.
+# Chaque trajectoire part du cours réel à la première séance de la période et suit le calendrier réel des
+# séances de l'action.
+#
+# Les règles DCA de dca_cac40.py sont appliquées à toutes les trajectoires d'un lot en même temps (tableaux
+# chemins x achats) : achat à la première séance de chaque mois, vente à la première séance du mois situé
+# duree_investissement mois plus tard. Seules les transactions dont la vente tombe dans la période sont
+# comptées. Les lots (action, numéro de lot) sont répartis sur un pool de processus ; chaque lot a sa propre
+# graine (SeedSequence.spawn), le résultat ne dépend donc pas du nombre de processus.
+# Période, durée de détention, montant et frais sont lus dans parametres.py, comme pour dca_cac40.py.
+#
+# Résultat par action : distribution de la performance nette globale, du taux de réussite et de la pire
+# transaction sur les trajectoires, comparée à l'historique réel. Le débit (trajectoires par seconde) est affiché.
+#
+# Utilisation (depuis la racine du dépôt, comme dca_cac40.py):
+#   python dca_cac40/monte_carlo.py
+#
+
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from composition_historique import actions_indice
+from price_store import PriceStore
+from moteur_vectorise import calendrier_mensuel, mois_de_vente
+from parametres import (date_debut, date_fin, db_file, duree_investissement, frais_acquisition, frais_cession,
+                        montant_mensuel)
+
+pd.set_option('display.max_rows', 1000)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+
+nb_chemins    = 2000    # trajectoires par action
+longueur_bloc = 20      # séances par bloc tiré (environ un mois de bourse)
+taille_lot    = 250     # trajectoires par tâche
+graine        = 2015
+nb_processus  = os.cpu_count()
+
+QUANTILES = [0.05, 0.5, 0.95]
+
+def preparer_action(serie):
+    """
+    Rendements journaliers (log) de tout l'historique, cours réels de la période et indices des séances d'achat
+    et de vente dans ce calendrier. None si l'action n'a pas de transaction complète sur la période.
+    """
+    utilisables = np.isfinite(serie.prix) & (serie.prix > 0)
+    dates, prix = serie.dates_valides[utilisables], serie.prix[utilisables]
+    rendements = np.diff(np.log(prix))
+    periode = (dates >= np.datetime64(date_debut, 'D')) & (dates <= np.datetime64(date_fin, 'D'))
+    dates_periode = dates[periode]
+    if len(rendements) < longueur_bloc or len(dates_periode) < 2:
+        return None
+
+    def premieres_seances(debuts_mois):
+        """Première séance de chaque mois dans le calendrier de la période (-1 si aucune)"""
+        i = np.searchsorted(dates_periode, debuts_mois)
+        dans_le_mois = np.append(dates_periode, np.datetime64('9999-12-31'))[i] < (debuts_mois.astype('datetime64[M]') + 1).astype('datetime64[D]')
+        return np.where(dans_le_mois, i, -1)
+
+    mois = calendrier_mensuel(date_debut, date_fin)
+    indices_achat = premieres_seances(mois)
+    indices_vente = premieres_seances(mois_de_vente(mois, duree_investissement))
+    complete = (indices_achat >= 0) & (indices_vente >= 0)
+    if not complete.any():
+        return None
+    return rendements, prix[periode], indices_achat[complete], indices_vente[complete]
+
+def trajectoires(rng, rendements, prix_initial, nb_seances, nb):
+    """nb trajectoires de nb_seances cours par bootstrap par blocs des rendements (chemins x séances)"""
+    nb_blocs = -(-(nb_seances - 1) // longueur_bloc)
+    debuts = rng.integers(0, len(rendements) - longueur_bloc + 1, size=(nb, nb_blocs))
+    tirages = (debuts[:, :, None] + np.arange(longueur_bloc)).reshape(nb, -1)[:, :nb_seances - 1]
+    log_prix = np.concatenate([np.zeros((nb, 1)), np.cumsum(rendements[tirages], axis=1)], axis=1)
+    return prix_initial * np.exp(log_prix)
+
+def appliquer_dca(prix, indices_achat, indices_vente):
+    """
+    Règles DCA sur des trajectoires (chemins x séances).
+    Retourne par trajectoire : performance nette globale (%), taux de réussite (%) et pire transaction (%).
+    """
+    prix_achat = prix[:, indices_achat]
+    prix_vente = prix[:, indices_vente]
+    quantites = np.floor((montant_mensuel - frais_acquisition) / prix_achat)
+    achat = quantites >= 1
+    cout_net    = np.where(achat, quantites * prix_achat + frais_acquisition, 0.0)
+    produit_net = np.where(achat, quantites * prix_vente - frais_cession, 0.0)
+    nb_transactions = achat.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        performances = np.where(achat, (produit_net - cout_net) / cout_net * 100, np.nan)
+        performance_nette = (produit_net.sum(axis=1) - cout_net.sum(axis=1)) / cout_net.sum(axis=1) * 100
+        taux_reussite = (performances > 0).sum(axis=1) / nb_transactions * 100
+    pire = np.min(np.where(achat, performances, np.inf), axis=1)
+    return performance_nette, taux_reussite, np.where(nb_transactions > 0, pire, np.nan)
+
+# --- Côté processus de calcul ---
+
+_donnees = None
+
+def _initialiser_processus(donnees):
+    global _donnees
+    _donnees = donnees
+
+def simuler_lot(tache):
+    """Trajectoires d'un lot (action, taille, graine) et leurs métriques"""
+    action, nb, graine_lot = tache
+    rendements, prix_reels, indices_achat, indices_vente = _donnees[action]
+    prix = trajectoires(np.random.default_rng(graine_lot), rendements, prix_reels[0], len(prix_reels), nb)
+    return action, appliquer_dca(prix, indices_achat, indices_vente)
+
+def resume_distribution(action, historique, simulations):
+    """Ligne du tableau de résultats d'une action"""
+    performance, reussite, pire = (np.concatenate(colonne) for colonne in zip(*simulations))
+    ligne = {'action': action, 'nb_chemins': len(performance),
+             'performance_nette_historique_%': historique[0][0],
+             'taux_reussite_historique_%':     historique[1][0],
+             'pire_transaction_historique_%':  historique[2][0]}
+    for nom, valeurs in (('performance_nette', performance), ('taux_reussite', reussite), ('pire_transaction', pire)):
+        # Aucune transaction sur aucune trajectoire (cours toujours supérieur au montant mensuel) : quantiles NaN
+        quantiles = np.full(len(QUANTILES), np.nan) if np.isnan(valeurs).all() else np.nanquantile(valeurs, QUANTILES)
+        for q, valeur in zip(QUANTILES, quantiles):
+            ligne[f'{nom}_p{int(q * 100)}_%'] = valeur
+    # Trajectoires sans transaction (cours toujours supérieur au montant mensuel) exclues
+    performance = performance[~np.isnan(performance)]
+    ligne['probabilite_perte_%'] = np.mean(performance < 0) * 100 if len(performance) else np.nan
+    # Rang de l'historique dans la distribution simulée : proche de 100 = période historique très favorable
+    ligne['centile_historique'] = np.mean(performance <= historique[0][0]) * 100 if len(performance) and not np.isnan(historique[0][0]) else np.nan
+    return ligne
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(db_file)
+    store = PriceStore(conn)
+    actions_list = actions_indice(conn, 'CAC_40')
+    store.charger(actions_list)
+    conn.close()
+
+    donnees = {}
+    for action in actions_list:
+        preparation = preparer_action(store.serie(action))
+        if preparation is None:
+            print(f"  ⚠ {action}: historique insuffisant, ignorée")
+        else:
+            donnees[action] = preparation
+
+    print(f"\n=== MONTE CARLO DCA (bootstrap par blocs de {longueur_bloc} séances) ===")
+    print(f"Période: {date_debut.strftime('%Y-%m-%d')} à {date_fin.strftime('%Y-%m-%d')} | détention {duree_investissement} mois")
+    print(f"{len(donnees)} actions x {nb_chemins} trajectoires sur {nb_processus} processus")
+
+    taches = [(action, min(taille_lot, nb_chemins - debut)) for action in donnees for debut in range(0, nb_chemins, taille_lot)]
+    graines = np.random.SeedSequence(graine).spawn(len(taches))
+    taches = [(action, nb, graine_lot) for (action, nb), graine_lot in zip(taches, graines)]
+
+    debut = time.perf_counter()
+    simulations = {action: [] for action in donnees}
+    with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_processus, initargs=(donnees,)) as pool:
+        for action, metriques in pool.map(simuler_lot, taches):
+            simulations[action].append(metriques)
+    duree = time.perf_counter() - debut
+    nb_total = len(donnees) * nb_chemins
+    print(f"{nb_total} trajectoires en {duree:.2f}s : {nb_total / duree:,.0f} trajectoires/s")
+
+    lignes = []
+    for action, (_, prix_reels, indices_achat, indices_vente) in donnees.items():
+        historique = appliquer_dca(prix_reels[None, :], indices_achat, indices_vente)
+        lignes.append(resume_distribution(action, historique, simulations[action]))
+    tableau = pd.DataFrame(lignes).set_index('action')
+    print(tableau.round(2))
+    tableau.to_csv("monte_carlo.csv", sep=';', encoding='utf-8-sig', decimal=",", float_format='%.2f')
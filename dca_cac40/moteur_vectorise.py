@@ -0,0 +1,151 @@
+#
+# Moteur DCA vectorisé pour dca_cac40.py
+#
+# Même simulation que la boucle mois par mois du script (achat le premier jour de cotation du mois,
+# vente après duree_investissement mois), mais calculée en une fois sur la matrice des cours
+# (séances x actions) :
+#   - suivant[d, a] : indice de la première séance >= d où l'action a est cotée (minimum cumulé inversé)
+#   - tous les achats (mois x actions) puis toutes les ventes sont résolus par indexation de tableaux
+# Les transactions sont ajoutées par lots au livre des positions (livre_positions.py), le même que celui de la
+# boucle. Le DataFrame retourné par simuler_dca a les mêmes colonnes et le même ordre de lignes que portefeuille.
+# Son index est le rang du mois d'achat : des simulations faites sur des groupes d'actions différents se
+# recombinent dans l'ordre de la boucle par concat puis tri stable de l'index.
+#
+
+from datetime import datetime
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from livre_positions import LivrePositions
+from registre_evenements import ACHAT, ECART, VENTE
+
+# Résultat d'une recherche de cours (cf. cours_action_asap)
+TROUVE, AVANT_HISTORIQUE, ABSENT = 0, 1, 2
+
+class MatriceCours:
+    """Cours moyens (Open+Close)/2 des actions sur l'axe commun des séances, avec une ligne sentinelle en fin"""
+
+    def __init__(self, store, actions):
+        series = [store.serie(action) for action in actions]
+        self.actions = np.array(actions, dtype=object)
+        self.axe = np.unique(np.concatenate([s.dates_valides for s in series]))
+        nb_dates = len(self.axe)
+        self.prix = np.full((nb_dates + 1, len(actions)), np.nan)
+        cotee = np.zeros(self.prix.shape, dtype=bool)
+        for j, serie in enumerate(series):
+            lignes = np.searchsorted(self.axe, serie.dates_valides)
+            self.prix[lignes, j] = serie.prix
+            cotee[lignes, j] = True
+
+        # Première séance cotée à partir de chaque date (nb_dates = aucune)
+        indices = np.where(cotee, np.arange(nb_dates + 1)[:, None], nb_dates)
+        self.suivant = np.minimum.accumulate(indices[::-1], axis=0)[::-1]
+        self.axe_etendu = np.append(self.axe, np.datetime64('9999-12-31'))     # date de la ligne sentinelle
+
+        self.premiere_date = np.array([s.dates[0] if len(s.dates) else np.datetime64('NaT') for s in series], dtype='datetime64[D]')
+        self.derniere_date = np.array([s.dates[-1] if len(s.dates) else np.datetime64('NaT') for s in series], dtype='datetime64[D]')
+        self.indice_dernier = np.searchsorted(self.axe, self.derniere_date)
+
+    def cours_asap(self, premiers_jours, colonnes):
+        """
+        Version vectorisée de cours_action_asap pour des couples (premier jour du mois, colonne de l'action).
+        Retourne l'indice de la séance dans l'axe et le statut (TROUVE, AVANT_HISTORIQUE, ABSENT).
+        """
+        fins_de_mois = (premiers_jours.astype('datetime64[M]') + 1).astype('datetime64[D]')
+        i = self.suivant[np.searchsorted(self.axe, premiers_jours), colonnes]
+        dans_le_mois = self.axe_etendu[i] < fins_de_mois
+
+        apres_historique = premiers_jours >= self.derniere_date[colonnes]
+        avant_historique = premiers_jours < self.premiere_date[colonnes]
+        indices = np.where(apres_historique, self.indice_dernier[colonnes], i)
+        statut = np.select([apres_historique, avant_historique, dans_le_mois], [TROUVE, AVANT_HISTORIQUE, TROUVE], ABSENT)
+        return indices, statut
+
+def calendrier_mensuel(date_debut, date_fin):
+    """Premier jour de chaque mois simulé (même progression que la boucle du script)"""
+    mois = []
+    date_courante = date_debut
+    while date_courante <= date_fin:
+        mois.append(datetime(date_courante.year, date_courante.month, 1))
+        date_courante = date_courante + relativedelta(months=1)
+    return np.array(mois, dtype='datetime64[D]')
+
+def calculer_achats(matrice, mois, montant_mensuel, frais_acquisition, composition=None, nom_indice='CAC_40', registre=None):
+    """
+    Achats de tous les couples (mois, action), dans l'ordre de la boucle d'origine.
+    Avec composition (CompositionHistorique), seules les actions membres de l'indice à la date d'achat sont achetées.
+    Avec registre (RegistreEvenements), les achats et les achats écartés y sont ajoutés par lots.
+    Retourne le livre des positions (LivrePositions), la colonne de chaque position dans la matrice, les dates
+    d'achat et le rang du mois d'achat.
+    """
+    nb_actions = len(matrice.actions)
+    premiers_jours = np.repeat(mois, nb_actions)
+    colonnes = np.tile(np.arange(nb_actions), len(mois))
+    indices, statut = matrice.cours_asap(premiers_jours, colonnes)
+    prix_achat = np.where(statut == TROUVE, matrice.prix[indices, colonnes], 0.0)
+    montant_disponible = montant_mensuel - frais_acquisition
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quantites = np.where(prix_achat != 0, np.floor(montant_disponible / prix_achat), 0)
+    achat = quantites >= 1
+
+    sans_cours  = statut != TROUVE
+    insuffisant = (statut == TROUVE) & ~achat
+    nb_sans_cours, nb_insuffisant = int(np.count_nonzero(sans_cours)), int(np.count_nonzero(insuffisant))
+    if registre is not None:
+        registre.ajouter_lot(ECART, matrice.actions[colonnes[sans_cours]], np.datetime_as_string(premiers_jours[sans_cours], unit='D'),
+                             motifs="Pas de cours disponible pour l'achat")
+        registre.ajouter_lot(ECART, matrice.actions[colonnes[insuffisant]], np.datetime_as_string(matrice.axe_etendu[indices[insuffisant]], unit='D'),
+                             prix=prix_achat[insuffisant], motifs="Montant insuffisant")
+    if composition is not None:
+        membre = composition.est_membre(nom_indice, matrice.axe_etendu[indices], matrice.actions[colonnes])
+        hors_indice = achat & ~membre
+        print(f"{int(np.count_nonzero(hors_indice))} achats écartés (hors {nom_indice} à la date d'achat)")
+        if registre is not None:
+            registre.ajouter_lot(ECART, matrice.actions[colonnes[hors_indice]], np.datetime_as_string(matrice.axe_etendu[indices[hors_indice]], unit='D'),
+                                 prix=prix_achat[hors_indice], motifs=f"Hors {nom_indice} à la date d'achat")
+        achat &= membre
+    print(f"{int(np.count_nonzero(achat))} achats | {nb_sans_cours} sans cours, {nb_insuffisant} au montant insuffisant")
+    indices, colonnes, prix_achat, quantites = indices[achat], colonnes[achat], prix_achat[achat], quantites[achat].astype(np.int64)
+    dates_achat = matrice.axe_etendu[indices]
+
+    livre = LivrePositions(len(quantites))
+    livre.ajouter_achats(matrice.actions[colonnes], dates_achat, prix_achat, quantites, frais_acquisition)
+    if registre is not None:
+        registre.ajouter_lot(ACHAT, matrice.actions[colonnes], np.datetime_as_string(dates_achat, unit='D'),
+                             prix=prix_achat, quantites=quantites, montants=livre.positions()['cout_acquisition_net'])
+    return livre, colonnes, dates_achat, np.repeat(np.arange(len(mois)), nb_actions)[achat]
+
+def mois_de_vente(dates_achat, duree_investissement):
+    """Premier jour du mois d'acquisition + duree_investissement mois"""
+    return (dates_achat.astype('datetime64[M]') + duree_investissement).astype('datetime64[D]')
+
+def calculer_ventes(matrice, livre, colonnes, dates_achat, duree_investissement, frais_cession, registre=None):
+    """Enregistre dans le livre les ventes après duree_investissement mois (ventes et ventes impossibles dans registre)"""
+    mois_vente = mois_de_vente(dates_achat, duree_investissement)
+    indices_vente, statut_vente = matrice.cours_asap(mois_vente, colonnes)
+    vendu = statut_vente == TROUVE
+    print(f"{int(np.count_nonzero(vendu))} ventes à {duree_investissement} mois | {int(np.count_nonzero(~vendu))} sans cours")
+    if registre is not None:
+        registre.ajouter_lot(ECART, matrice.actions[colonnes[~vendu]], np.datetime_as_string(mois_vente[~vendu], unit='D'),
+                             motifs=f"Pas de cours disponible pour la vente après {duree_investissement} mois")
+    indices = np.flatnonzero(vendu)
+    plus_values = livre.enregistrer_ventes(indices, matrice.axe_etendu[indices_vente[vendu]], matrice.prix[indices_vente[vendu], colonnes[vendu]],
+                                           frais_cession, float(duree_investissement))
+    if registre is not None:
+        positions = livre.positions()[indices]
+        registre.ajouter_lot(VENTE, matrice.actions[colonnes[vendu]], np.datetime_as_string(positions['date_cession'], unit='D'),
+                             prix=positions['prix_unitaire_vente'], quantites=positions['quantite_actions'], montants=plus_values)
+    return livre
+
+def simuler_dca(store, actions, date_debut, date_fin, montant_mensuel, frais_acquisition, frais_cession, duree_investissement,
+                composition=None, registre=None):
+    """
+    Achats mensuels de chaque action puis vente après duree_investissement mois, sans boucle par transaction.
+    Retourne le portefeuille en DataFrame (index = rang du mois d'achat).
+    """
+    matrice = MatriceCours(store, actions)
+    livre, colonnes, dates_achat, rangs = calculer_achats(matrice, calendrier_mensuel(date_debut, date_fin),
+                                                          montant_mensuel, frais_acquisition, composition, registre=registre)
+    calculer_ventes(matrice, livre, colonnes, dates_achat, duree_investissement, frais_cession, registre)
+    return livre.en_dataframe(index=rangs)
@@ -0,0 +1,23 @@
+#
+# Paramètres de la stratégie DCA action par action
+#
+# Partagés par dca_cac40.py et monte_carlo.py : les trajectoires synthétiques sont simulées sur la même
+# période et avec les mêmes règles (durée de détention, montant, frais) que l'historique réel.
+#
+
+from datetime import datetime
+
+# Base de données (scripts lancés depuis la racine du dépôt)
+db_file = 'cac40_data.db'
+
+# Dates de début et fin de l'analyse
+date_debut = datetime(2020, 1, 1)
+date_fin   = datetime(2025, 10, 31)
+duree_investissement = 12   # en mois
+
+# Montant d'investissement mensuel par action
+montant_mensuel = 100.0
+
+# Frais de transaction (en euros)
+frais_acquisition = 1.0  # Frais par transaction d'achat quelque soit le montant
+frais_cession     = 1.0  # Frais par transaction de vente quelque soit le montant
@@ -0,0 +1,146 @@
+#
+# Simulation de dca_cac40.py avec compte de liquidités : réinvestissement du produit des ventes (biais 5)
+#
+# Simulation par événements. Chaque action a son compte de liquidités (les lignes restent gérées action par
+# action). Les achats possibles (mois x actions) sont traités dans l'ordre chronologique. Avant chaque achat,
+# les ventes arrivées à échéance à cette date sont dépilées d'un tas (heapq) trié par date de vente, et leur
+# produit net est crédité au compte de l'action.
+# Le budget d'un achat est montant_mensuel plus les liquidités de l'action. Le coût est payé d'abord avec les
+# liquidités, puis par un apport extérieur (au plus montant_mensuel). Le reliquat reste sur le compte.
+# Une vente n'est enregistrée qu'au moment où elle sort du tas : le portefeuille n'est jamais reparcouru.
+#
+# Cours et séances d'achat et de vente : mêmes règles que la boucle du script, précalculés sur la matrice des
+# cours (moteur_vectorise.py). Avec reinvestir=False, le produit des ventes reste sur le compte et le portefeuille
+# est celui de simuler_dca.
+#
+# Le bilan par action compare les apports extérieurs à la valeur finale : liquidités plus positions jamais
+# vendues, valorisées au dernier cours.
+#
+
+import heapq
+import time
+
+import numpy as np
+import pandas as pd
+
+from livre_positions import LivrePositions
+from moteur_vectorise import TROUVE, MatriceCours, calendrier_mensuel, mois_de_vente
+from registre_evenements import ACHAT, ECART, VENTE
+
+TOTAL = 'TOTAL'
+
+def simuler_tresorerie(store, actions, date_debut, date_fin, montant_mensuel, frais_acquisition, frais_cession,
+                       duree_investissement, composition=None, nom_indice='CAC_40', registre=None, reinvestir=True):
+    """
+    Retourne le portefeuille (DataFrame des scripts, ordre de la boucle, index = rang du mois d'achat), le bilan
+    des comptes par action (plus la ligne TOTAL) et les statistiques de la boucle d'événements.
+    """
+    matrice = MatriceCours(store, actions)
+    mois = calendrier_mensuel(date_debut, date_fin)
+    nb_actions = len(actions)
+    premiers_jours = np.repeat(mois, nb_actions)
+    colonnes = np.tile(np.arange(nb_actions), len(mois))
+    indices, statut = matrice.cours_asap(premiers_jours, colonnes)
+    possible = statut == TROUVE
+    if registre is not None:
+        registre.ajouter_lot(ECART, matrice.actions[colonnes[~possible]], np.datetime_as_string(premiers_jours[~possible], unit='D'),
+                             motifs="Pas de cours disponible pour l'achat")
+    if composition is not None:
+        membre = composition.est_membre(nom_indice, matrice.axe_etendu[indices], matrice.actions[colonnes])
+        if registre is not None:
+            hors_indice = possible & ~membre
+            registre.ajouter_lot(ECART, matrice.actions[colonnes[hors_indice]], np.datetime_as_string(matrice.axe_etendu[indices[hors_indice]], unit='D'),
+                                 prix=matrice.prix[indices[hors_indice], colonnes[hors_indice]], motifs=f"Hors {nom_indice} à la date d'achat")
+        possible &= membre
+
+    # Achats possibles dans l'ordre chronologique (ordre de la boucle à date égale), et séance de vente de chacun
+    candidats = np.flatnonzero(possible)
+    dates_achat = matrice.axe_etendu[indices[candidats]]
+    candidats = candidats[np.argsort(dates_achat, kind='stable')]
+    dates_achat = matrice.axe_etendu[indices[candidats]]
+    prix_achat = matrice.prix[indices[candidats], colonnes[candidats]]
+    indices_vente, statut_vente = matrice.cours_asap(mois_de_vente(dates_achat, duree_investissement), colonnes[candidats])
+    dates_vente = matrice.axe_etendu[indices_vente]
+    prix_vente = matrice.prix[indices_vente, colonnes[candidats]]
+    vendable = statut_vente == TROUVE
+
+    livre = LivrePositions(len(candidats))
+    liquidites = [0.0] * nb_actions
+    apports = [0.0] * nb_actions
+    reinvesti = [0.0] * nb_actions
+    echeances = []          # tas (jour de vente, numéro de position, numéro du candidat)
+    quantites, colonnes_positions, rangs = [], [], []
+    nb_ventes = 0
+    taille_max = 0
+    colonnes_candidats = colonnes[candidats].tolist()
+    prix_vente_liste = prix_vente.tolist()
+    jours_achat = dates_achat.astype(np.int64).tolist()
+    jours_vente = dates_vente.astype(np.int64).tolist()
+
+    def vendre(echeance):
+        _, position, c = echeance
+        j = colonnes_candidats[c]
+        plus_value_nette = livre.enregistrer_vente(position, dates_vente[c], prix_vente_liste[c], frais_cession, float(duree_investissement))
+        liquidites[j] += prix_vente_liste[c] * quantites[position] - frais_cession
+        if registre is not None:
+            registre.ajouter(VENTE, actions[j], str(dates_vente[c]), prix_vente_liste[c], quantites[position], plus_value_nette)
+
+    debut = time.perf_counter()
+    for c, (k, jour, prix) in enumerate(zip(candidats.tolist(), jours_achat, prix_achat.tolist())):
+        while echeances and echeances[0][0] <= jour:
+            vendre(heapq.heappop(echeances))
+            nb_ventes += 1
+        j = colonnes_candidats[c]
+        budget = montant_mensuel + (liquidites[j] if reinvestir else 0.0)
+        quantite = int((budget - frais_acquisition) / prix) if prix > 0 else 0
+        if quantite < 1:
+            if registre is not None:
+                registre.ajouter(ECART, actions[j], str(dates_achat[c]), prix, motif="Montant insuffisant")
+            continue
+        cout_net = quantite * prix + frais_acquisition
+        pris = min(liquidites[j], cout_net) if reinvestir else 0.0
+        liquidites[j] -= pris
+        reinvesti[j] += pris
+        apports[j] += cout_net - pris
+        position = livre.ajouter_achat(actions[j], dates_achat[c], prix, quantite, frais_acquisition)
+        quantites.append(quantite)
+        colonnes_positions.append(j)
+        rangs.append(k // nb_actions)
+        if registre is not None:
+            registre.ajouter(ACHAT, actions[j], str(dates_achat[c]), prix, quantite, cout_net)
+        if vendable[c]:
+            heapq.heappush(echeances, (jours_vente[c], position, c))
+            taille_max = max(taille_max, len(echeances))
+        elif registre is not None:
+            registre.ajouter(ECART, actions[j], str(mois_de_vente(dates_achat[c], duree_investissement)),
+                             motif=f"Pas de cours disponible pour la vente après {duree_investissement} mois")
+    # Ventes postérieures au dernier achat
+    while echeances:
+        vendre(heapq.heappop(echeances))
+        nb_ventes += 1
+    duree = time.perf_counter() - debut
+
+    # Portefeuille dans l'ordre de la boucle du script : par mois puis dans l'ordre des actions
+    colonnes_positions, rangs = np.array(colonnes_positions, dtype=np.int64), np.array(rangs, dtype=np.int64)
+    portefeuille = livre.en_dataframe(index=rangs).iloc[np.lexsort((colonnes_positions, rangs))]
+
+    # Positions jamais vendues, valorisées au dernier cours
+    positions = livre.positions()
+    ouvertes = np.isnat(positions['date_cession'])
+    dernier_cours = matrice.prix[matrice.indice_dernier, np.arange(nb_actions)]
+    valeur_ouverte = np.bincount(colonnes_positions[ouvertes], weights=positions['quantite_actions'][ouvertes] * dernier_cours[colonnes_positions[ouvertes]],
+                                 minlength=nb_actions)
+    comptes = pd.DataFrame({
+        'apports_externes':   apports,
+        'montant_reinvesti':  reinvesti,
+        'liquidites_finales': liquidites,
+        'valeur_positions_ouvertes': valeur_ouverte,
+    }, index=pd.Index(list(actions), name='action'))
+    comptes.loc[TOTAL] = comptes.sum()
+    comptes['valeur_finale'] = comptes['liquidites_finales'] + comptes['valeur_positions_ouvertes']
+    comptes['gain_net'] = comptes['valeur_finale'] - comptes['apports_externes']
+    comptes['performance_%'] = comptes['gain_net'] / comptes['apports_externes'] * 100
+
+    statistiques = {'achats': len(livre), 'ventes': nb_ventes, 'evenements': len(livre) + nb_ventes,
+                    'echeances_max': taille_max, 'duree': duree}
+    return portefeuille, comptes, statistiques
@@ -0,0 +1,126 @@
+#
+# Valorisation quotidienne du portefeuille de dca_cac40.py : courbe de valeur et vrai drawdown
+#
+# La « Pire performance nette sur une transaction (Max Drawdown) » des métriques est la pire transaction
+# clôturée, pas une baisse de la valeur du portefeuille. Ici chaque position ouverte est valorisée à chaque
+# séance, en une passe sur la matrice des cours (séances x actions) de moteur_vectorise.py :
+#   - quantités détenues : +quantité à la séance d'achat, -quantité à la séance de vente, puis somme cumulée
+#   - cours de valorisation : cours moyen (Open+Close)/2, dernier cours connu les jours sans cotation
+#   - apports (coût net des achats) et produits de cession nets rangés à leur séance, puis cumulés
+# Le produit des ventes reste en liquidités (pas de réinvestissement, cf. biais 5 de dca_cac40.py).
+#
+# valeur_totale = valeur des positions + liquidités, capital_investi = apports cumulés.
+# Les apports gonflent la valeur : le drawdown est calculé sur un indice de performance pondéré par le temps
+# (apports de la séance entrés au cours du jour) : r = valeur_totale / (valeur_totale de la veille + apports) - 1.
+# Temps sous l'eau : jours calendaires écoulés depuis le dernier plus haut de l'indice.
+#
+# Tous les calculs portent sur les matrices (séances x actions) complétées d'une colonne « total » :
+# la courbe du portefeuille et les drawdowns par action sortent du même calcul.
+#
+
+import numpy as np
+import pandas as pd
+
+from moteur_vectorise import MatriceCours
+
+TOTAL = 'PORTEFEUILLE'
+
+def cours_valorisation(matrice):
+    """Cours des séances (sans la ligne sentinelle), dernier cours connu reporté, 0 avant la première cotation"""
+    prix = matrice.prix[:-1]
+    connu = np.isfinite(prix)
+    derniers = np.maximum.accumulate(np.where(connu, np.arange(len(prix))[:, None], 0), axis=0)
+    reportes = prix[derniers, np.arange(prix.shape[1])]
+    return np.where(np.isfinite(reportes), reportes, 0.0)
+
+def _ranger(nb_dates, nb_colonnes, lignes, colonnes, valeurs):
+    """Matrice (séances x colonnes) des valeurs additionnées à leur séance"""
+    matrice = np.zeros((nb_dates, nb_colonnes))
+    np.add.at(matrice, (lignes, colonnes), valeurs)
+    return matrice
+
+def _avec_total(matrice):
+    return np.hstack([matrice, matrice.sum(axis=1, keepdims=True)])
+
+def valoriser(store, portefeuille, actions):
+    """
+    Valorisation quotidienne du portefeuille (DataFrame des scripts), du premier achat à la dernière séance connue.
+    Retourne les séances et les matrices (séances x actions, plus la colonne total) dans un dict.
+    """
+    matrice = MatriceCours(store, actions)
+    axe = matrice.axe
+    rang = {action: j for j, action in enumerate(actions)}
+    colonnes = np.array([rang[action] for action in portefeuille['action']], dtype=np.int64)
+    quantites = portefeuille['quantite_actions'].to_numpy(dtype=float)
+    lignes_achat = np.searchsorted(axe, portefeuille['date_acquisition'].to_numpy(dtype='datetime64[D]'))
+    # Sans aucune vente, le portefeuille n'a pas de colonnes de vente
+    if 'date_cession' in portefeuille:
+        dates_cession = pd.to_datetime(portefeuille['date_cession']).to_numpy(dtype='datetime64[D]')
+        produits_nets = portefeuille['produit_cession_net'].to_numpy(dtype=float)
+    else:
+        dates_cession = np.full(len(portefeuille), np.datetime64('NaT'), dtype='datetime64[D]')
+        produits_nets = np.zeros(len(portefeuille))
+    vendu = ~np.isnat(dates_cession)
+    lignes_vente = np.searchsorted(axe, dates_cession[vendu])
+
+    nb_dates, nb_actions = len(axe), len(actions)
+    mouvements = _ranger(nb_dates, nb_actions, lignes_achat, colonnes, quantites)
+    np.subtract.at(mouvements, (lignes_vente, colonnes[vendu]), quantites[vendu])
+    detenues = np.cumsum(mouvements, axis=0)
+    apports  = _ranger(nb_dates, nb_actions, lignes_achat, colonnes, portefeuille['cout_acquisition_net'].to_numpy(dtype=float))
+    produits = _ranger(nb_dates, nb_actions, lignes_vente, colonnes[vendu], produits_nets[vendu])
+
+    # Courbe à partir du premier achat
+    debut = int(lignes_achat.min()) if len(lignes_achat) else nb_dates
+    valeur_positions = _avec_total((detenues * cours_valorisation(matrice))[debut:])
+    apports, produits = _avec_total(apports[debut:]), _avec_total(produits[debut:])
+    liquidites = np.cumsum(produits, axis=0)
+    valeur_totale = valeur_positions + liquidites
+
+    # Indice de performance pondéré par le temps
+    base = np.vstack([np.zeros((1, nb_actions + 1)), valeur_totale[:-1]]) + apports
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rendements = np.where(base > 0, valeur_totale / base - 1, 0.0)
+    indice = np.cumprod(1 + rendements, axis=0)
+
+    return {'dates': axe[debut:], 'valeur_positions': valeur_positions, 'liquidites': liquidites,
+            'valeur_totale': valeur_totale, 'capital_investi': np.cumsum(apports, axis=0), 'indice': indice}
+
+def drawdowns(valorisation, actions):
+    """Par action et pour le portefeuille : max drawdown de l'indice, pic, creux, perte maximale en €, temps sous l'eau"""
+    dates, indice = valorisation['dates'], valorisation['indice']
+    if len(dates) == 0:
+        return pd.DataFrame(index=pd.Index(list(actions) + [TOTAL], name='action'))
+    plus_haut = np.maximum.accumulate(indice, axis=0)
+    baisse = indice / plus_haut - 1
+    sous_l_eau = indice < plus_haut * (1 - 1e-12)
+    rangs = np.arange(len(dates))[:, None]
+    dernier_pic = np.maximum.accumulate(np.where(sous_l_eau, 0, rangs), axis=0)
+    jours = (dates[:, None] - dates[dernier_pic]).astype(np.int64)
+
+    gain = valorisation['valeur_totale'] - valorisation['capital_investi']
+    creux = np.argmin(baisse, axis=0)
+    colonnes = np.arange(indice.shape[1])
+    return pd.DataFrame({
+        'max_drawdown_%':            baisse[creux, colonnes] * 100,
+        'date_pic':                  np.datetime_as_string(dates[dernier_pic[creux, colonnes]], unit='D'),
+        'date_creux':                np.datetime_as_string(dates[creux], unit='D'),
+        'perte_max_sur_gain_€':      (gain - np.maximum.accumulate(gain, axis=0)).min(axis=0),
+        'duree_max_sous_l_eau_jours': jours.max(axis=0),
+        'sous_l_eau_fin_jours':       jours[-1],
+        'performance_indice_%':      (indice[-1] - 1) * 100,
+    }, index=pd.Index(list(actions) + [TOTAL], name='action'))
+
+def courbe_portefeuille(valorisation):
+    """Courbe quotidienne du portefeuille (colonne total) : valeurs, capital investi, gain, indice et drawdown"""
+    indice = valorisation['indice'][:, -1]
+    courbe = pd.DataFrame({
+        'capital_investi':   valorisation['capital_investi'][:, -1],
+        'valeur_positions':  valorisation['valeur_positions'][:, -1],
+        'liquidites':        valorisation['liquidites'][:, -1],
+        'valeur_totale':     valorisation['valeur_totale'][:, -1],
+        'indice_base_100':   indice * 100,
+        'drawdown_%':        (indice / np.maximum.accumulate(indice) - 1) * 100,
+    }, index=pd.Index(np.datetime_as_string(valorisation['dates'], unit='D'), name='date'))
+    courbe.insert(4, 'gain_net', courbe['valeur_totale'] - courbe['capital_investi'])
+    return courbe
@@ -1,252 +1,94 @@
+import os
 import sqlite3
-from datetime import datetime, timedelta
+import sys
+import time
 from dateutil.relativedelta import relativedelta
+import numpy as np
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cache_resultats import CacheResultats, version_ensemble, versions
+from classement_volume import selection_mensuelle
+from composition_historique import CompositionHistorique, actions_indice
+from livre_positions import LivrePositions
+from price_store import PriceStore
+from recherche_sorties import AUCUNE, LIBELLES_MOTIF, SeriesConcatenees, rechercher_sorties
+from registre_evenements import ACHAT, AVERTISSEMENT, ECART, VENTE, RegistreEvenements, afficher_evenements
+from metriques import metriques
+# Paramètres de la stratégie (période, durées, rendement, montant, frais, composition) : parametres.py
+from parametres import (db_file, date_debut, date_fin, duree_investissement_min, duree_investissement_max, rendement_min,
+                        montant_mensuel, frais_acquisition, frais_cession, taux_sans_risque, composition_a_date)
+
 pd.set_option('display.max_rows', 1000) 
 pd.set_option('display.max_columns', 500) 
 pd.set_option('display.width', 1000) 
 
 # Connexion à la base de données
-conn = sqlite3.connect('../cac40_data.db')
-cursor = conn.cursor()
-
-# Dates de début et fin de l'analyse
-date_debut = datetime(2015, 1, 1)
-date_fin   = datetime(2025, 10, 31)
-
-duree_investissement_min = 12                            # en mois - durée minimum avant de vérifier le rendement
-duree_investissement_max = duree_investissement_min+6  # en mois - durée maximum, vente forcée même à perte
-rendement_min = 10.0                                     # en % - rendement brut minimum pour vendre après duree_investissement_min
+conn = sqlite3.connect(db_file)
 
-# Montant d'investissement mensuel par action
-montant_mensuel = 100.0
+# Achats, ventes et achats écartés enregistrés dans un registre (registre_evenements.py) au lieu d'être affichés
+# affichage_console = True : affichage des événements après la simulation
+fichier_evenements = "evenements_dca_v0.1.csv"
+affichage_console  = False
 
-# Frais de transaction (en euros)
-frais_acquisition = 1.0  # Frais par transaction d'achat quelque soit le montant
-frais_cession     = 1.0  # Frais par transaction de vente quelque soit le montant
-
-# Structure pour le portefeuille
-portefeuille = pd.DataFrame(columns=['action', 'date_acquisition', 'prix_unitaire_achat', 'quantite_actions','frais_acquisition','cout_acquisition_brut','cout_acquisition_net'])
+# Cours en mémoire (séances avec Open renseigné) : chaque action est lue une seule fois, recherches par dichotomie (price_store.py)
+store = PriceStore(conn, open_requis=True)
 
 # Fonction pour trouver le premier jour disponible du mois et retourner le cours moyen (Open+Close)/2 avec la date de l'opération
 def cours_action_asap(annee, mois, action,decalage=0):
     """Trouve le premier jour disponible dans la table pour un mois donné"""
-    premier_jour  = datetime(annee, mois, 1)+timedelta(days=decalage)
-    nb_jours_mois = (premier_jour + relativedelta(months=1) - timedelta(days=1)).day    
-
-    # Vérifie si la date demandée est après la dernière date disponible
-    cursor.execute("""
-        SELECT max(date)
-        FROM actions
-        WHERE action = ?
-    """, (action,))
-    result = cursor.fetchone()
-    if result:
-        date_max = datetime.strptime(result[0], '%Y-%m-%d')
-        if premier_jour >= date_max:
-            cursor.execute("""
-                SELECT date, Open, Close 
-                FROM actions 
-                WHERE date = ? AND action = ? and not Open isnull
-            """, (result[0], action))
-            result = cursor.fetchone()
-            if result:
-                date_str, prix_open, prix_close = result
-                prix = (prix_open+prix_close)/2  # Prix moyen entre Open et Close
-                return (date_str, prix) 
-
-    # Vérifie si la date demandée est avant la première date disponible
-    cursor.execute("""
-        SELECT min(date)
-        FROM actions 
-        WHERE action = ?
-    """, (action,))
-    result = cursor.fetchone()
-    if result:
-        date_min = datetime.strptime(result[0], '%Y-%m-%d')
-        if premier_jour < date_min:
-            return 0,0
-
-    # Cherche jusqu'au dernier jours du mois après le 1er du mois
-    for i in range(nb_jours_mois):
-        date_test = premier_jour + timedelta(days=i)
-        
-        cursor.execute("""
-            SELECT date, Open, Close 
-            FROM actions 
-            WHERE date = ? AND action = ? and not Open isnull
-        """, (date_test.strftime('%Y-%m-%d'), action))
-        result = cursor.fetchone()
-        if result:
-            date_str, prix_open, prix_close = result
-            prix = (prix_open+prix_close)/2  # Prix moyen entre Open et Close
-            return (date_str, prix) 
-    return None
-
-def vente_des_actions(portefeuille):
-    # Vente des actions après duree_investissement mois
-    for index in portefeuille.index:
-        action           = portefeuille.at[index, 'action']
-        date_acquisition = datetime.strptime(portefeuille.at[index, 'date_acquisition'], '%Y-%m-%d')
-        quantite_actions = portefeuille.at[index, 'quantite_actions']
-
-        # Date de vente après x mois
-        date_cession_demandee    = date_acquisition + relativedelta(months=duree_investissement)
-        date_cession, prix_unitaire_vente = cours_action_asap(date_cession_demandee.year, date_cession_demandee.month, action,decalage=0)
-
-        if date_cession:
-            portefeuille.at[index, 'date_cession']         = date_cession
-            portefeuille.at[index, 'prix_unitaire_vente']  = prix_unitaire_vente
-            portefeuille.at[index, 'frais_cession']        = frais_cession
-            portefeuille.at[index, 'produit_cession_brut'] = prix_unitaire_vente * quantite_actions
-            portefeuille.at[index, 'produit_cession_net']  = prix_unitaire_vente * quantite_actions- frais_cession
-            portefeuille.at[index, 'plus_value_brute']     = portefeuille.at[index, 'produit_cession_brut'] - portefeuille.at[index, 'cout_acquisition_brut']
-            portefeuille.at[index, 'plus_value_nette']     = portefeuille.at[index, 'produit_cession_net']  - portefeuille.at[index, 'cout_acquisition_net'] 
-            portefeuille.at[index, 'duree_detention_min_mois'] = duree_investissement_min
-            portefeuille.at[index, 'duree_detention_max_mois'] = duree_investissement_min
-            portefeuille.at[index, 'performance_brute_%']  = (portefeuille.at[index, 'plus_value_brute'] / portefeuille.at[index, 'cout_acquisition_brut']) * 100
-            portefeuille.at[index, 'performance_net_%']    = (portefeuille.at[index, 'plus_value_nette'] / portefeuille.at[index, 'cout_acquisition_net']) * 100
-            print(f"Vente {action} le {date_cession} au prix de {prix_unitaire_vente:.2f}€ | Gain/Perte: {portefeuille.at[index, 'plus_value_nette']:.2f}€")
-        else:
-            print(f"  ⚠ {action}: Pas de cours disponible pour la vente après {duree_investissement_min} mois.")    
-    return portefeuille
+    return store.cours_action_asap(annee, mois, action, decalage)
 
 def obtenir_cours_date(date_str, action, max_jours=10):
     """
     Obtient le cours d'une action à une date précise ou à la date suivante disponible
     Si la date exacte n'existe pas (jour férié, weekend), cherche jusqu'à max_jours suivants
     """
-    date_test = datetime.strptime(date_str, '%Y-%m-%d')
-    
-    for i in range(max_jours):
-        date_courante = date_test + timedelta(days=i)
-        date_str_test = date_courante.strftime('%Y-%m-%d')
-        
-        cursor.execute("""
-            SELECT date, Open, Close 
-            FROM actions 
-            WHERE date = ? AND action = ? and not Open isnull
-        """, (date_str_test, action))
-        result = cursor.fetchone()
-        
-        if result:
-            date_str_result, prix_open, prix_close = result
-            prix = (prix_open + prix_close) / 2
-            return (date_str_result, prix)
-    
+    resultat = store.premier_cours_a_partir_de(action, date_str, max_jours)
+    if resultat:
+        return resultat
     return None, None
 
-def vente_des_actions_opt(portefeuille, date_fin):
+def vente_des_actions_opt(livre, date_fin, registre):
     """
     Vente des actions avec stratégie conditionnelle:
     - Après duree_investissement_min: vente si rendement_brut >= rendement_min
     - Sinon vérification jour par jour jusqu'à duree_investissement_max
     - Après duree_investissement_max: vente forcée même à perte
     - Si date_fin dépassée: vente forcée de toutes les actions restantes
+    La première séance qui déclenche la vente est cherchée pour toutes les positions en une fois (recherche_sorties.py)
     """
-    for index in portefeuille.index:
-        action = portefeuille.at[index, 'action']
-        date_acquisition = datetime.strptime(portefeuille.at[index, 'date_acquisition'], '%Y-%m-%d')
-        quantite_actions = portefeuille.at[index, 'quantite_actions']
-        cout_acquisition_brut = portefeuille.at[index, 'cout_acquisition_brut']
-
-        # Date minimum et maximum de vente
-        date_vente_min = date_acquisition + relativedelta(months=duree_investissement_min)
-        date_vente_max = date_acquisition + relativedelta(months=duree_investissement_max)
-        
-        # Vérifier si date_vente_min dépasse date_fin
-        if date_vente_min > date_fin:
-            # Vente forcée à la date_fin même si la durée minimum n'est pas atteinte
-            date_str, prix_unitaire_vente = obtenir_cours_date(date_fin.strftime('%Y-%m-%d'), action)
-            
-            if date_str and prix_unitaire_vente:
-                produit_brut = prix_unitaire_vente * quantite_actions
-                rendement_brut = ((produit_brut / cout_acquisition_brut) - 1) * 100
-                duree_detention = (datetime.strptime(date_str, '%Y-%m-%d') - date_acquisition).days / 30.44
-                
-                portefeuille.at[index, 'date_cession'] = date_str
-                portefeuille.at[index, 'prix_unitaire_vente'] = prix_unitaire_vente
-                portefeuille.at[index, 'frais_cession'] = frais_cession
-                portefeuille.at[index, 'produit_cession_brut'] = produit_brut
-                portefeuille.at[index, 'produit_cession_net'] = produit_brut - frais_cession
-                portefeuille.at[index, 'plus_value_brute'] = produit_brut - cout_acquisition_brut
-                portefeuille.at[index, 'plus_value_nette'] = (produit_brut - frais_cession) - portefeuille.at[index, 'cout_acquisition_net']
-                portefeuille.at[index, 'duree_detention_mois'] = duree_detention
-                portefeuille.at[index, 'performance_brute_%'] = rendement_brut
-                portefeuille.at[index, 'performance_net_%'] = (portefeuille.at[index, 'plus_value_nette'] / portefeuille.at[index, 'cout_acquisition_net']) * 100
-                
-                print(f"Vente {action} le {date_str} au prix de {prix_unitaire_vente:.2f}€ | Rendement: {rendement_brut:.2f}% | Gain/Perte: {portefeuille.at[index, 'plus_value_nette']:.2f}€ | Motif: FIN DE SIMULATION")
-                continue
+    positions = livre.positions()
+    actions = livre.noms_actions().tolist()
+    series = SeriesConcatenees({action: (store.serie(action).dates_valides, store.serie(action).prix) for action in dict.fromkeys(actions)})
+    indices, motifs = rechercher_sorties(series, actions, positions['date_acquisition'],
+                                         positions['quantite_actions'], positions['cout_acquisition_brut'],
+                                         duree_investissement_min, duree_investissement_max, rendement_min, date_fin)
+    # Durée de détention en jours calculée sur les dates typées (indice -1 : pas de vente, durée ignorée)
+    jours_detention = (series.dates[indices] - positions['date_acquisition']).astype(np.int64) if len(indices) else np.array([], dtype=np.int64)
+
+    for index, (action, date_acquisition, indice, motif) in enumerate(zip(actions, positions['date_acquisition'].astype('datetime64[us]').tolist(),
+                                                                           indices, motifs)):
+        if motif == AUCUNE:
+            if date_acquisition + relativedelta(months=duree_investissement_min) > date_fin:
+                registre.ajouter(AVERTISSEMENT, action, date_fin.strftime('%Y-%m-%d'), motif="Impossible de vendre à la date de fin")
             else:
-                print(f"  ⚠️  {action}: Impossible de vendre à la date de fin {date_fin.strftime('%Y-%m-%d')}")
-                continue
-        
-        # Ne pas dépasser la date_fin
-        if date_vente_max > date_fin:
-            date_vente_max = date_fin
-
-        # Parcourir jour par jour à partir de date_vente_min
-        date_courante = date_vente_min
-        vente_effectuee = False
-        
-        while date_courante <= date_vente_max and not vente_effectuee:
-            date_str, prix_unitaire_vente = obtenir_cours_date(date_courante.strftime('%Y-%m-%d'), action)
-            
-            if date_str and prix_unitaire_vente:
-                # Calcul du rendement brut en %
-                produit_brut = prix_unitaire_vente * quantite_actions
-                rendement_brut = ((produit_brut / cout_acquisition_brut) - 1) * 100
-                
-                # Calcul de la durée de détention
-                duree_detention = (datetime.strptime(date_str, '%Y-%m-%d') - date_acquisition).days / 30.44
-                
-                # Condition de vente
-                if rendement_brut >= rendement_min or date_courante >= date_vente_max:
-                    # Vente !
-                    portefeuille.at[index, 'date_cession'] = date_str
-                    portefeuille.at[index, 'prix_unitaire_vente'] = prix_unitaire_vente
-                    portefeuille.at[index, 'frais_cession'] = frais_cession
-                    portefeuille.at[index, 'produit_cession_brut'] = produit_brut
-                    portefeuille.at[index, 'produit_cession_net'] = produit_brut - frais_cession
-                    portefeuille.at[index, 'plus_value_brute'] = produit_brut - cout_acquisition_brut
-                    portefeuille.at[index, 'plus_value_nette'] = (produit_brut - frais_cession) - portefeuille.at[index, 'cout_acquisition_net']
-                    portefeuille.at[index, 'duree_detention_mois'] = duree_detention
-                    portefeuille.at[index, 'performance_brute_%'] = rendement_brut
-                    portefeuille.at[index, 'performance_net_%'] = (portefeuille.at[index, 'plus_value_nette'] / portefeuille.at[index, 'cout_acquisition_net']) * 100
-                    
-                    motif = "OBJECTIF ATTEINT" if rendement_brut >= rendement_min else "DURÉE MAX ATTEINTE"
-                    print(f"Vente {action} le {date_str} au prix de {prix_unitaire_vente:.2f}€ | Rendement: {rendement_brut:.2f}% | Gain/Perte: {portefeuille.at[index, 'plus_value_nette']:.2f}€ | Motif: {motif}")
-                    
-                    vente_effectuee = True
-            
-            # Passer au jour suivant
-            date_courante += timedelta(days=1)
-        
-        if not vente_effectuee:
-            print(f"  ⚠️  {action}: Impossible de vendre (pas de cours disponible entre {date_vente_min.strftime('%Y-%m-%d')} et {date_vente_max.strftime('%Y-%m-%d')})")
-    
-    return portefeuille
+                date_vente_min = date_acquisition + relativedelta(months=duree_investissement_min)
+                date_vente_max = min(date_acquisition + relativedelta(months=duree_investissement_max), date_fin)
+                registre.ajouter(AVERTISSEMENT, action, date_vente_min.strftime('%Y-%m-%d'),
+                                 motif=f"Impossible de vendre (pas de cours disponible jusqu'au {date_vente_max.strftime('%Y-%m-%d')})")
+            continue
 
-def calculer_rendements_annualises(portefeuille):
-    """Calcule les rendements annualisés pour chaque ligne"""
-    
-    # Durée en années pour chaque ligne
-    portefeuille['duree_annees'] = portefeuille['duree_detention_mois'] / 12
-    
-    # Rendement annualisé brut par ligne
-    portefeuille['rendement_annualise_brut_%'] = (
-        ((portefeuille['produit_cession_brut'] / portefeuille['cout_acquisition_brut']) 
-         ** (1 / portefeuille['duree_annees']) - 1) * 100
-    )
-    
-    # Rendement annualisé net par ligne
-    portefeuille['rendement_annualise_net_%'] = (
-        ((portefeuille['produit_cession_net'] / portefeuille['cout_acquisition_net']) 
-         ** (1 / portefeuille['duree_annees']) - 1) * 100
-    )
-    
-    return portefeuille
+        quantite_actions = int(positions['quantite_actions'][index])
+        date_cession = str(series.dates[indice])
+        prix_unitaire_vente = float(series.prix[indice])
+        rendement_brut = ((prix_unitaire_vente * quantite_actions / positions['cout_acquisition_brut'][index]) - 1) * 100
+
+        plus_value_nette = livre.enregistrer_vente(index, date_cession, prix_unitaire_vente, frais_cession, jours_detention[index] / 30.44)
+        registre.ajouter(VENTE, action, date_cession, prix_unitaire_vente, quantite_actions, plus_value_nette,
+                         rendement_brut, LIBELLES_MOTIF[motif])
+
+    return livre
 
 def analyse_resultats(portefeuille):
     resultats = []
@@ -261,18 +103,17 @@ def analyse_resultats(portefeuille):
     resultats.append(["Rendement min", rendement_min, "Constantes"])
     resultats.append(["Nbr actions achetées chaque mois", 1, "Constantes"])
 
-    portefeuille = calculer_rendements_annualises(portefeuille)
+    # Formules partagées avec grille_parametres.py (metriques.py), rendements annualisés ajoutés au portefeuille
+    m = metriques(portefeuille, taux_sans_risque)
     print(f"\n=== 📊 MÉTRIQUES GLOBALES ===")
-    total_investi_brut = portefeuille['cout_acquisition_brut'].sum()
-    total_investi      = portefeuille['cout_acquisition_net'].sum()
-    total_vente_brut   = portefeuille['produit_cession_brut'].sum()
-    total_vente        = portefeuille['produit_cession_net'].sum()
-    total_gain_net     = total_vente - total_investi
-    total_gain_brut    = total_vente_brut - total_investi_brut
-    total_frais        = portefeuille['frais_acquisition'].sum() + portefeuille['frais_cession'].sum()
+    total_investi      = m['total_investi']
+    total_vente        = m['total_vendu']
+    total_gain_net     = m['gain_net']
+    total_gain_brut    = m['gain_brut']
+    total_frais        = m['total_frais']
 
-    performance_globale_brute = (total_gain_brut / total_investi_brut) * 100
-    performance_globale_nette = (total_gain_net / total_investi) * 100
+    performance_globale_brute = m['performance_brute_%']
+    performance_globale_nette = m['performance_nette_%']
 
     print(f"Total investi (net)        : {total_investi:.2f}€")
     print(f"Total vendu (net)          : {total_vente:.2f}€")
@@ -312,10 +153,8 @@ def analyse_resultats(portefeuille):
     print(f"Taux de frais sur le total investi: {taux_frais:.2f}%")
 
     print(f"\n=== 📈 MÉTRIQUES DE RENDEMENT ===")
-    Rendement_annualise_moyen = portefeuille['performance_net_%'].mean()
-
-    rendement_annualise_brut_moyen = ( (portefeuille['rendement_annualise_brut_%'] * portefeuille['cout_acquisition_brut']).sum() / total_investi_brut)
-    rendement_annualise_net_moyen  = ( (portefeuille['rendement_annualise_net_%']  * portefeuille['cout_acquisition_net']).sum()  / total_investi)
+    rendement_annualise_brut_moyen = m['rendement_annualise_brut_%']
+    rendement_annualise_net_moyen  = m['rendement_annualise_net_%']
 
     print(f"\n--- RENDEMENTS ANNUALISÉS MOYENS ---")
     print(f"Rendement annualisé BRUT moyen   : {rendement_annualise_brut_moyen:+.2f}% par an")
@@ -324,18 +163,11 @@ def analyse_resultats(portefeuille):
     # ==========================================================
 
     # Volatilité des performances nettes (en points de %)
-    volativite_des_performances=portefeuille['performance_net_%'].std()
+    volativite_des_performances = m['volatilite_performances_%']
     print(f"Volatilité des performances nettes par transaction: {volativite_des_performances:.2f}%")
 
-    # Volatilité des rendements annualisés nets
-    volatilite_rendement_annualise = portefeuille['rendement_annualise_net_%'].std()
-    # print(f"Volatilité des rendement annualise: {volatilite_rendement_annualise:.2f}%")
-
-    # Taux sans risque (ex: Livret A à 1.7% annuel)
-    taux_sans_risque = 1.7
-
-    # Ratio de Sharpe
-    ratio_sharpe = (rendement_annualise_net_moyen - taux_sans_risque) / volatilite_rendement_annualise
+    # Ratio de Sharpe : volatilité des rendements annualisés nets, taux sans risque de parametres.py
+    ratio_sharpe = m['ratio_sharpe']
 
     print(f"Ratio de Sharpe  avec rf={taux_sans_risque}: {ratio_sharpe:.2f}")
     if ratio_sharpe < 0:
@@ -364,35 +196,32 @@ def analyse_resultats(portefeuille):
         print("🚨 > 3%     : TRÈS ÉLEVÉ (À éviter)")
 
     print("=======================")
-    meilleur_performance=portefeuille['performance_net_%'].max()
+    meilleur_performance = m['meilleure_performance_%']
     print(f"Meilleure performance nette sur une transaction: {meilleur_performance:.2f}%")
-    pire_performance=portefeuille['performance_net_%'].min()
+    pire_performance = m['pire_performance_%']
     print(f"Pire performance nette sur une transaction (Max Drawdown): {pire_performance:.2f}%")
     print("=" * 40)
 
-    performance_moyenne_par_transaction=portefeuille['performance_net_%'].mean()
+    performance_moyenne_par_transaction = m['performance_moyenne_%']
     print(f"Performance nette moyenne par transaction: {performance_moyenne_par_transaction:.2f}%")
-    performance_median_par_transaction=portefeuille['performance_net_%'].median()
+    performance_median_par_transaction = m['performance_mediane_%']
     print(f"Performance nette médiane par transaction: {performance_median_par_transaction:.2f}%")
     print("=" * 40)
     # print(f"Coût_opportunite_moyen_par_transaction {(Rendement_annualise_moyen - rf) * (duree_investissement / 12):.2f}%")
     # print(f"Coût_opportunite_moyen_en_euros {(Rendement_annualise_moyen - rf) * (duree_investissement / 12) * total_investi / 100:.2f}€")
 
     print("\n=== 🎯 MÉTRIQUES DE RÉUSSITE DES TRANSACTIONS ===")
-    if portefeuille.shape[0]>0:
-        taux_de_reussite=(portefeuille[portefeuille['performance_net_%'] > 0].shape[0] / portefeuille.shape[0]) * 100
-    else:
-        taux_de_reussite=0
+    taux_de_reussite = m['taux_reussite_%']
     print(f"Taux de réussite des transactions: {taux_de_reussite:.2f}%")
-    nombre_de_transactions_gagnantes=portefeuille[portefeuille['performance_net_%'] > 0].shape[0]
+    nombre_de_transactions_gagnantes = m['nb_gagnantes']
     print(f"Nombre de transactions gagnantes: {nombre_de_transactions_gagnantes}")
-    nombre_de_transactions_perdantes=portefeuille[portefeuille['performance_net_%'] <= 0].shape[0]
+    nombre_de_transactions_perdantes = m['nb_perdantes']
     print(f"Nombre de transactions perdantes: {nombre_de_transactions_perdantes}")
-    gain_moyen_par_transaction_gagnante=portefeuille[portefeuille['performance_net_%'] > 0]['performance_net_%'].mean()
+    gain_moyen_par_transaction_gagnante = m['gain_moyen_%']
     print(f"Gain moyen par transaction gagnante: {gain_moyen_par_transaction_gagnante:.2f}%")
-    perte_moyenne_par_transaction_perdante=portefeuille[portefeuille['performance_net_%'] <= 0]['performance_net_%'].mean()
+    perte_moyenne_par_transaction_perdante = m['perte_moyenne_%']
     print(f"Perte moyenne par transaction perdante: {perte_moyenne_par_transaction_perdante:.2f}%")
-    ratio_gain_perte= - gain_moyen_par_transaction_gagnante / perte_moyenne_par_transaction_perdante if perte_moyenne_par_transaction_perdante !=0 else float('inf')
+    ratio_gain_perte = m['ratio_gain_perte']
     print(f"Ratio gain/perte: {ratio_gain_perte:.2f}")
     print("=" * 40)
 
@@ -403,20 +232,20 @@ def analyse_resultats(portefeuille):
     portefeuille['date_cession']     = pd.to_datetime(portefeuille['date_cession'])
     portefeuille['duree_jours']      = (portefeuille['date_cession'] - portefeuille['date_acquisition']).dt.days
 
-    resultats.append(["Intervalle MIN", f"{portefeuille['duree_jours'].min():.0f} jours", ""])
-    resultats.append(["Intervalle MAX", f"{portefeuille['duree_jours'].max():.0f} jours", ""])
-    resultats.append(["Intervalle MOYEN", f"{portefeuille['duree_jours'].mean():.1f} jours", ""])
-    resultats.append(["Intervalle MÉDIAN", f"{portefeuille['duree_jours'].median():.1f} jours", ""])
-    resultats.append(["Écart-type", f"{portefeuille['duree_jours'].std():.1f} jours", ""])
-
-    print(f"Intervalle MIN: {portefeuille['duree_jours'].min():.0f} jours")
-    print(f"Intervalle MAX: {portefeuille['duree_jours'].max():.0f} jours") 
-    print(f"Intervalle MOYEN: {portefeuille['duree_jours'].mean():.1f} jours")
-    print(f"Intervalle MÉDIAN: {portefeuille['duree_jours'].median():.1f} jours")
-    print(f"Écart-type: {portefeuille['duree_jours'].std():.1f} jours")
+    resultats.append(["Intervalle MIN", f"{m['duree_min_jours']:.0f} jours", ""])
+    resultats.append(["Intervalle MAX", f"{m['duree_max_jours']:.0f} jours", ""])
+    resultats.append(["Intervalle MOYEN", f"{m['duree_moyenne_jours']:.1f} jours", ""])
+    resultats.append(["Intervalle MÉDIAN", f"{m['duree_mediane_jours']:.1f} jours", ""])
+    resultats.append(["Écart-type", f"{m['duree_ecart_type_jours']:.1f} jours", ""])
+
+    print(f"Intervalle MIN: {m['duree_min_jours']:.0f} jours")
+    print(f"Intervalle MAX: {m['duree_max_jours']:.0f} jours") 
+    print(f"Intervalle MOYEN: {m['duree_moyenne_jours']:.1f} jours")
+    print(f"Intervalle MÉDIAN: {m['duree_mediane_jours']:.1f} jours")
+    print(f"Écart-type: {m['duree_ecart_type_jours']:.1f} jours")
     
     # Analyse de la régularité
-    ecart_type = portefeuille['duree_jours'].std()
+    ecart_type = m['duree_ecart_type_jours']
     if ecart_type < 5:
         regularite = "✅ TRÈS RÉGULIER"
     elif ecart_type < 10:
@@ -479,9 +308,50 @@ def analyse_resultats(portefeuille):
 
     return portefeuille
 
+def simuler(selection, registre):
+    """Achats mensuels de l'action sélectionnée puis ventes : retourne le portefeuille (DataFrame)"""
+    # Structure pour le portefeuille : livre des positions typé (livre_positions.py), converti en DataFrame après les ventes
+    livre = LivrePositions()
+
+    # Parcourir chaque mois
+    date_courante = date_debut
+
+    while date_courante <= date_fin:
+        annee = date_courante.year
+        mois  = date_courante.month
+
+        action = selection.get(f"{annee}-{mois:02d}")
+        if action is None:
+            registre.ajouter(ECART, date=f"{annee}-{mois:02d}-01", motif="Pas de cotation")
+            date_courante = date_courante + relativedelta(months=1)
+            continue
+        date_acquisition,prix_unitaire_achat = cours_action_asap(annee, mois, action)
+        # Calculer le nombre d'actions entières achetées
+        # Montant disponible après frais d'achat
+        montant_disponible = montant_mensuel - frais_acquisition
+        if prix_unitaire_achat == 0:
+            registre.ajouter(ECART, action, f"{annee}-{mois:02d}-01", motif="Pas de cours disponible pour l'achat")
+            date_courante = date_courante + relativedelta(months=1)
+            continue
+        quantite_actions = int(montant_disponible / prix_unitaire_achat)  # Nombre entier d'actions
+
+        # Si on ne peut pas acheter au moins 1 action, on saute
+        if quantite_actions >= 1:
+            registre.ajouter(ACHAT, action, date_acquisition, prix_unitaire_achat, quantite_actions,
+                             quantite_actions * prix_unitaire_achat + frais_acquisition)
+            livre.ajouter_achat(action, date_acquisition, prix_unitaire_achat, quantite_actions, frais_acquisition)
+        else:
+            registre.ajouter(ECART, action, date_acquisition, prix_unitaire_achat, motif="Montant insuffisant")
+
+        date_courante = date_courante + relativedelta(months=1)
+
+    return vente_des_actions_opt(livre, date_fin, registre).en_dataframe()
+
 # Récupérer la liste des actions disponibles
-cursor.execute("SELECT DISTINCT action FROM actions where action in (SELECT ticker_yahoo FROM cac40_composition where nom_indice='CAC_40' and date_maj=(select max(date_maj) from cac40_composition) limit 300) ORDER BY action")
-actions_list = [row[0] for row in cursor.fetchall()]
+composition = CompositionHistorique.charger(conn) if composition_a_date else None
+actions_list = actions_indice(conn, 'CAC_40', toutes_les_photos=composition_a_date)
+store.charger(actions_list)
+registre = RegistreEvenements(fichier_evenements)
 
 print(f"\n=== SIMULATION DCA ===")
 print(f"Période: {date_debut.strftime('%Y-%m-%d')} à {date_fin.strftime('%Y-%m-%d')}")
@@ -489,57 +359,31 @@ print(f"Investissement mensuel par action: {montant_mensuel}€")
 print(f"Durée de détention min: {duree_investissement_min} mois")
 print(f"Durée de détention max: {duree_investissement_max} mois\n")
 
-# Parcourir chaque mois
-date_courante = date_debut
-achats_en_cours = []
-
-while date_courante <= date_fin:
-    annee = date_courante.year
-    mois  = date_courante.month
- 
-    cursor.execute("""
-    SELECT action, Volume
-        FROM actions 
-        WHERE 
-        date = (
-            SELECT min(date) 
-            FROM actions 
-            WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ? 
-        )
-        and action in (SELECT ticker_yahoo FROM cac40_composition where nom_indice='CAC_40' and date_maj=(select max(date_maj) from cac40_composition))
-            ORDER BY Volume DESC
-    """, (str(annee), f"{mois:02d}"))
-    
-    resultats = cursor.fetchmany(3)
-    action=resultats[0][0]
-    date_acquisition,prix_unitaire_achat = cours_action_asap(annee, mois, action)
-    # Calculer le nombre d'actions entières achetées
-    # Montant disponible après frais d'achat
-    montant_disponible = montant_mensuel - frais_acquisition
-    if prix_unitaire_achat == 0:
-        quantite_actions = 0
-        print(f"  ⚠ {action}: Pas de cours disponible pour l'achat en {annee}-{mois:02d}.")
-    else:
-        quantite_actions = int(montant_disponible / prix_unitaire_achat)  # Nombre entier d'actions
-
-    # Si on ne peut pas acheter au moins 1 action, on saute
-    if quantite_actions >= 1:
-        print(f"Achat {action} le {date_acquisition} au prix de {prix_unitaire_achat:.2f}€")
-        portefeuille.loc[len(portefeuille)] = [
-            action, 
-            date_acquisition, 
-            prix_unitaire_achat, 
-            quantite_actions,
-            frais_acquisition,
-            quantite_actions * prix_unitaire_achat,
-            quantite_actions * prix_unitaire_achat+frais_acquisition
-            ]
-    else:
-        print(f"  ⚠ {action}: Montant insuffisant (prix: {prix_unitaire_achat:.2f}€)")
-
-    date_courante = date_courante + relativedelta(months=1)
-
-portefeuille = vente_des_actions_opt(portefeuille,date_fin)
+# Action au plus fort volume le premier jour de chaque mois : une lecture de la table classement_volume_mensuel (classement_volume.py)
+selection = selection_mensuelle(conn, date_debut, date_fin, composition=composition)
+
+# Portefeuille et événements de toute la simulation mis en cache (cache_resultats.py) : la sélection de chaque mois
+# dépend de tout l'univers, la simulation est donc un seul élément. Sa version combine celles des actions de
+# l'univers et la sélection mensuelle : un nouveau cours d'une action ou un nouveau classement la recalcule.
+parametres = {'date_debut': date_debut, 'date_fin': date_fin, 'duree_investissement_min': duree_investissement_min,
+              'duree_investissement_max': duree_investissement_max, 'rendement_min': rendement_min,
+              'montant_mensuel': montant_mensuel, 'frais_acquisition': frais_acquisition, 'frais_cession': frais_cession,
+              'composition_a_date': composition_a_date}
+cache = CacheResultats(conn, 'dca_v0.1', parametres)
+version_simulation = version_ensemble(versions(conn, actions_list), selection)
+resultat = cache.lire('simulation', version_simulation)
+if resultat is None:
+    debut_calcul = time.perf_counter()
+    tampon = RegistreEvenements(None)
+    resultat = (simuler(selection, tampon), tampon.evenements())
+    cache.ecrire('simulation', version_simulation, resultat, time.perf_counter() - debut_calcul)
+cache.afficher_resume()
+portefeuille, evenements = resultat
+registre.ajouter_tableau(evenements)
+registre.fermer()
+registre.afficher_resume()
+if affichage_console:
+    afficher_evenements(fichier_evenements)
 print(portefeuille.head(10))
 
 portefeuille_analyse=analyse_resultats(portefeuille)
@@ -0,0 +1,162 @@
+#
+# Recherche en grille des paramètres de sortie de dca_v0.1.py
+#
+# Les combinaisons (duree_investissement_min, duree_investissement_max, rendement_min) sont réparties
+# sur un pool de processus. Les achats ne dépendent pas de ces paramètres : ils sont calculés une seule
+# fois (même sélection par volume que le script) puis transmis aux processus à leur démarrage.
+# Les cours de vente sont lus dans le cube de prix (cube_prix.py) projeté en mémoire en lecture seule :
+# les processus partagent les mêmes pages du cache système au lieu de relire la base chacun.
+#
+# Chaque combinaison reprend la vente conditionnelle de vente_des_actions_opt (recherche_sorties.py,
+# toutes les positions en un appel) et les métriques de analyse_resultats (metriques.py). Le tableau des résultats est classé selon critere_classement et enregistré
+# dans grille_parametres.csv.
+# Période, montant, frais et univers (dont composition_a_date) sont ceux de dca_v0.1.py : parametres.py.
+#
+# Utilisation (depuis le répertoire dca_v0.1, comme dca_v0.1.py):
+#   python grille_parametres.py [rendement|sharpe]
+#
+
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from classement_volume import selection_mensuelle
+from composition_historique import CompositionHistorique, actions_indice
+from cube_prix import charger_cube, mettre_a_jour_cube
+from price_store import PriceStore
+from recherche_sorties import AUCUNE, SeriesConcatenees, rechercher_sorties
+from metriques import metriques
+from parametres import (db_file, date_debut, date_fin, montant_mensuel, frais_acquisition, frais_cession,
+                        taux_sans_risque, composition_a_date)
+
+pd.set_option('display.max_rows', 1000)
+pd.set_option('display.max_columns', 500)
+pd.set_option('display.width', 1000)
+
+repertoire_cube = '../cube_prix'
+
+# Grille explorée : duree_investissement_max = duree_investissement_min + écart
+durees_min     = [6, 12, 24, 36, 48, 60, 72]     # en mois
+ecarts_max     = [6, 12]                         # en mois
+rendements_min = [10.0, 20.0, 30.0, 40.0]        # en %
+
+# Classement : 'rendement_annualise_net_%' ou 'ratio_sharpe'
+critere_classement = 'rendement_annualise_net_%'
+# Métriques de metriques.py reprises dans le tableau
+colonnes_metriques = ['nb_transactions', 'nb_ventes', 'total_investi', 'total_vendu', 'gain_net', 'total_frais',
+                      'performance_brute_%', 'performance_nette_%', 'rendement_annualise_brut_%', 'rendement_annualise_net_%',
+                      'volatilite_performances_%', 'ratio_sharpe', 'taux_reussite_%', 'ratio_gain_perte',
+                      'meilleure_performance_%', 'pire_performance_%', 'duree_moyenne_jours']
+nb_processus = os.cpu_count()
+
+def achats_dca(conn, store, composition=None):
+    """Achats mensuels de dca_v0.1.py : l'action du CAC 40 au plus fort volume le premier jour du mois"""
+    achats = []
+    montant_disponible = montant_mensuel - frais_acquisition
+    selection = selection_mensuelle(conn, date_debut, date_fin, composition=composition)
+    date_courante = date_debut
+    while date_courante <= date_fin:
+        annee = date_courante.year
+        mois  = date_courante.month
+        action = selection.get(f"{annee}-{mois:02d}")
+        date_courante = date_courante + relativedelta(months=1)
+        if action is None:
+            continue
+        cours = store.cours_action_asap(annee, mois, action)
+        if not cours or cours[1] == 0:
+            continue
+        date_acquisition, prix_unitaire_achat = cours
+        quantite_actions = int(montant_disponible / prix_unitaire_achat)
+        if quantite_actions >= 1:
+            achats.append((action, date_acquisition, prix_unitaire_achat, quantite_actions))
+    return achats
+
+# --- Côté processus de calcul ---
+
+_achats = None
+_series = None
+
+def _initialiser_processus(repertoire, achats):
+    """Séances avec Open renseigné et cours moyen des actions achetées, extraites du cube projeté"""
+    global _achats, _series
+    cube = charger_cube(repertoire)
+    series = {}
+    for action in dict.fromkeys(achat[0] for achat in achats):
+        j = cube.index[action]
+        opens  = np.asarray(cube['Open'][:, j])
+        closes = np.asarray(cube['Close'][:, j])
+        valides = ~np.isnan(opens)
+        series[action] = (cube.dates[valides], ((opens + closes) / 2)[valides])
+    _series = SeriesConcatenees(series)
+    quantites = np.array([achat[3] for achat in achats], dtype=float)
+    _achats = ([achat[0] for achat in achats], np.array([achat[1] for achat in achats], dtype='datetime64[D]'),
+               quantites, quantites * np.array([achat[2] for achat in achats], dtype=float))
+
+def evaluer(parametres):
+    """Ventes et métriques d'une combinaison (duree_min, duree_max, rendement_min)"""
+    duree_min, duree_max, rendement_min = parametres
+    actions, dates_acquisition, quantites, cout_brut = _achats
+    cout_net = cout_brut + frais_acquisition
+    indices, motifs = rechercher_sorties(_series, actions, dates_acquisition, quantites, cout_brut,
+                                         duree_min, duree_max, rendement_min, date_fin)
+    vendu = motifs != AUCUNE
+    dates_cession = np.full(len(actions), np.datetime64('NaT'), dtype='datetime64[D]')
+    dates_cession[vendu] = _series.dates[indices[vendu]]
+    produit_brut = np.full(len(actions), np.nan)
+    produit_brut[vendu] = _series.prix[indices[vendu]] * quantites[vendu]
+    produit_net  = produit_brut - frais_cession
+    portefeuille = pd.DataFrame({
+        'action':                actions,
+        'date_acquisition':      np.datetime_as_string(dates_acquisition, unit='D'),
+        'frais_acquisition':     frais_acquisition,
+        'cout_acquisition_brut': cout_brut,
+        'cout_acquisition_net':  cout_net,
+        'date_cession':          dates_cession,
+        'frais_cession':         np.where(vendu, frais_cession, np.nan),
+        'produit_cession_brut':  produit_brut,
+        'produit_cession_net':   produit_net,
+        'duree_detention_mois':  np.where(vendu, (dates_cession - dates_acquisition).astype(np.int64) / 30.44, np.nan),
+        'performance_net_%':     ((produit_net - cout_net) / cout_net) * 100,
+    })
+    resultat = {'duree_investissement_min': duree_min, 'duree_investissement_max': duree_max, 'rendement_min': rendement_min}
+    valeurs = metriques(portefeuille, taux_sans_risque)
+    resultat.update({colonne: valeurs[colonne] for colonne in colonnes_metriques})
+    return resultat
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        critere_classement = {'rendement': 'rendement_annualise_net_%', 'sharpe': 'ratio_sharpe'}[sys.argv[1]]
+
+    debut = time.perf_counter()
+    conn = sqlite3.connect(db_file)
+    mettre_a_jour_cube(conn, repertoire_cube)
+    store = PriceStore(conn, open_requis=True)
+    composition = CompositionHistorique.charger(conn) if composition_a_date else None
+    store.charger(actions_indice(conn, 'CAC_40', toutes_les_photos=composition_a_date))
+    achats = achats_dca(conn, store, composition)
+    conn.close()
+
+    combinaisons = [(duree_min, duree_min + ecart, rendement)
+                    for duree_min, ecart, rendement in itertools.product(durees_min, ecarts_max, rendements_min)]
+    print(f"\n=== GRILLE DCA V0.1 ===")
+    print(f"Période: {date_debut.strftime('%Y-%m-%d')} à {date_fin.strftime('%Y-%m-%d')} | {len(achats)} achats")
+    print(f"{len(combinaisons)} combinaisons sur {nb_processus} processus")
+
+    with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_processus,
+                             initargs=(repertoire_cube, achats)) as pool:
+        resultats = list(pool.map(evaluer, combinaisons, chunksize=max(1, len(combinaisons) // (4 * nb_processus))))
+
+    tableau = pd.DataFrame(resultats).sort_values(critere_classement, ascending=False, ignore_index=True)
+    tableau.index = tableau.index + 1
+    tableau.index.name = 'rang'
+    print(f"\nClassement par {critere_classement} ({time.perf_counter() - debut:.2f}s):")
+    print(tableau.head(10).round(2))
+    tableau.to_csv(r'grille_parametres.csv', sep=';', index=True, encoding='utf-8-sig', decimal=",", float_format='%.2f', header=True)
@@ -0,0 +1,80 @@
+#
+# Métriques du portefeuille de la stratégie DCA V0.1
+#
+# Partagées par dca_v0.1.py (analyse_resultats : affichage et resultats.csv) et grille_parametres.py
+# (une ligne du tableau par combinaison de paramètres) : les deux calculent les mêmes formules.
+#
+
+import pandas as pd
+
+def calculer_rendements_annualises(portefeuille):
+    """Calcule les rendements annualisés pour chaque ligne"""
+
+    # Durée en années pour chaque ligne
+    portefeuille['duree_annees'] = portefeuille['duree_detention_mois'] / 12
+
+    # Rendement annualisé brut par ligne
+    portefeuille['rendement_annualise_brut_%'] = (
+        ((portefeuille['produit_cession_brut'] / portefeuille['cout_acquisition_brut'])
+         ** (1 / portefeuille['duree_annees']) - 1) * 100
+    )
+
+    # Rendement annualisé net par ligne
+    portefeuille['rendement_annualise_net_%'] = (
+        ((portefeuille['produit_cession_net'] / portefeuille['cout_acquisition_net'])
+         ** (1 / portefeuille['duree_annees']) - 1) * 100
+    )
+
+    return portefeuille
+
+def metriques(portefeuille, taux_sans_risque):
+    """Métriques globales du portefeuille (ajoute les rendements annualisés par ligne au portefeuille)"""
+    portefeuille = calculer_rendements_annualises(portefeuille)
+    total_investi_brut = portefeuille['cout_acquisition_brut'].sum()
+    total_investi      = portefeuille['cout_acquisition_net'].sum()
+    total_vente_brut   = portefeuille['produit_cession_brut'].sum()
+    total_vente        = portefeuille['produit_cession_net'].sum()
+    total_gain_net     = total_vente - total_investi
+    total_gain_brut    = total_vente_brut - total_investi_brut
+    total_frais        = portefeuille['frais_acquisition'].sum() + portefeuille['frais_cession'].sum()
+
+    rendement_annualise_brut_moyen = (portefeuille['rendement_annualise_brut_%'] * portefeuille['cout_acquisition_brut']).sum() / total_investi_brut
+    rendement_annualise_net_moyen  = (portefeuille['rendement_annualise_net_%']  * portefeuille['cout_acquisition_net']).sum()  / total_investi
+
+    performance = portefeuille['performance_net_%']
+    gagnantes = performance[performance > 0]
+    perdantes = performance[performance <= 0]
+    perte_moyenne = perdantes.mean()
+    duree_jours = (pd.to_datetime(portefeuille['date_cession']) - pd.to_datetime(portefeuille['date_acquisition'])).dt.days
+
+    return {
+        'nb_transactions':             len(portefeuille),
+        'nb_ventes':                   int(portefeuille['date_cession'].notna().sum()),
+        'total_investi_brut':          total_investi_brut,
+        'total_investi':               total_investi,
+        'total_vendu':                 total_vente,
+        'gain_brut':                   total_gain_brut,
+        'gain_net':                    total_gain_net,
+        'total_frais':                 total_frais,
+        'performance_brute_%':         (total_gain_brut / total_investi_brut) * 100,
+        'performance_nette_%':         (total_gain_net / total_investi) * 100,
+        'rendement_annualise_brut_%':  rendement_annualise_brut_moyen,
+        'rendement_annualise_net_%':   rendement_annualise_net_moyen,
+        'volatilite_performances_%':   performance.std(),
+        'ratio_sharpe':                (rendement_annualise_net_moyen - taux_sans_risque) / portefeuille['rendement_annualise_net_%'].std(),
+        'taux_reussite_%':             (len(gagnantes) / len(portefeuille)) * 100 if len(portefeuille) else 0,
+        'nb_gagnantes':                len(gagnantes),
+        'nb_perdantes':                len(perdantes),
+        'gain_moyen_%':                gagnantes.mean(),
+        'perte_moyenne_%':             perte_moyenne,
+        'ratio_gain_perte':            - gagnantes.mean() / perte_moyenne if perte_moyenne != 0 else float('inf'),
+        'meilleure_performance_%':     performance.max(),
+        'pire_performance_%':          performance.min(),
+        'performance_moyenne_%':       performance.mean(),
+        'performance_mediane_%':       performance.median(),
+        'duree_min_jours':             duree_jours.min(),
+        'duree_max_jours':             duree_jours.max(),
+        'duree_moyenne_jours':         duree_jours.mean(),
+        'duree_mediane_jours':         duree_jours.median(),
+        'duree_ecart_type_jours':      duree_jours.std(),
+    }
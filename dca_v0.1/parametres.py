@@ -0,0 +1,33 @@
+#
+# Paramètres de la stratégie DCA V0.1
+#
+# Partagés par dca_v0.1.py et grille_parametres.py : la grille explore les paramètres de sortie autour
+# des mêmes achats (période, montant, frais, univers) que le script.
+#
+
+from datetime import datetime
+
+# Base de données (scripts lancés depuis le répertoire dca_v0.1)
+db_file = '../cac40_data.db'
+
+# Dates de début et fin de l'analyse
+date_debut = datetime(2015, 1, 1)
+date_fin   = datetime(2025, 10, 31)
+
+duree_investissement_min = 12                            # en mois - durée minimum avant de vérifier le rendement
+duree_investissement_max = duree_investissement_min+6  # en mois - durée maximum, vente forcée même à perte
+rendement_min = 10.0                                     # en % - rendement brut minimum pour vendre après duree_investissement_min
+
+# Montant d'investissement mensuel par action
+montant_mensuel = 100.0
+
+# Frais de transaction (en euros)
+frais_acquisition = 1.0  # Frais par transaction d'achat quelque soit le montant
+frais_cession     = 1.0  # Frais par transaction de vente quelque soit le montant
+
+# Taux sans risque (ex: Livret A à 1.7% annuel), pour le ratio de Sharpe
+taux_sans_risque = 1.7
+
+# False : sélection parmi la dernière composition du CAC 40
+# True  : sélection parmi les actions du CAC 40 à la date de la séance (composition_historique.py)
+composition_a_date = False
@@ -0,0 +1,100 @@
+#
+# Recherche vectorisée des dates de vente de vente_des_actions_opt (dca_v0.1.py)
+#
+# La boucle d'origine avance jour calendaire par jour calendaire entre date_vente_min et date_vente_max
+# et cherche chaque jour la première séance dans les 10 jours (obtenir_cours_date). Les séances ainsi
+# examinées forment une tranche contiguë de l'historique de l'action : les séances de
+# [date_vente_min, date_vente_max[, plus la séance trouvée le jour date_vente_max.
+# Les deux bornes de la tranche sont obtenues par recherche dichotomique.
+#
+# La vente a lieu à la première séance de la tranche où le rendement brut atteint rendement_min, sinon
+# à la dernière séance de la tranche si elle est trouvée le jour date_vente_max (vente forcée).
+# Toutes les positions sont traitées ensemble : les tranches sont mises bout à bout et la première
+# séance qui déclenche la vente est trouvée par une seule recherche sur les indices du masque.
+#
+
+import numpy as np
+
+MAX_JOURS = 10     # fenêtre de recherche de obtenir_cours_date
+
+# Motifs de vente
+AUCUNE, OBJECTIF_ATTEINT, DUREE_MAX_ATTEINTE, FIN_DE_SIMULATION = 0, 1, 2, 3
+LIBELLES_MOTIF = {OBJECTIF_ATTEINT: "OBJECTIF ATTEINT", DUREE_MAX_ATTEINTE: "DURÉE MAX ATTEINTE", FIN_DE_SIMULATION: "FIN DE SIMULATION"}
+
+_DECALAGE_ACTION = np.int64(1) << 32    # clé de tri (rang de l'action, jour)
+
+class SeriesConcatenees:
+    """Séances et cours de plusieurs actions mis bout à bout, triés par (action, date)"""
+
+    def __init__(self, series):
+        """series : {action: (dates des séances triées, cours)}"""
+        self.rang  = {action: k for k, action in enumerate(series)}
+        dates = [np.asarray(d, dtype='datetime64[D]') for d, _ in series.values()]
+        self.dates = np.concatenate(dates) if dates else np.array([], dtype='datetime64[D]')
+        self.prix  = np.concatenate([np.asarray(p, dtype=float) for _, p in series.values()]) if dates else np.array([])
+        rangs = np.repeat(np.arange(len(dates), dtype=np.int64), [len(d) for d in dates])
+        self.cles = rangs * _DECALAGE_ACTION + self.dates.astype(np.int64)
+        self.fins = np.cumsum([len(d) for d in dates], dtype=np.int64)
+
+    def rechercher(self, rangs, dates):
+        """Indice global de la première séance >= date de chaque action"""
+        return np.searchsorted(self.cles, rangs * _DECALAGE_ACTION + dates.astype(np.int64))
+
+def ajouter_mois(dates, nb_mois):
+    """dates + relativedelta(months=nb_mois), vectorisé (jour ramené à la fin du mois si besoin)"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    mois  = dates.astype('datetime64[M]')
+    jour  = dates - mois.astype('datetime64[D]')
+    cible = mois + nb_mois
+    nb_jours = (cible + 1).astype('datetime64[D]') - cible.astype('datetime64[D]')
+    return cible.astype('datetime64[D]') + np.minimum(jour, nb_jours - np.timedelta64(1, 'D'))
+
+def rechercher_sorties(series, actions, dates_acquisition, quantites, couts_bruts,
+                       duree_min, duree_max, rendement_min, date_fin):
+    """
+    Ventes de vente_des_actions_opt pour toutes les positions.
+    Retourne l'indice de la séance de vente dans series (-1 si aucune) et le motif de chaque position.
+    """
+    nb = len(actions)
+    dates_acquisition = np.asarray(dates_acquisition, dtype='datetime64[D]')
+    quantites   = np.asarray(quantites, dtype=float)
+    couts_bruts = np.asarray(couts_bruts, dtype=float)
+    fin = np.datetime64(date_fin, 'D')
+
+    vente_min = ajouter_mois(dates_acquisition, duree_min)
+    vente_max = np.minimum(ajouter_mois(dates_acquisition, duree_max), fin)
+    # Durée minimum au-delà de date_fin : une seule recherche, à date_fin, vente forcée
+    fin_simulation = vente_min > fin
+    vente_min = np.where(fin_simulation, fin, vente_min)
+    vente_max = np.where(fin_simulation, fin, vente_max)
+
+    rangs = np.array([series.rang[action] for action in actions], dtype=np.int64)
+    fins  = series.fins[rangs] if nb else np.array([], dtype=np.int64)
+    premier = series.rechercher(rangs, vente_min)
+    dernier = series.rechercher(rangs, vente_max)
+    # Séance trouvée le jour date_vente_max : la première à partir de date_vente_max, dans les MAX_JOURS jours
+    sentinelle = np.append(series.dates, np.datetime64('9999-12-31'))
+    dernier += (dernier < fins) & (sentinelle[dernier] < vente_max + np.timedelta64(MAX_JOURS, 'D'))
+
+    # Tranches mises bout à bout
+    longueurs = dernier - premier
+    debuts_tranche = np.cumsum(longueurs) - longueurs
+    proprietaire = np.repeat(np.arange(nb), longueurs)
+    candidats = premier[proprietaire] + np.arange(longueurs.sum()) - debuts_tranche[proprietaire]
+
+    prix = series.prix[candidats]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rendements = ((prix * quantites[proprietaire] / couts_bruts[proprietaire]) - 1) * 100
+    objectif = rendements >= rendement_min
+    vente = (prix != 0) & (objectif | (series.dates[candidats] >= vente_max[proprietaire]))
+
+    # Première séance de vente de chaque tranche (sentinelle en fin pour les tranches sans vente)
+    indices_vente = np.append(np.flatnonzero(vente), len(candidats))
+    position = indices_vente[np.searchsorted(indices_vente, debuts_tranche)]
+    trouve = position < debuts_tranche + longueurs
+    position = np.where(trouve, position, 0)
+
+    indices = np.where(trouve, np.append(candidats, -1)[position], -1)
+    motifs = np.where(np.append(objectif, False)[position], OBJECTIF_ATTEINT, DUREE_MAX_ATTEINTE)
+    motifs = np.where(fin_simulation, FIN_DE_SIMULATION, motifs)
+    return indices, np.where(trouve, motifs, AUCUNE)
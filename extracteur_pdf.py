@@ -0,0 +1,90 @@
+#
+# Extraction rapide des tableaux de composition Euronext
+#
+# Même résultat que parser_composition_pdf (maj_cours_euronext.py) mais :
+#   - les pages sont analysées en parallèle dans un pool de processus (pdfplumber est en pur Python)
+#   - le regroupement des mots en lignes et en colonnes est vectorisé avec numpy :
+#     un seul tri (ligne, x0) puis détection des écarts entre mots consécutifs
+#
+
+import os
+from io import BytesIO
+
+import numpy as np
+import pdfplumber
+
+ECART_COLONNES = 15     # écart horizontal (en points) au-delà duquel un mot commence une nouvelle colonne
+NB_COLONNES    = 4      # Company, MNEMO, Sector (ICB), Weight (%)
+SEUIL_PAGES_POOL = 4    # en dessous, le coût de démarrage du pool dépasse le gain
+
+# Version des lignes extraites, enregistrée avec elles dans le cache des PDF (telechargement.CachePDF) :
+# à incrémenter à chaque changement de leur contenu (ici ou dans parser_composition_pdf)
+VERSION_EXTRACTEUR = 1
+
+def regrouper_colonnes(textes, top, x0, x1, ecart_colonnes=ECART_COLONNES, nb_colonnes=NB_COLONNES):
+    """
+    Regroupe les mots d'une page en lignes (top arrondi) puis en colonnes (écart >= ecart_colonnes).
+    Retourne les lignes ayant exactement nb_colonnes colonnes, dans l'ordre vertical.
+    """
+    if len(textes) == 0:
+        return []
+    y = np.rint(top)
+
+    # Tri stable par ligne puis par x0, comme sorted(lines) + line.sort(key=x0)
+    ordre = np.lexsort((x0, y))
+    y, x0, x1 = y[ordre], x0[ordre], x1[ordre]
+    textes = [textes[i] for i in ordre]
+
+    nouvelle_ligne = np.ones(len(y), dtype=bool)
+    nouvelle_ligne[1:] = y[1:] != y[:-1]
+    nouvelle_colonne = nouvelle_ligne.copy()
+    nouvelle_colonne[1:] |= (x0[1:] - x1[:-1]) >= ecart_colonnes
+
+    # Nombre de colonnes de chaque ligne, propagé à chaque mot
+    id_ligne = np.cumsum(nouvelle_ligne) - 1
+    colonnes_par_ligne = np.bincount(id_ligne, weights=nouvelle_colonne).astype(int)
+    mot_garde = colonnes_par_ligne[id_ligne] == nb_colonnes
+
+    rows = []
+    debuts_colonnes = np.flatnonzero(nouvelle_colonne & mot_garde)
+    fins_colonnes = np.append(debuts_colonnes[1:], len(y))
+    # La dernière colonne d'une ligne gardée s'arrête au premier mot de la ligne suivante
+    fins_colonnes = np.minimum(fins_colonnes, np.searchsorted(id_ligne, id_ligne[debuts_colonnes], side='right'))
+    for k in range(0, len(debuts_colonnes), nb_colonnes):
+        rows.append([' '.join(textes[debut:fin])
+                     for debut, fin in zip(debuts_colonnes[k:k + nb_colonnes], fins_colonnes[k:k + nb_colonnes])])
+    return rows
+
+def _extraire_pages(contenu_pdf, numeros_pages, ecart_colonnes):
+    """Travail d'un processus : ouvre le PDF et analyse les pages demandées"""
+    rows = []
+    with pdfplumber.open(BytesIO(contenu_pdf)) as pdf:
+        for numero in numeros_pages:
+            words = pdf.pages[numero].extract_words()
+            textes = [w['text'] for w in words]
+            top = np.fromiter((w['top'] for w in words), dtype=float, count=len(words))
+            x0  = np.fromiter((w['x0'] for w in words), dtype=float, count=len(words))
+            x1  = np.fromiter((w['x1'] for w in words), dtype=float, count=len(words))
+            rows.extend(regrouper_colonnes(textes, top, x0, x1, ecart_colonnes))
+    return rows
+
+def nombre_pages(contenu_pdf):
+    with pdfplumber.open(BytesIO(contenu_pdf)) as pdf:
+        return len(pdf.pages)
+
+def extraire_composition(contenu_pdf, executor=None, nb_blocs=None, ecart_colonnes=ECART_COLONNES):
+    """
+    Extrait les lignes à 4 colonnes du PDF de composition.
+    Avec un ProcessPoolExecutor, les pages sont réparties en nb_blocs blocs (par défaut un par cœur).
+    """
+    nb_pages = nombre_pages(contenu_pdf)
+    if executor is None or nb_pages < SEUIL_PAGES_POOL:
+        return _extraire_pages(contenu_pdf, range(nb_pages), ecart_colonnes)
+
+    nb_blocs = min(nb_pages, nb_blocs or os.cpu_count() or 1)
+    blocs = [pages.tolist() for pages in np.array_split(np.arange(nb_pages), nb_blocs)]
+    futures = [executor.submit(_extraire_pages, contenu_pdf, bloc, ecart_colonnes) for bloc in blocs]
+    rows = []
+    for future in futures:      # ordre des pages conservé
+        rows.extend(future.result())
+    return rows
@@ -0,0 +1,112 @@
+#
+# Journal d'exécution de la mise à jour
+#
+# Table journal_execution : une ligne par (exécution, étape, élément), l'exécution étant la date du jour.
+# Une mise à jour relancée le même jour (erreur réseau, exception yfinance, Ctrl-C) saute
+# immédiatement les éléments déjà terminés et ne retente que les autres.
+# Les échecs sont retentés avec une pause exponentielle (delai_initial, x2, x4, ...).
+#
+
+import sqlite3
+import time
+from datetime import datetime
+
+SQL_TABLE_JOURNAL = """
+CREATE TABLE IF NOT EXISTS journal_execution (
+    execution  TEXT NOT NULL,
+    etape      TEXT NOT NULL,
+    element    TEXT NOT NULL,
+    statut     TEXT NOT NULL,
+    debut      TEXT,
+    fin        TEXT,
+    duree      REAL,
+    tentatives INTEGER,
+    message    TEXT,
+    PRIMARY KEY (execution, etape, element)
+)
+"""
+
+class JournalExecution:
+    """Suivi par élément (action, indice) des étapes de la mise à jour, avec reprise et résumé"""
+
+    def __init__(self, conn, execution=None, max_tentatives=4, delai_initial=2.0):
+        self.conn = conn
+        self.execution = execution or datetime.now().date().isoformat()
+        self.max_tentatives = max_tentatives
+        self.delai_initial = delai_initial
+        self.compteurs = {}     # (etape, statut) -> [nombre, durée cumulée]
+        self.conn.execute(SQL_TABLE_JOURNAL)
+        self.conn.commit()
+
+    def termines(self, etape):
+        """Éléments de l'étape déjà terminés lors de cette exécution"""
+        cursor = self.conn.execute(
+            "SELECT element FROM journal_execution WHERE execution=? AND etape=? AND statut='ok'",
+            (self.execution, etape))
+        return {row[0] for row in cursor.fetchall()}
+
+    def _compter(self, etape, statut, duree=0.0):
+        compteur = self.compteurs.setdefault((etape, statut), [0, 0.0])
+        compteur[0] += 1
+        compteur[1] += duree
+
+    def enregistrer(self, etape, element, statut, debut=None, duree=0.0, tentatives=1, message=None):
+        """Écrit (ou remplace) l'état d'un élément, validé immédiatement"""
+        fin = datetime.now()
+        debut = debut or fin
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO journal_execution VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.execution, etape, element, statut, debut.isoformat(timespec='seconds'),
+                     fin.isoformat(timespec='seconds'), duree, tentatives, message))
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'écriture du journal: {e}")
+        self._compter(etape, statut, duree)
+
+    def sauter(self, etape, element):
+        """Élément déjà terminé : compté dans le résumé, rien n'est écrit"""
+        self._compter(etape, 'saute')
+
+    def executer(self, etape, element, fonction):
+        """
+        Exécute fonction() avec nouvelles tentatives (pause exponentielle) et enregistre le résultat.
+        Retourne la valeur de fonction(), ou None après max_tentatives échecs.
+        Un Ctrl-C est enregistré comme 'interrompu' puis propagé.
+        """
+        debut = datetime.now()
+        t0 = time.perf_counter()
+        for tentative in range(1, self.max_tentatives + 1):
+            try:
+                resultat = fonction()
+            except KeyboardInterrupt:
+                self.enregistrer(etape, element, 'interrompu', debut, time.perf_counter() - t0, tentative)
+                raise
+            except Exception as e:
+                if tentative < self.max_tentatives:
+                    delai = self.delai_initial * 2 ** (tentative - 1)
+                    print(f"  ⚠ {element}: {e} (nouvelle tentative dans {delai:.0f}s)")
+                    time.sleep(delai)
+                    continue
+                print(f"  ⚠ {element}: abandon après {tentative} tentatives: {e}")
+                self.enregistrer(etape, element, 'echec', debut, time.perf_counter() - t0, tentative, str(e))
+                return None
+            self.enregistrer(etape, element, 'ok', debut, time.perf_counter() - t0, tentative)
+            return resultat
+
+    def afficher_resume(self):
+        """Résumé par étape : éléments sautés, traités et en échec, avec les durées"""
+        etapes = sorted({etape for etape, _ in self.compteurs})
+        if not etapes:
+            return
+        print(f"\n{'Étape':<12} {'Sautés':>7} {'Traités':>8} {'Durée':>9} {'Échecs':>7} {'Durée':>9}")
+        for etape in etapes:
+            sautes  = self.compteurs.get((etape, 'saute'), [0, 0.0])
+            traites = self.compteurs.get((etape, 'ok'), [0, 0.0])
+            echecs  = self.compteurs.get((etape, 'echec'), [0, 0.0])
+            print(f"{etape:<12} {sautes[0]:>7} {traites[0]:>8} {traites[1]:>8.1f}s {echecs[0]:>7} {echecs[1]:>8.1f}s")
+        echecs = self.conn.execute(
+            "SELECT etape, element, statut, message FROM journal_execution WHERE execution=? AND statut != 'ok' ORDER BY etape, element",
+            (self.execution,)).fetchall()
+        for etape, element, statut, message in echecs:
+            print(f"  ⚠ {etape} {element}: {message or statut}")
@@ -0,0 +1,154 @@
+#
+# Livre des positions des backtests DCA (achats et ventes de chaque transaction)
+#
+# Le portefeuille était un DataFrame vide de sept colonnes, rempli ligne à ligne (portefeuille.loc[len(...)])
+# puis complété par .at lors des ventes : chaque ajout recopie le tableau, les colonnes de vente créées en
+# cours de route sont de type object et les dates, stockées en texte, sont relues avec strptime.
+#
+# Ici les transactions sont les lignes d'un tableau numpy structuré, préalloué (capacité doublée quand il est
+# plein), aux champs de taille fixe : float64, int32 et datetime64[D]. L'action est un code int32 dans la liste
+# des actions du livre. Les champs de vente valent NaN / NaT tant que la position n'est pas vendue.
+#   - moteurs en boucle : ajouter_achat() puis enregistrer_vente(), une transaction à la fois
+#   - moteur vectorisé  : ajouter_achats() et enregistrer_ventes(), un lot de tableaux par appel
+# en_dataframe() produit le portefeuille au format des scripts (dates en texte, colonnes de vente seulement
+# si une vente a eu lieu) pour l'affichage, les CSV et les métriques.
+#
+# Mémoire et temps d'ajout comparés au DataFrame : bench_livre_positions.py
+#
+
+import numpy as np
+import pandas as pd
+
+CHAMPS_ACHAT = [
+    ('action',                np.int32),
+    ('date_acquisition',      'datetime64[D]'),
+    ('prix_unitaire_achat',   np.float64),
+    ('quantite_actions',      np.int32),
+    ('frais_acquisition',     np.float64),
+    ('cout_acquisition_brut', np.float64),
+    ('cout_acquisition_net',  np.float64),
+]
+CHAMPS_VENTE = [
+    ('date_cession',          'datetime64[D]'),
+    ('prix_unitaire_vente',   np.float64),
+    ('frais_cession',         np.float64),
+    ('produit_cession_brut',  np.float64),
+    ('produit_cession_net',   np.float64),
+    ('plus_value_brute',      np.float64),
+    ('plus_value_nette',      np.float64),
+    ('duree_detention_mois',  np.float64),
+    ('performance_brute_%',   np.float64),
+    ('performance_net_%',     np.float64),
+]
+TYPE_POSITION = np.dtype(CHAMPS_ACHAT + CHAMPS_VENTE)
+
+# Champs de vente d'une position pas encore vendue
+_VENTE_VIDE = (np.datetime64('NaT', 'D'),) + (np.nan,) * (len(CHAMPS_VENTE) - 1)
+
+class LivrePositions:
+    """Transactions dans un tableau structuré préalloué"""
+
+    def __init__(self, capacite=1024):
+        self.actions = []
+        self._codes = {}
+        self._donnees = np.empty(capacite, dtype=TYPE_POSITION)
+        self._taille = 0
+        self.nb_ventes = 0
+
+    def __len__(self):
+        return self._taille
+
+    def _code(self, action):
+        code = self._codes.get(action)
+        if code is None:
+            code = self._codes[action] = len(self.actions)
+            self.actions.append(action)
+        return code
+
+    def _reserver(self, nb):
+        """Capacité pour nb positions de plus (doublée si besoin : ajout en temps amorti constant)"""
+        if self._taille + nb > len(self._donnees):
+            donnees = np.empty(max(2 * len(self._donnees), self._taille + nb), dtype=TYPE_POSITION)
+            donnees[:self._taille] = self._donnees[:self._taille]
+            self._donnees = donnees
+
+    def ajouter_achat(self, action, date_acquisition, prix_unitaire_achat, quantite_actions, frais_acquisition):
+        """Une position (moteurs en boucle). Retourne son indice"""
+        self._reserver(1)
+        i = self._taille
+        cout_brut = quantite_actions * prix_unitaire_achat
+        self._donnees[i] = (self._code(action), date_acquisition, prix_unitaire_achat, quantite_actions,
+                            frais_acquisition, cout_brut, cout_brut + frais_acquisition) + _VENTE_VIDE
+        self._taille += 1
+        return i
+
+    def ajouter_achats(self, actions, dates_acquisition, prix_unitaire_achat, quantites_actions, frais_acquisition):
+        """Un lot de positions (moteur vectorisé) : tableaux de même longueur. Retourne les indices"""
+        nb = len(actions)
+        self._reserver(nb)
+        lot = self._donnees[self._taille:self._taille + nb]
+        noms, inverse = np.unique(np.asarray(actions, dtype=object).astype(str), return_inverse=True)
+        lot['action']                = np.array([self._code(nom) for nom in noms], dtype=np.int32)[inverse]
+        lot['date_acquisition']      = dates_acquisition
+        lot['prix_unitaire_achat']   = prix_unitaire_achat
+        lot['quantite_actions']      = quantites_actions
+        lot['frais_acquisition']     = frais_acquisition
+        lot['cout_acquisition_brut'] = lot['quantite_actions'] * lot['prix_unitaire_achat']
+        lot['cout_acquisition_net']  = lot['cout_acquisition_brut'] + lot['frais_acquisition']
+        for champ, valeur in zip([nom for nom, _ in CHAMPS_VENTE], _VENTE_VIDE):
+            lot[champ] = valeur
+        indices = np.arange(self._taille, self._taille + nb)
+        self._taille += nb
+        return indices
+
+    def enregistrer_vente(self, i, date_cession, prix_unitaire_vente, frais_cession, duree_detention_mois):
+        """Vente de la position i (moteurs en boucle). Retourne la plus-value nette"""
+        achat = self._donnees[i].item()[:len(CHAMPS_ACHAT)]
+        quantite, cout_brut, cout_net = achat[3], achat[5], achat[6]
+        produit_brut = prix_unitaire_vente * quantite
+        produit_net  = produit_brut - frais_cession
+        plus_value_brute = produit_brut - cout_brut
+        plus_value_nette = produit_net - cout_net
+        self._donnees[i] = achat + (date_cession, prix_unitaire_vente, frais_cession, produit_brut, produit_net,
+                                    plus_value_brute, plus_value_nette, duree_detention_mois,
+                                    plus_value_brute / cout_brut * 100, plus_value_nette / cout_net * 100)
+        self.nb_ventes += 1
+        return plus_value_nette
+
+    def enregistrer_ventes(self, indices, dates_cession, prix_unitaire_vente, frais_cession, durees_detention_mois):
+        """Ventes d'un lot de positions (moteur vectorisé). Retourne les plus-values nettes"""
+        positions = self._donnees[indices]
+        positions['date_cession']         = dates_cession
+        positions['prix_unitaire_vente']  = prix_unitaire_vente
+        positions['frais_cession']        = frais_cession
+        positions['produit_cession_brut'] = positions['prix_unitaire_vente'] * positions['quantite_actions']
+        positions['produit_cession_net']  = positions['produit_cession_brut'] - positions['frais_cession']
+        positions['plus_value_brute']     = positions['produit_cession_brut'] - positions['cout_acquisition_brut']
+        positions['plus_value_nette']     = positions['produit_cession_net'] - positions['cout_acquisition_net']
+        positions['duree_detention_mois'] = durees_detention_mois
+        positions['performance_brute_%']  = positions['plus_value_brute'] / positions['cout_acquisition_brut'] * 100
+        positions['performance_net_%']    = positions['plus_value_nette'] / positions['cout_acquisition_net'] * 100
+        self._donnees[indices] = positions
+        self.nb_ventes += len(positions)
+        return positions['plus_value_nette']
+
+    def positions(self):
+        """Vue sur les positions enregistrées (tableau structuré, sans copie)"""
+        return self._donnees[:self._taille]
+
+    def noms_actions(self):
+        """Nom de l'action de chaque position"""
+        return np.array(self.actions, dtype=object)[self.positions()['action']] if self.actions else np.array([], dtype=object)
+
+    def en_dataframe(self, index=None):
+        """Portefeuille au format des scripts : dates en texte 'AAAA-MM-JJ', colonnes de vente après la première vente"""
+        positions = self.positions()
+        colonnes = {'action': self.noms_actions().astype(str)}
+        for nom, _ in CHAMPS_ACHAT[1:] + (CHAMPS_VENTE if self.nb_ventes else []):
+            valeurs = positions[nom]
+            if valeurs.dtype.kind == 'M':
+                texte = np.datetime_as_string(valeurs, unit='D').astype(object)
+                texte[np.isnat(valeurs)] = np.nan
+                valeurs = texte
+            colonnes[nom] = valeurs
+        return pd.DataFrame(colonnes, index=index)
@@ -1,11 +1,25 @@
 import pdfplumber
 import yfinance as yf
-import requests
 from io import BytesIO
 import pandas as pd
+import numpy as np
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from extracteur_pdf import VERSION_EXTRACTEUR, extraire_composition
+from telechargement import CachePDF, telecharger_indices, afficher_temps
+from telechargement_cours import telecharger_par_lots
+from schema_v2 import derniere_seance, supprimer_seance_du_jour
+from chargement_sqlite import configurer_connexion, inserer_actions_en_masse, lignes_actions, lignes_composition
+from cache_resultats import mettre_a_jour_versions
+from classement_volume import mettre_a_jour_classement
+from cube_prix import mettre_a_jour_cube
+from journal import JournalExecution
+import symboles
 
 def create_connection(db_file):
     """Crée une connexion à la base de données SQLite"""
@@ -84,40 +98,30 @@ def insert_composition_indice(conn, data):
         return 0
 
 def insert_actions(conn, data):
-    """Insère les données dans la table en évitant les doublons"""
-    insert_sql = """
-    INSERT OR IGNORE INTO actions
-    (date, Open, High, Low, Close, Volume, Dividends, [Stock Splits], action)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """
-    try:
-        cursor = conn.cursor()
-        cursor.executemany(insert_sql, data)
-        conn.commit()
-        return cursor.rowcount
-    except sqlite3.Error as e:
-        print(f"Erreur lors de l'insertion: {e}")
-        return 0
+    """Insère les données dans la table en évitant les doublons (une transaction par lot de lignes)"""
+    return inserer_actions_en_masse(conn, data)
 
-def extract_euronext_from_pdf(url_pdf,conn):
-    # Date du jour
-    current_date = datetime.now().date()
-    nom_indice = url_pdf.split("/")[-1].replace(".pdf", "").replace("_Index_Composition", "")
+def nom_indice_depuis_url(url_pdf):
+    """Nom de l'indice à partir de l'url du PDF (ex: CAC_40)"""
+    return url_pdf.split("/")[-1].replace(".pdf", "").replace("_Index_Composition", "")
 
+def composition_deja_presente(conn, nom_indice, current_date):
+    """Vérifie si la composition de l'indice a déjà été enregistrée à cette date"""
     try:
         cursor = conn.cursor()
         cursor.execute("select COUNT(*) from cac40_composition where date_maj=? and nom_indice=?", (current_date, nom_indice))
         count_existing = cursor.fetchone()[0]   
         if count_existing > 0:
             print(f"Données déjà présentes pour la date {current_date} et l'indice {nom_indice}, saut de l'insertion.")
-            return 0    
+            return True
     except sqlite3.Error as e:
         print(f"Erreur lors de l'insertion: {e}")
-        return 0    
-        
-    # Téléchargement et extraction PDF
-    response = requests.get(url_pdf)
-    pdf_file = BytesIO(response.content)
+        return True
+    return False
+
+def parser_composition_pdf(contenu_pdf):
+    """Extrait les lignes à 4 colonnes (Company, MNEMO, Sector, Weight) du PDF de composition"""
+    pdf_file = BytesIO(contenu_pdf)
     rows = []
     
     with pdfplumber.open(pdf_file) as pdf:
@@ -151,184 +155,395 @@ def extract_euronext_from_pdf(url_pdf,conn):
                 # Garde uniquement les lignes avec exactement 4 colonnes
                 if len(columns) == 4:
                     rows.append(columns)
-    
+    return rows
+
+def stocker_composition(conn, rows, nom_indice, current_date):
+    """Prépare les lignes extraites du PDF (tickers Yahoo) et les insère dans cac40_composition"""
     # Préparer les données pour SQLite
     columns = ["Company", "MNEMO", "Sector (ICB)", "Weight (%)"]
     df_data = pd.DataFrame(rows, columns=columns)
     df_data['Weight (%)'] = df_data['Weight (%)'].str.replace(',', '.').str.replace('%', '').astype(float)
 
-    # Corrections bug ticker Yahoo
-    # 'APAM.PA' , 'SOLB.PA', 'TOUP.PA')
-    # 'TOUP.PA'  -> 'ALTOU.PA'
-    # 'SOLB.PA'  -> 'SOLB.BR'
-    # 'APAM.PA'  -> 'APAM.AS'
-
-    df_data['ticker_yahoo'] = df_data['MNEMO'] + ".PA"
-    df_data['ticker_yahoo'] = df_data['ticker_yahoo'].replace('TOUP.PA', 'ALTOU.PA')
-    df_data['MNEMO'] = df_data['MNEMO'].replace('TOUP', 'ALTOU')
-    df_data['ticker_yahoo'] = df_data['ticker_yahoo'].replace('SOLB.PA', 'SOLB.BR')
-    df_data['ticker_yahoo'] = df_data['ticker_yahoo'].replace('APAM.PA', 'APAM.AS')
-    df_data['ticker_yahoo'] = df_data['ticker_yahoo'].replace('MT.PA', 'MT.AS')
-    df_data['ticker_yahoo'] = df_data['ticker_yahoo'].replace('CGM.PA', 'ALCGM.PA')
+    # Ticker Yahoo : table symboles_yahoo (corrections connues, MNEMO.PA par défaut), voir symboles.py
+    # Résolu sur le MNEMO du PDF, stocké tel quel : c'est la clé de la vue composition_yahoo
+    # (les photos antérieures stockaient ALTOU pour TOUP : ALTOU.PA par défaut, le même ticker)
+    correspondances = symboles.resoudre(conn, df_data['MNEMO'])
+    df_data['ticker_yahoo'] = df_data['MNEMO'].map(correspondances)
     df_data['Nom Indice'] = nom_indice
        
     # Préparer les données pour l'insertion
-    data_to_insert = []
-    for _, row in df_data.iterrows():
-        data_to_insert.append((
-            current_date,
-            row['Company'],
-            row['MNEMO'],
-            row['Sector (ICB)'],
-            row['Weight (%)'],
-            row['ticker_yahoo'],
-            row['Nom Indice']
-            ))
+    data_to_insert = lignes_composition(df_data, current_date)
         
     # Insérer les données
     inserted_count = insert_composition_indice(conn, data_to_insert)
     print(f"{inserted_count} nouvelles lignes insérées pour la date {current_date}")
-    
-    # Sauvegarder en CSV
-    # filename = url_pdf.split("/")[-1]
-    # output_csv = filename.replace(".pdf", ".csv")
-    # df_data.to_csv(output_csv, index=False, sep=';')
-    # print(f"Données sauvegardées dans {output_csv}")
+    return inserted_count
 
-    time.sleep(2)  # Pause pour éviter les surcharges de requêtes et le blocage par Euronext
+def extract_euronext_concurrent(urls_pdf, conn, limiteur=None, cache=None, journal=None):
+    """
+    Télécharge et analyse tous les PDF en parallèle (limiteur de débit par hôte au lieu des pauses fixes),
+    puis insère chaque composition dès qu'elle est prête. Affiche les temps par indice.
+    Avec un CachePDF, un PDF inchangé n'est ni retéléchargé ni réanalysé.
+    Les indices en erreur sont retentés avec une pause exponentielle et notés dans le journal.
+    """
+    journal = journal or JournalExecution(conn)
+    current_date = datetime.now().date()
+    termines = journal.termines('composition')
+    urls_a_traiter = []
+    for url in urls_pdf:
+        nom_indice = nom_indice_depuis_url(url)
+        if nom_indice in termines or composition_deja_presente(conn, nom_indice, current_date):
+            journal.sauter('composition', nom_indice)
+        else:
+            urls_a_traiter.append(url)
+    if not urls_a_traiter:
+        return {}
+
+    temps_par_indice = {}
+    # Les pages des PDF sont analysées dans un pool de processus (extracteur_pdf.py)
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as pool:
+        parser = partial(extraire_composition, executor=pool)
+        for tentative in range(1, journal.max_tentatives + 1):
+            urls_en_echec = []
+            for url, rows, temps, erreur in telecharger_indices(urls_a_traiter, parser, limiteur, cache=cache):
+                nom_indice = nom_indice_depuis_url(url)
+                if erreur is not None:
+                    print(f"  ⚠ {nom_indice}: Erreur lors du téléchargement ou de l'analyse: {erreur}")
+                    if tentative < journal.max_tentatives:
+                        urls_en_echec.append(url)
+                    else:
+                        journal.enregistrer('composition', nom_indice, 'echec', duree=temps.get('total', 0),
+                                            tentatives=tentative, message=str(erreur))
+                    continue
+                t0 = time.perf_counter()
+                stocker_composition(conn, rows, nom_indice, current_date)
+                temps['insertion'] = time.perf_counter() - t0
+                temps_par_indice[nom_indice] = temps
+                journal.enregistrer('composition', nom_indice, 'ok', duree=temps.get('total', 0) + temps['insertion'],
+                                    tentatives=tentative, message=temps.get('statut'))
+            if not urls_en_echec:
+                break
+            delai = journal.delai_initial * 2 ** (tentative - 1)
+            print(f"Nouvelle tentative pour {len(urls_en_echec)} indice(s) dans {delai:.0f}s")
+            time.sleep(delai)
+            urls_a_traiter = urls_en_echec
 
-def extract_and_store_actions(conn):
+    afficher_temps(temps_par_indice)
+    return temps_par_indice
+
+# Estimation de la taille d'une ligne journalière dans la réponse JSON de Yahoo :
+# horodatage + Open/High/Low/Close/Adj Close/Volume, soit 7 valeurs d'environ 15 caractères
+OCTETS_PAR_LIGNE_YAHOO = 7 * 15
+
+def fenetre_manquante(last_date, aujourdhui):
+    """Fenêtre exacte [last_date+1, aujourdhui) à télécharger (aujourdhui exclu car la séance est incomplète)"""
+    debut = datetime.strptime(last_date, '%Y-%m-%d').date() + timedelta(days=1)
+    return debut, aujourdhui
+
+def periode_yfinance(ecart_jours):
+    """
+    Ancienne conversion de l'écart en période yfinance, conservée pour mesurer le volume évité.
+    Retourne (période, nombre de séances, nombre de jours calendaires) ; 'max' n'a pas de borne.
+    """
+    # ['1d', '5d', '7d', '60d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+    if ecart_jours == 1:
+        return "1d", 1, None
+    elif ecart_jours <=5:
+        return "5d", 5, None
+    elif ecart_jours <=7:
+        return "7d", 7, None
+    elif ecart_jours <=30:
+        return "1mo", None, 30
+    elif ecart_jours <=60:
+        return "60d", None, 60
+    elif ecart_jours <=180:
+        return "6mo", None, 182
+    elif ecart_jours <=365:
+        return "1y", None, 365
+    return "max", None, None
+
+def lignes_evitees(cursor, action, last_date, aujourdhui, nb_lignes_recues):
+    """Estime le nombre de lignes que l'ancienne période yfinance aurait retéléchargées en plus"""
+    ecart_jour_maj = (aujourdhui - datetime.strptime(last_date, '%Y-%m-%d').date()).days
+    period, nb_seances, nb_jours = periode_yfinance(ecart_jour_maj)
+    if nb_seances is not None:
+        lignes_periode = nb_seances
+    elif nb_jours is not None:
+        # Jours ouvrés de la période, séance du jour comprise
+        lignes_periode = int(np.busday_count(aujourdhui - timedelta(days=nb_jours), aujourdhui + timedelta(days=1)))
+    else:
+        # 'max' : tout l'historique déjà en base était retéléchargé
+        cursor.execute("SELECT count(*) FROM actions WHERE action=?", (action,))
+        lignes_periode = cursor.fetchone()[0] + nb_lignes_recues
+    return max(0, lignes_periode - nb_lignes_recues)
+
+def telecharger_et_inserer(conn, action_cherchee, fenetre):
+    """Télécharge la fenêtre (debut, fin) d'une action, ou tout l'historique si fenetre est None, et l'insère"""
+    ticker = yf.Ticker(action_cherchee)
+    if fenetre is None:
+        historical_data = ticker.history(period="max", interval="1d")
+    else:
+        historical_data = ticker.history(start=fenetre[0], end=fenetre[1], interval="1d")
+
+    # Préparer les données pour l'insertion
+    data_to_insert = lignes_actions(historical_data, action_cherchee)
+    # Insérer les données
+    inserted_count = insert_actions(conn, data_to_insert)
+    print(f"{inserted_count} nouvelles lignes insérées pour l'action {action_cherchee}")
+    return historical_data
+
+def extract_and_store_actions(conn, journal=None):
+    journal = journal or JournalExecution(conn)
+    aujourdhui = datetime.now().date()
+    total_lignes_recues  = 0
+    total_lignes_evitees = 0
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT ticker_yahoo FROM cac40_composition where weight_percent>=0 group by ticker_yahoo order by ticker_yahoo")
+        cursor.execute(f"SELECT ticker_yahoo FROM {symboles.table_composition(conn)} where weight_percent>=0 group by ticker_yahoo order by ticker_yahoo")
         list_actions = cursor.fetchall()
+        termines = journal.termines('cours')
+        a_eviter = symboles.symboles_a_eviter(conn)
+        evites, nouveaux_sans_donnees = set(), set()
         for action in list_actions:
             action_cherchee=action[0]
-            ticker = yf.Ticker(action_cherchee)
-            # ['1d', '5d', '7d', '60d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
-            cursor.execute("SELECT max(date) FROM actions WHERE action=?", (action_cherchee,))
-            last_date = cursor.fetchone()[0]
+            if action_cherchee in termines:
+                # Déjà traitée lors d'un lancement précédent aujourd'hui : ni requête ni pause
+                journal.sauter('cours', action_cherchee)
+                continue
+            last_date = derniere_seance(conn, action_cherchee)
+            if last_date is None and action_cherchee in a_eviter:
+                # Symbole sans données lors d'un essai récent (cache négatif) : pas de requête
+                evites.add(action_cherchee)
+                journal.sauter('cours', action_cherchee)
+                continue
             if last_date is not None:
-                ecart_jour_maj = datetime.now().date()-datetime.strptime(last_date, '%Y-%m-%d').date()
-                if ecart_jour_maj.days == 1:
-                    period="1d"
-                elif ecart_jour_maj.days <=5:
-                    period="5d"
-                elif ecart_jour_maj.days <=7:
-                    period="7d"
-                elif ecart_jour_maj.days <=30:
-                    period="1mo"
-                elif ecart_jour_maj.days <=60:
-                    period="60d"
-                elif ecart_jour_maj.days <=180:
-                    period="6mo"
-                elif ecart_jour_maj.days <=365:
-                    period="1y"
-                else:
-                    period="max"
+                # Téléchargement de la fenêtre exacte manquante au lieu d'une période approchée
+                fenetre = fenetre_manquante(last_date, aujourdhui)
+                if fenetre[0] >= fenetre[1] or np.busday_count(*fenetre) == 0:
+                    # Aucun jour ouvré manquant (déjà à jour, week-end) : pas de requête
+                    total_lignes_evitees += lignes_evitees(cursor, action_cherchee, last_date, aujourdhui, 0)
+                    journal.enregistrer('cours', action_cherchee, 'ok', message="à jour")
+                    continue
             else:
-                period="max"
                 print(f"Aucune donnée existante pour {action_cherchee}, extraction complète.")
-            historical_data = ticker.history(period=period, interval="1d")
-            historical_data['action'] = action_cherchee
- 
-            # Préparer les données pour l'insertion
-            data_to_insert = []
-            for id, row in historical_data.iterrows():
-                data_to_insert.append((
-                    id.date(),
-                    row['Open'],
-                    row['High'],
-                    row['Low'],
-                    row['Close'],
-                    row['Volume'],
-                    row['Dividends'],
-                    row['Stock Splits'],
-                    row['action']
-                    ))
-            # Insérer les données
-            inserted_count = insert_actions(conn, data_to_insert)
-            print(f"{inserted_count} nouvelles lignes insérées pour l'action {action_cherchee}")
+                fenetre = None
+
+            historical_data = journal.executer('cours', action_cherchee,
+                                               partial(telecharger_et_inserer, conn, action_cherchee, fenetre))
+            if historical_data is None:
+                continue
+            if last_date is not None:
+                total_lignes_evitees += lignes_evitees(cursor, action_cherchee, last_date, aujourdhui, len(historical_data))
+            elif historical_data.empty:
+                if symboles.noter_sans_donnees(conn, action_cherchee):
+                    nouveaux_sans_donnees.add(action_cherchee)
+            else:
+                symboles.noter_resolu(conn, action_cherchee)
+            total_lignes_recues += len(historical_data)
             time.sleep(2)       # Pause pour éviter les surcharges de requêtes
         
         # Supprimer les données du jour qui sont être incomplètes
-        cursor.execute("DELETE FROM actions WHERE date >= date()")
+        supprimer_seance_du_jour(conn)
         conn.commit()
+        symboles.afficher_non_resolus(nouveaux_sans_donnees, evites)
     except sqlite3.Error as e:
         print(f"Erreur lors de l'insertion: {e}")    
 
-db_file="cac40_data.db"
-conn = create_connection(db_file)
-if conn is not None:
-    create_table(conn)
-
-# 1️⃣ CAC 40
-# Composition : 40 plus grandes entreprises françaises cotées à Paris, en termes de capitalisation flottante et de liquidité.
-# Exemples : LVMH, TotalEnergies, Sanofi, Airbus, BNP Paribas…
-# Utilité :
-#   Baromètre principal de l’économie française.
-#   Référence pour les investisseurs institutionnels.
-# Sert de base à de nombreux ETF et produits dérivés.
-# Type d’entreprises : Grandes capitalisations (large caps).
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_40_Index_Composition.pdf",conn)
-
-# 2️⃣ CAC Next 20
-# Composition : 20 sociétés qui viennent juste après le CAC 40, souvent les "candidates" potentielles à y entrer.
-# Exemples : Eurazeo, Euronext, Ubisoft, Ipsen…
-# Utilité :
-#   Indicateur des entreprises en forte croissance ou en voie d’entrer dans le CAC 40.
-#   Sert à suivre les valeurs montantes du marché français.
-# Type d’entreprises : Moyennes à grandes capitalisations (mid caps).
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Next_20_Index_Composition.pdf",conn)
-
-# 3️⃣ CAC Mid 60
-# Composition : 60 sociétés de taille intermédiaire.
-# Exemples : Elis, Orpea, Soitec, Virbac…
-# Utilité :
-#   Reflète la performance des ETI (entreprises de taille intermédiaire) françaises.
-#   Souvent plus dynamiques mais plus volatiles que les grandes entreprises.
-# Type d’entreprises : Mid caps.
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Mid_60_Index_Composition.pdf",conn)
-
-# 4️⃣ CAC Small
-# Composition : Environ 80 à 100 petites capitalisations.
-# Utilité :
-#   Met en avant les PME cotées.
-#   Sert aux investisseurs cherchant de la croissance à long terme, avec plus de risque.
-# Type d’entreprises : Small caps.
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Small_Index_Composition.pdf",conn)
-
-# 5️⃣ CAC Mid & Small
-# Composition : Combine les entreprises du CAC Mid 60 et du CAC Small.
-# Utilité :
-#   Représente globalement le segment des valeurs moyennes et petites.
-#   Référence utilisée par les fonds spécialisés dans les mid/small caps.
-# Type d’entreprises : Mid & Small caps.
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Mid_and_Small_Index_Composition.pdf",conn)
-
-# 6️⃣ SBF 120
-# Composition : CAC 40 + CAC Next 20 + CAC Mid 60 (donc 120 valeurs).
-# Utilité :
-#   Indice de référence élargi pour le marché français.
-#   Permet une vision plus complète de l’économie française cotée.
-# Type d’entreprises : Large, mid et small caps.
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/SBF_120_Index_Composition.pdf",conn)
-
-# 7️⃣ CAC All-Tradable
-# Composition : Toutes les entreprises éligibles à un indice CAC (plus de 300).
-# Utilité :
-#   Donne la vision globale de la performance du marché parisien.
-#   Sert souvent à construire d’autres indices thématiques.
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_All-Tradable_Index_Composition.pdf",conn)
-
-# 8️⃣ CAC Large 60
-# Composition : 60 plus grandes capitalisations parmi les entreprises éligibles au CAC.
-# Utilité :
-#   Benchmark, ETF, mesure de la tendance “grandes valeurs”
-# Type d’entreprises : Grandes capitalisations (Large Caps)
-extract_euronext_from_pdf("https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Large_60_Index_Composition.pdf",conn)
-
-extract_and_store_actions(conn)
-
-conn.close()
-print(f"Extraction terminée")
+    print(f"Lignes téléchargées : {total_lignes_recues}")
+    print(f"Lignes évitées par rapport aux périodes yfinance : {total_lignes_evitees} "
+          f"(~{total_lignes_evitees * OCTETS_PAR_LIGNE_YAHOO / 1024:.1f} Ko estimés)")
+
+def extract_and_store_actions_par_lots(conn, db_file, taille_lot=50, nb_workers=4, journal=None):
+    """
+    Variante par lots de extract_and_store_actions : les actions ayant la même fenêtre manquante
+    sont téléchargées ensemble par un pool de threads, un seul thread écrit dans la base.
+    Les actions des lots en échec sont retéléchargées avec une pause exponentielle.
+    """
+    journal = journal or JournalExecution(conn)
+    aujourdhui = datetime.now().date()
+    total_lignes_evitees = 0
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT ticker_yahoo FROM {symboles.table_composition(conn)} where weight_percent>=0 group by ticker_yahoo order by ticker_yahoo")
+        list_actions = [row[0] for row in cursor.fetchall()]
+        termines = journal.termines('cours')
+        a_eviter = symboles.symboles_a_eviter(conn)
+
+        fenetres     = {}
+        derniere_date = {}
+        evites = set()
+        for action_cherchee in list_actions:
+            if action_cherchee in termines:
+                journal.sauter('cours', action_cherchee)
+                continue
+            last_date = derniere_seance(conn, action_cherchee)
+            if last_date is None and action_cherchee in a_eviter:
+                evites.add(action_cherchee)
+                journal.sauter('cours', action_cherchee)
+                continue
+            if last_date is None:
+                print(f"Aucune donnée existante pour {action_cherchee}, extraction complète.")
+                fenetres[action_cherchee] = None
+                continue
+            debut, fin = fenetre_manquante(last_date, aujourdhui)
+            if debut >= fin or np.busday_count(debut, fin) == 0:
+                total_lignes_evitees += lignes_evitees(cursor, action_cherchee, last_date, aujourdhui, 0)
+                journal.enregistrer('cours', action_cherchee, 'ok', message="à jour")
+                continue
+            fenetres[action_cherchee]     = (debut, fin)
+            derniere_date[action_cherchee] = last_date
+        conn.commit()   # Aucune transaction ouverte pendant que le thread d'écriture travaille
+
+        lignes_recues, inserted_count = {}, 0
+        a_telecharger = fenetres
+        for tentative in range(1, journal.max_tentatives + 1):
+            debut_lots = datetime.now()
+            t0 = time.perf_counter()
+            recues, inserees, actions_en_echec = telecharger_par_lots(a_telecharger, db_file, insert_actions, taille_lot, nb_workers)
+            lignes_recues.update(recues)
+            inserted_count += inserees
+            # Durée du passage répartie entre les actions téléchargées ensemble
+            duree = (time.perf_counter() - t0) / max(1, len(a_telecharger))
+            for action_cherchee in a_telecharger:
+                if action_cherchee not in actions_en_echec:
+                    journal.enregistrer('cours', action_cherchee, 'ok', debut_lots, duree, tentative,
+                                        f"{recues.get(action_cherchee, 0)} lignes")
+                elif tentative == journal.max_tentatives:
+                    journal.enregistrer('cours', action_cherchee, 'echec', debut_lots, duree, tentative, "lot en échec")
+            if not actions_en_echec or tentative == journal.max_tentatives:
+                break
+            delai = journal.delai_initial * 2 ** (tentative - 1)
+            print(f"Nouvelle tentative pour {len(actions_en_echec)} action(s) dans {delai:.0f}s")
+            time.sleep(delai)
+            a_telecharger = {action: fenetres[action] for action in actions_en_echec}
+        for action_cherchee, last_date in derniere_date.items():
+            total_lignes_evitees += lignes_evitees(cursor, action_cherchee, last_date, aujourdhui, lignes_recues.get(action_cherchee, 0))
+        if actions_en_echec:
+            print(f"  ⚠ Actions non téléchargées: {actions_en_echec}")
+
+        # Cache négatif : actions sans historique en base pour lesquelles Yahoo a répondu sans aucune ligne.
+        # Un lot vide est une réponse (telechargement_cours.py) : seules les actions jamais reçues (lot en erreur) sont ignorées.
+        nouveaux_sans_donnees = set()
+        for action_cherchee, fenetre in fenetres.items():
+            if fenetre is not None or action_cherchee not in lignes_recues:
+                continue
+            if lignes_recues.get(action_cherchee, 0) == 0:
+                if symboles.noter_sans_donnees(conn, action_cherchee):
+                    nouveaux_sans_donnees.add(action_cherchee)
+            else:
+                symboles.noter_resolu(conn, action_cherchee)
+        symboles.afficher_non_resolus(nouveaux_sans_donnees, evites)
+
+        # Supprimer les données du jour qui sont être incomplètes
+        supprimer_seance_du_jour(conn)
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Erreur lors de l'insertion: {e}")
+        return
+
+    print(f"Lignes téléchargées : {sum(lignes_recues.values())} ({inserted_count} insérées)")
+    print(f"Lignes évitées par rapport aux périodes yfinance : {total_lignes_evitees} "
+          f"(~{total_lignes_evitees * OCTETS_PAR_LIGNE_YAHOO / 1024:.1f} Ko estimés)")
+
+# Indices dont la composition est récupérée sur le site Euronext
+INDICES_EURONEXT = [
+    # 1️⃣ CAC 40
+    # Composition : 40 plus grandes entreprises françaises cotées à Paris, en termes de capitalisation flottante et de liquidité.
+    # Exemples : LVMH, TotalEnergies, Sanofi, Airbus, BNP Paribas…
+    # Utilité :
+    #   Baromètre principal de l’économie française.
+    #   Référence pour les investisseurs institutionnels.
+    # Sert de base à de nombreux ETF et produits dérivés.
+    # Type d’entreprises : Grandes capitalisations (large caps).
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_40_Index_Composition.pdf",
+
+    # 2️⃣ CAC Next 20
+    # Composition : 20 sociétés qui viennent juste après le CAC 40, souvent les "candidates" potentielles à y entrer.
+    # Exemples : Eurazeo, Euronext, Ubisoft, Ipsen…
+    # Utilité :
+    #   Indicateur des entreprises en forte croissance ou en voie d’entrer dans le CAC 40.
+    #   Sert à suivre les valeurs montantes du marché français.
+    # Type d’entreprises : Moyennes à grandes capitalisations (mid caps).
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Next_20_Index_Composition.pdf",
+
+    # 3️⃣ CAC Mid 60
+    # Composition : 60 sociétés de taille intermédiaire.
+    # Exemples : Elis, Orpea, Soitec, Virbac…
+    # Utilité :
+    #   Reflète la performance des ETI (entreprises de taille intermédiaire) françaises.
+    #   Souvent plus dynamiques mais plus volatiles que les grandes entreprises.
+    # Type d’entreprises : Mid caps.
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Mid_60_Index_Composition.pdf",
+
+    # 4️⃣ CAC Small
+    # Composition : Environ 80 à 100 petites capitalisations.
+    # Utilité :
+    #   Met en avant les PME cotées.
+    #   Sert aux investisseurs cherchant de la croissance à long terme, avec plus de risque.
+    # Type d’entreprises : Small caps.
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Small_Index_Composition.pdf",
+
+    # 5️⃣ CAC Mid & Small
+    # Composition : Combine les entreprises du CAC Mid 60 et du CAC Small.
+    # Utilité :
+    #   Représente globalement le segment des valeurs moyennes et petites.
+    #   Référence utilisée par les fonds spécialisés dans les mid/small caps.
+    # Type d’entreprises : Mid & Small caps.
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Mid_and_Small_Index_Composition.pdf",
+
+    # 6️⃣ SBF 120
+    # Composition : CAC 40 + CAC Next 20 + CAC Mid 60 (donc 120 valeurs).
+    # Utilité :
+    #   Indice de référence élargi pour le marché français.
+    #   Permet une vision plus complète de l’économie française cotée.
+    # Type d’entreprises : Large, mid et small caps.
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/SBF_120_Index_Composition.pdf",
+
+    # 7️⃣ CAC All-Tradable
+    # Composition : Toutes les entreprises éligibles à un indice CAC (plus de 300).
+    # Utilité :
+    #   Donne la vision globale de la performance du marché parisien.
+    #   Sert souvent à construire d’autres indices thématiques.
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_All-Tradable_Index_Composition.pdf",
+
+    # 8️⃣ CAC Large 60
+    # Composition : 60 plus grandes capitalisations parmi les entreprises éligibles au CAC.
+    # Utilité :
+    #   Benchmark, ETF, mesure de la tendance “grandes valeurs”
+    # Type d’entreprises : Grandes capitalisations (Large Caps)
+    "https://live.euronext.com/sites/default/files/documentation/index-composition/CAC_Large_60_Index_Composition.pdf",
+]
+
+if __name__ == "__main__":
+    db_file="cac40_data.db"
+    conn = create_connection(db_file)
+    if conn is not None:
+        configurer_connexion(conn)
+        create_table(conn)
+
+    # Journal de l'exécution du jour : une mise à jour relancée reprend là où elle s'était arrêtée
+    journal = JournalExecution(conn)
+    try:
+        extract_euronext_concurrent(INDICES_EURONEXT, conn, cache=CachePDF("cache_pdf", VERSION_EXTRACTEUR), journal=journal)
+
+        # "lots" : téléchargement groupé multi-actions, "sequentiel" : une action après l'autre
+        mode_telechargement = "lots"
+        if mode_telechargement == "lots":
+            extract_and_store_actions_par_lots(conn, db_file, journal=journal)
+        else:
+            extract_and_store_actions(conn, journal=journal)
+    finally:
+        journal.afficher_resume()
+
+    # Cache en colonnes (memory-mapped) pour les backtests
+    mettre_a_jour_cube(conn, "cube_prix")
+
+    # Classement mensuel des volumes pour la sélection de dca_v0.1.py
+    mettre_a_jour_classement(conn)
+
+    # Versions des cours par action : les résultats de backtest en cache des actions modifiées sont recalculés
+    nb_modifiees = mettre_a_jour_versions(conn)
+    print(f"Versions des données : {nb_modifiees} action(s) modifiée(s)")
+
+    conn.close()
+    print(f"Extraction terminée")
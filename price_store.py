@@ -0,0 +1,118 @@
+#
+# PriceStore : cours des actions en mémoire pour les backtests
+#
+# Chaque action est lue une seule fois (une requête) dans des tableaux triés par date :
+# dates, Open, Close. Les recherches « premier jour de cotation à partir de X », « dernier cours
+# disponible » et « cours à une date » se font par recherche dichotomique (np.searchsorted)
+# au lieu d'une requête SQL par jour testé.
+#
+# Le prix retourné est, comme dans les scripts DCA, le cours moyen (Open+Close)/2.
+#
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from schema_v2 import colonne_tri
+
+class SerieCours:
+    """Historique d'une action : toutes les dates, et les séances utilisables (Open renseigné si open_requis)"""
+
+    def __init__(self, dates_str, opens, closes, open_requis):
+        self.dates = np.array(dates_str, dtype='datetime64[D]')
+        valides = ~np.isnan(opens) if open_requis else np.ones(len(dates_str), dtype=bool)
+        self.dates_valides = self.dates[valides]
+        self.dates_str = [d for d, v in zip(dates_str, valides) if v]
+        self.prix = ((opens + closes) / 2)[valides]
+
+    def cours(self, i):
+        return self.dates_str[i], float(self.prix[i])
+
+class PriceStore:
+    """
+    Cache en mémoire des cours (date, (Open+Close)/2) par action, lu depuis la table actions.
+    open_requis=True ignore les séances dont l'Open est vide (comportement de dca_v0.1).
+    """
+
+    def __init__(self, conn, open_requis=False):
+        self.conn = conn
+        self.open_requis = open_requis
+        self.series = {}
+
+    def charger(self, actions):
+        """Précharge plusieurs actions en une seule requête"""
+        actions = [action for action in dict.fromkeys(actions) if action not in self.series]
+        if not actions:
+            return
+        rows = self.conn.execute(
+            f"SELECT action, date, Open, Close FROM actions WHERE action IN ({','.join('?' * len(actions))}) "
+            f"ORDER BY action, {colonne_tri(self.conn)}",
+            actions).fetchall()
+        par_action = {action: [] for action in actions}
+        for action, date_str, prix_open, prix_close in rows:
+            par_action[action].append((date_str, prix_open, prix_close))
+        for action, lignes in par_action.items():
+            self.series[action] = self._serie(lignes)
+
+    def _serie(self, lignes):
+        dates_str = [ligne[0] for ligne in lignes]
+        opens  = np.array([ligne[1] for ligne in lignes], dtype=float)    # None -> NaN
+        closes = np.array([ligne[2] for ligne in lignes], dtype=float)
+        return SerieCours(dates_str, opens, closes, self.open_requis)
+
+    def serie(self, action):
+        if action not in self.series:
+            self.charger([action])
+        return self.series[action]
+
+    def premiere_date(self, action):
+        dates = self.serie(action).dates
+        return dates[0] if len(dates) else None
+
+    def derniere_date(self, action):
+        dates = self.serie(action).dates
+        return dates[-1] if len(dates) else None
+
+    def cours_a_date(self, action, date):
+        """(date, prix) de la séance à cette date, None si pas de cotation ce jour-là"""
+        serie = self.serie(action)
+        jour = np.datetime64(date, 'D')
+        i = np.searchsorted(serie.dates_valides, jour)
+        if i < len(serie.dates_valides) and serie.dates_valides[i] == jour:
+            return serie.cours(i)
+        return None
+
+    def premier_cours_a_partir_de(self, action, date, nb_jours=None):
+        """(date, prix) de la première séance à partir de date (dans les nb_jours jours calendaires si précisé)"""
+        serie = self.serie(action)
+        jour = np.datetime64(date, 'D')
+        i = np.searchsorted(serie.dates_valides, jour)
+        if i == len(serie.dates_valides):
+            return None
+        if nb_jours is not None and serie.dates_valides[i] >= jour + np.timedelta64(nb_jours, 'D'):
+            return None
+        return serie.cours(i)
+
+    def dernier_cours(self, action):
+        """(date, prix) de la dernière séance de l'action"""
+        return self.cours_a_date(action, self.derniere_date(action))
+
+    def cours_action_asap(self, annee, mois, action, decalage=0):
+        """
+        Même résultat que cours_action_asap des scripts DCA :
+        - date demandée après la dernière séance : dernière séance
+        - date demandée avant la première séance : (0, 0)
+        - sinon première séance du mois à partir de la date demandée, None s'il n'y en a pas
+        """
+        premier_jour  = datetime(annee, mois, 1)+timedelta(days=decalage)
+        nb_jours_mois = (premier_jour + relativedelta(months=1) - timedelta(days=1)).day
+        jour = np.datetime64(premier_jour.date(), 'D')
+
+        if jour >= self.derniere_date(action):
+            resultat = self.dernier_cours(action)
+            if resultat:
+                return resultat
+        if jour < self.premiere_date(action):
+            return 0,0
+        return self.premier_cours_a_partir_de(action, jour, nb_jours_mois)
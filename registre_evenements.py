@@ -0,0 +1,162 @@
+#
+# Registre des événements de trading des backtests DCA
+#
+# Les moteurs n'affichent plus chaque achat, vente, achat écarté ou avertissement : ils les ajoutent à un
+# registre en colonnes (une liste par champ), vidé par blocs de taille_bloc événements dans un fichier :
+#   - "csv"     : un seul fichier, chaque bloc ajouté à la suite
+#   - "parquet" : un répertoire, un fichier par bloc (lisible d'un coup avec pd.read_parquet(répertoire)),
+#                 nécessite pyarrow
+# Les moteurs vectorisés ajoutent un lot d'événements par appel (ajouter_lot) sans boucle ni formatage.
+#
+# Sans fichier (chemin=None), le registre garde les événements en mémoire : evenements() les rend en DataFrame,
+# et ajouter_tableau() les verse dans un autre registre (événements mis en cache avec les résultats).
+#
+# L'affichage console devient une étape séparée et optionnelle : afficher_evenements() relit le registre
+# et produit les lignes « Achat ... / Vente ... / ⚠ ... » des scripts.
+#
+# Utilisation:
+#   python registre_evenements.py evenements_dca_cac40.csv [nombre de lignes]      (affichage d'un registre)
+#
+
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Types d'événements
+ACHAT, VENTE, ECART, AVERTISSEMENT = "ACHAT", "VENTE", "ECART", "AVERTISSEMENT"
+
+# prix : cours unitaire, montant : coût net (achat) ou gain/perte net (vente), rendement : rendement brut en %
+COLONNES = ['type', 'action', 'date', 'prix', 'quantite', 'montant', 'rendement', 'motif']
+
+class RegistreEvenements:
+    """Événements en mémoire par colonnes, écrits par blocs"""
+
+    def __init__(self, chemin, format_fichier="csv", taille_bloc=50000):
+        self.chemin = chemin
+        self.format_fichier = format_fichier
+        self.taille_bloc = taille_bloc
+        self.compteurs = Counter()
+        self.nb_blocs = 0
+        self._colonnes = {colonne: [] for colonne in COLONNES}
+        self._taille = 0
+        # Un registre repart de zéro à chaque exécution
+        if chemin is None:
+            pass
+        elif format_fichier == "parquet":
+            os.makedirs(chemin, exist_ok=True)
+            for nom in os.listdir(chemin):
+                if nom.endswith(".parquet"):
+                    os.remove(os.path.join(chemin, nom))
+        elif os.path.exists(chemin):
+            os.remove(chemin)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def ajouter(self, type_evenement, action="", date="", prix=np.nan, quantite=0, montant=np.nan, rendement=np.nan, motif=""):
+        """Un événement (moteurs en boucle)"""
+        for colonne, valeur in zip(COLONNES, (type_evenement, action, date, prix, quantite, montant, rendement, motif)):
+            self._colonnes[colonne].append(valeur)
+        self.compteurs[type_evenement] += 1
+        self._taille += 1
+        if self._taille >= self.taille_bloc:
+            self._vider()
+
+    def ajouter_lot(self, type_evenement, actions, dates, prix=None, quantites=None, montants=None, rendements=None, motifs=None):
+        """
+        Un lot d'événements du même type (moteurs vectorisés) : tableaux de même longueur, None = vide.
+        motifs peut être un seul texte, commun à tout le lot.
+        """
+        nb = len(actions)
+        if nb == 0:
+            return
+        valeurs = {'type': [type_evenement] * nb, 'action': actions, 'date': dates,
+                   'prix': np.full(nb, np.nan) if prix is None else prix,
+                   'quantite': np.zeros(nb, dtype=np.int64) if quantites is None else quantites,
+                   'montant': np.full(nb, np.nan) if montants is None else montants,
+                   'rendement': np.full(nb, np.nan) if rendements is None else rendements,
+                   'motif': [motifs or ""] * nb if motifs is None or isinstance(motifs, str) else motifs}
+        for colonne in COLONNES:
+            self._colonnes[colonne].extend(np.asarray(valeurs[colonne]).tolist())
+        self.compteurs[type_evenement] += nb
+        self._taille += nb
+        if self._taille >= self.taille_bloc:
+            self._vider()
+
+    def ajouter_tableau(self, evenements):
+        """Événements déjà en DataFrame (colonnes COLONNES), par exemple relus du cache"""
+        if len(evenements) == 0:
+            return
+        for colonne in COLONNES:
+            self._colonnes[colonne].extend(evenements[colonne].tolist())
+        self.compteurs.update(evenements['type'].value_counts().to_dict())
+        self._taille += len(evenements)
+        if self._taille >= self.taille_bloc:
+            self._vider()
+
+    def evenements(self):
+        """Événements pas encore écrits (tous, pour un registre en mémoire)"""
+        tableau = pd.DataFrame(self._colonnes, columns=COLONNES)
+        tableau['quantite'] = tableau['quantite'].astype(np.int64)
+        return tableau
+
+    def _vider(self):
+        if self._taille == 0 or self.chemin is None:
+            return
+        bloc = self.evenements()
+        if self.format_fichier == "parquet":
+            bloc.to_parquet(os.path.join(self.chemin, f"bloc_{self.nb_blocs:05d}.parquet"), index=False)
+        else:
+            bloc.to_csv(self.chemin, sep=';', index=False, encoding='utf-8', mode='a', header=self.nb_blocs == 0)
+        self.nb_blocs += 1
+        self._colonnes = {colonne: [] for colonne in COLONNES}
+        self._taille = 0
+
+    def fermer(self):
+        self._vider()
+
+    def afficher_resume(self):
+        detail = ", ".join(f"{self.compteurs[type_evenement]} {type_evenement.lower()}(s)"
+                           for type_evenement in (ACHAT, VENTE, ECART, AVERTISSEMENT) if self.compteurs[type_evenement])
+        print(f"Registre {self.chemin} : {sum(self.compteurs.values())} événement(s) ({detail or 'aucun'}) en {self.nb_blocs} bloc(s)")
+
+def lire_registre(chemin):
+    """Registre complet en DataFrame (csv ou répertoire parquet)"""
+    if os.path.isdir(chemin):
+        return pd.read_parquet(chemin)
+    return pd.read_csv(chemin, sep=';', encoding='utf-8', keep_default_na=False, na_values=[''],
+                       dtype={'action': str, 'date': str, 'motif': str})
+
+def ligne_console(evenement):
+    """Rendu texte d'un événement, au format des anciens affichages des scripts"""
+    if evenement.type == ACHAT:
+        return f"Achat {evenement.action} le {evenement.date} au prix de {evenement.prix:.2f}€"
+    if evenement.type == VENTE:
+        texte = f"Vente {evenement.action} le {evenement.date} au prix de {evenement.prix:.2f}€"
+        if not pd.isna(evenement.rendement):
+            texte += f" | Rendement: {evenement.rendement:.2f}%"
+        texte += f" | Gain/Perte: {evenement.montant:.2f}€"
+        return texte + (f" | Motif: {evenement.motif}" if evenement.motif else "")
+    texte = "  ⚠️ " if evenement.type == AVERTISSEMENT else "  ⚠"
+    texte += f" {evenement.action}: {evenement.motif}" if evenement.action else f" {evenement.motif}"
+    if evenement.date:
+        texte += f" ({evenement.date})"
+    if not pd.isna(evenement.prix):
+        texte += f" (prix: {evenement.prix:.2f}€)"
+    return texte
+
+def afficher_evenements(chemin, limite=None):
+    """Affichage console du registre (les limite premiers événements si limite est donné)"""
+    evenements = lire_registre(chemin).fillna({'action': '', 'date': '', 'motif': ''})
+    if limite is not None:
+        evenements = evenements.head(limite)
+    print("\n".join(ligne_console(evenement) for evenement in evenements.itertuples(index=False)))
+
+if __name__ == "__main__":
+    afficher_evenements(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,196 @@
+#
+# Schéma v2 de la table des cours
+#
+# v1 : table actions (rowid) avec l'action (TEXT) et la date (TEXT) répétées sur chaque ligne,
+#      plus trois index secondaires dont l'index sur strftime('%Y')/strftime('%m').
+# v2 : - tickers : dimension action -> ticker_id (entier)
+#      - cours   : table WITHOUT ROWID ordonnée physiquement par (ticker_id, jour),
+#                  jour = nombre de jours depuis le 01/01/1970
+#      - actions : vue qui redonne les anciennes colonnes (date, Open, ..., action) plus jour, avec des
+#                  triggers INSTEAD OF pour que les INSERT / DELETE existants continuent de fonctionner.
+#                  Les requêtes par action filtrent et trient sur jour : recherche dans la clé (ticker_id, jour)
+#                  au lieu de calculer date() sur chaque ligne de l'action (derniere_seance, colonne_tri)
+#      - idx_cours_date : index sur l'expression date(jour + 2440587.5) de la vue. Il remplace idx_actions_date :
+#                  les requêtes filtrées sur la date de la vue (date = ?, date > ?, plages de dates) restent des
+#                  recherches dans un index au lieu d'un parcours complet de cours
+#
+# La lecture de l'historique d'une action devient un simple parcours contigu de la clé primaire.
+#
+# Utilisation:
+#   python schema_v2.py migrer [cac40_data.db]
+#
+# Relancée sur une base déjà au schéma v2, la commande crée idx_cours_date s'il manque et recrée la vue
+# actions (avec ses triggers) si elle n'a pas encore la colonne jour.
+#
+
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+EPOCH = date(1970, 1, 1)
+
+SQL_TABLE_TICKERS = """
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker_id INTEGER PRIMARY KEY,
+    action    TEXT NOT NULL UNIQUE
+)
+"""
+
+SQL_TABLE_COURS = """
+CREATE TABLE IF NOT EXISTS cours (
+    ticker_id      INTEGER NOT NULL,
+    jour           INTEGER NOT NULL,
+    Open           REAL,
+    High           REAL,
+    Low            REAL,
+    Close          REAL,
+    Volume         INTEGER,
+    Dividends      REAL,
+    [Stock Splits] REAL,
+    PRIMARY KEY (ticker_id, jour)
+) WITHOUT ROWID
+"""
+
+SQL_VUE_ACTIONS = """
+CREATE VIEW actions AS
+    SELECT date(c.jour + 2440587.5) AS date,
+           c.Open, c.High, c.Low, c.Close, c.Volume, c.Dividends, c.[Stock Splits],
+           t.action, c.jour
+    FROM cours c JOIN tickers t ON t.ticker_id = c.ticker_id
+"""
+
+# Même expression que la colonne date de la vue : SQLite utilise l'index pour les filtres sur actions.date
+SQL_INDEX_DATE = """
+CREATE INDEX IF NOT EXISTS idx_cours_date ON cours(date(jour + 2440587.5))
+"""
+
+SQL_TRIGGER_INSERT = """
+CREATE TRIGGER actions_insert INSTEAD OF INSERT ON actions
+BEGIN
+    INSERT OR IGNORE INTO tickers (action) VALUES (NEW.action);
+    INSERT OR IGNORE INTO cours
+    VALUES ((SELECT ticker_id FROM tickers WHERE action = NEW.action),
+            CAST(julianday(NEW.date) - 2440587.5 AS INTEGER),
+            NEW.Open, NEW.High, NEW.Low, NEW.Close, NEW.Volume, NEW.Dividends, NEW.[Stock Splits]);
+END
+"""
+
+SQL_TRIGGER_DELETE = """
+CREATE TRIGGER actions_delete INSTEAD OF DELETE ON actions
+BEGIN
+    DELETE FROM cours
+    WHERE ticker_id = (SELECT ticker_id FROM tickers WHERE action = OLD.action)
+      AND jour = CAST(julianday(OLD.date) - 2440587.5 AS INTEGER);
+END
+"""
+
+def est_schema_v2(conn):
+    """Vrai si la base utilise le schéma v2 (actions est une vue sur cours)"""
+    cursor = conn.execute("SELECT type FROM sqlite_master WHERE name = 'actions'")
+    result = cursor.fetchone()
+    return result is not None and result[0] == 'view'
+
+def jour_depuis_date(valeur):
+    """'2025-01-31' ou date -> nombre de jours depuis le 01/01/1970"""
+    if isinstance(valeur, str):
+        valeur = date.fromisoformat(valeur)
+    return (valeur - EPOCH).days
+
+def derniere_seance(conn, action):
+    """Date ('AAAA-MM-JJ') de la dernière séance stockée pour l'action, None si aucune"""
+    if est_schema_v2(conn):
+        # max(jour) sur la clé (ticker_id, jour) : une seule recherche, pas de date() par ligne
+        cursor = conn.execute("""
+            SELECT date(max(jour) + 2440587.5) FROM cours
+            WHERE ticker_id = (SELECT ticker_id FROM tickers WHERE action = ?)
+        """, (action,))
+    else:
+        cursor = conn.execute("SELECT max(date) FROM actions WHERE action=?", (action,))
+    return cursor.fetchone()[0]
+
+def colonne_tri(conn):
+    """Colonne de tri chronologique de la vue actions : jour en v2 (ordre de la clé de cours), date en v1"""
+    return 'jour' if est_schema_v2(conn) else 'date'
+
+def _recreer_vue(conn):
+    """Recrée la vue actions et ses triggers (supprimés avec elle) : ajoute la colonne jour aux bases v2 existantes"""
+    colonnes = [row[1] for row in conn.execute("PRAGMA table_info(actions)")]
+    if 'jour' in colonnes:
+        return
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DROP VIEW actions")
+        conn.execute(SQL_VUE_ACTIONS)
+        conn.execute(SQL_TRIGGER_INSERT)
+        conn.execute(SQL_TRIGGER_DELETE)
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+    print("Vue actions recréée avec la colonne jour.")
+
+def supprimer_seance_du_jour(conn):
+    """Supprime les cours de la séance du jour (incomplète), directement sur la clé en v2"""
+    if est_schema_v2(conn):
+        conn.execute("DELETE FROM cours WHERE jour >= CAST(julianday(date()) - 2440587.5 AS INTEGER)")
+    else:
+        conn.execute("DELETE FROM actions WHERE date >= date()")
+
+def migrer(conn):
+    """Convertit la table actions v1 en schéma v2, dans une seule transaction"""
+    if est_schema_v2(conn):
+        print("La base est déjà au schéma v2.")
+        conn.execute(SQL_INDEX_DATE)
+        _recreer_vue(conn)
+        return False
+
+    nb_lignes = conn.execute("SELECT count(*) FROM actions").fetchone()[0]
+    conn.execute("BEGIN")
+    try:
+        conn.execute(SQL_TABLE_TICKERS)
+        conn.execute(SQL_TABLE_COURS)
+        conn.execute("INSERT INTO tickers (action) SELECT DISTINCT action FROM actions WHERE action IS NOT NULL ORDER BY action")
+        # Insertion dans l'ordre de la clé primaire : remplissage séquentiel du B-tree
+        conn.execute("""
+            INSERT INTO cours
+            SELECT t.ticker_id, CAST(julianday(a.date) - 2440587.5 AS INTEGER),
+                   a.Open, a.High, a.Low, a.Close, a.Volume, a.Dividends, a.[Stock Splits]
+            FROM actions a JOIN tickers t ON t.action = a.action
+            WHERE a.date IS NOT NULL
+            ORDER BY t.ticker_id, 2
+        """)
+        nb_migrees = conn.execute("SELECT count(*) FROM cours").fetchone()[0]
+        conn.execute("DROP INDEX IF EXISTS idx_actions_date")
+        conn.execute("DROP INDEX IF EXISTS idx_actions_action_date")
+        conn.execute("DROP INDEX IF EXISTS idx_actions_year_month")
+        conn.execute("DROP TABLE actions")
+        conn.execute(SQL_VUE_ACTIONS)
+        conn.execute(SQL_INDEX_DATE)
+        conn.execute(SQL_TRIGGER_INSERT)
+        conn.execute(SQL_TRIGGER_DELETE)
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+
+    print(f"{nb_migrees} lignes migrées sur {nb_lignes}")
+    return True
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrer":
+        print("Utilisation : python schema_v2.py migrer [cac40_data.db]")
+        sys.exit(1)
+    db_file = sys.argv[2] if len(sys.argv) > 2 else "cac40_data.db"
+
+    taille_avant = os.path.getsize(db_file)
+    debut = time.perf_counter()
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    if migrer(conn):
+        print("Compactage de la base (VACUUM)...")
+        conn.execute("VACUUM")
+        taille_apres = os.path.getsize(db_file)
+        print(f"Taille : {taille_avant / 1024 / 1024:.1f} Mo -> {taille_apres / 1024 / 1024:.1f} Mo "
+              f"en {time.perf_counter() - debut:.1f}s")
+    conn.close()
@@ -0,0 +1,145 @@
+#
+# Résolution des symboles Yahoo
+#
+# symboles_yahoo        : MNEMO Euronext -> ticker Yahoo, avec la provenance de la correspondance
+#                         ('correction connue', 'manuel' ou 'défaut' = MNEMO + ".PA")
+# symboles_sans_donnees : cache négatif des tickers Yahoo qui n'ont renvoyé aucun cours.
+#                         Ils ne sont plus interrogés pendant ttl_jours jours.
+# composition_yahoo     : vue sur cac40_composition dont le ticker Yahoo est relu dans symboles_yahoo
+#                         (mnemonic = mnemo). Les photos de composition ne sont jamais réécrites : une
+#                         correspondance corrigée s'applique à la lecture, à toutes les dates.
+#
+# Utilisation:
+#   python symboles.py lister [cac40_data.db]                     (correspondances et symboles sans données)
+#   python symboles.py ajouter MNEMO TICKER [cac40_data.db]       (ex: python symboles.py ajouter SOLB SOLB.BR)
+#
+
+import sys
+from datetime import datetime, timedelta
+
+TTL_JOURS = 7
+
+# Corrections des tickers Yahoo connues (MNEMO -> ticker Yahoo)
+CORRECTIONS_CONNUES = {
+    'TOUP': 'ALTOU.PA',
+    'SOLB': 'SOLB.BR',
+    'APAM': 'APAM.AS',
+    'MT':   'MT.AS',
+    'CGM':  'ALCGM.PA',
+}
+
+SQL_TABLE_SYMBOLES = """
+CREATE TABLE IF NOT EXISTS symboles_yahoo (
+    mnemo        TEXT PRIMARY KEY,
+    ticker_yahoo TEXT NOT NULL,
+    provenance   TEXT NOT NULL,
+    date_maj     TEXT NOT NULL
+)
+"""
+
+SQL_TABLE_SANS_DONNEES = """
+CREATE TABLE IF NOT EXISTS symboles_sans_donnees (
+    ticker_yahoo  TEXT PRIMARY KEY,
+    premier_echec TEXT NOT NULL,
+    dernier_echec TEXT NOT NULL,
+    nb_echecs     INTEGER NOT NULL
+)
+"""
+
+SQL_VUE_COMPOSITION = """
+CREATE VIEW IF NOT EXISTS composition_yahoo AS
+    SELECT c.date_maj, c.company, c.mnemonic, c.sector_icb, c.weight_percent,
+           coalesce(s.ticker_yahoo, c.ticker_yahoo) AS ticker_yahoo, c.nom_indice
+    FROM cac40_composition c LEFT JOIN symboles_yahoo s ON s.mnemo = c.mnemonic
+"""
+
+def _maintenant():
+    return datetime.now().isoformat(timespec='seconds')
+
+def initialiser(conn):
+    """Crée les tables et la vue composition_yahoo, et ajoute les corrections connues"""
+    with conn:
+        conn.execute(SQL_TABLE_SYMBOLES)
+        conn.execute(SQL_TABLE_SANS_DONNEES)
+        conn.execute(SQL_VUE_COMPOSITION)
+        conn.executemany("INSERT OR IGNORE INTO symboles_yahoo VALUES (?, ?, 'correction connue', ?)",
+                         [(mnemo, ticker, _maintenant()) for mnemo, ticker in CORRECTIONS_CONNUES.items()])
+
+def resoudre(conn, mnemos):
+    """Retourne {mnemo: ticker_yahoo}. Un MNEMO inconnu est enregistré avec le ticker par défaut MNEMO.PA"""
+    initialiser(conn)
+    mnemos = list(dict.fromkeys(mnemos))
+    connus = dict(conn.execute("SELECT mnemo, ticker_yahoo FROM symboles_yahoo").fetchall())
+    nouveaux = [(mnemo, mnemo + ".PA", _maintenant()) for mnemo in mnemos if mnemo not in connus]
+    if nouveaux:
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO symboles_yahoo VALUES (?, ?, 'défaut', ?)", nouveaux)
+        connus.update((mnemo, ticker) for mnemo, ticker, _ in nouveaux)
+    return {mnemo: connus[mnemo] for mnemo in mnemos}
+
+def ajouter_correspondance(conn, mnemo, ticker_yahoo, provenance='manuel'):
+    """
+    Enregistre (ou corrige) la correspondance d'un MNEMO et retire le nouveau ticker du cache négatif.
+    cac40_composition n'est pas modifiée : la vue composition_yahoo donne le nouveau ticker à toutes les dates.
+    """
+    initialiser(conn)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO symboles_yahoo VALUES (?, ?, ?, ?)",
+                     (mnemo, ticker_yahoo, provenance, _maintenant()))
+        conn.execute("DELETE FROM symboles_sans_donnees WHERE ticker_yahoo=?", (ticker_yahoo,))
+
+def table_composition(conn):
+    """Vue composition_yahoo (tickers résolus à la lecture) si elle existe, sinon la table cac40_composition"""
+    existe = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'composition_yahoo'").fetchone()
+    return 'composition_yahoo' if existe else 'cac40_composition'
+
+def symboles_a_eviter(conn, ttl_jours=TTL_JOURS):
+    """Tickers sans données lors d'un essai datant de moins de ttl_jours jours"""
+    initialiser(conn)
+    limite = (datetime.now() - timedelta(days=ttl_jours)).isoformat(timespec='seconds')
+    cursor = conn.execute("SELECT ticker_yahoo FROM symboles_sans_donnees WHERE dernier_echec > ?", (limite,))
+    return {row[0] for row in cursor.fetchall()}
+
+def noter_sans_donnees(conn, ticker_yahoo):
+    """Ajoute le ticker au cache négatif. Retourne True si c'est un nouveau symbole non résolu"""
+    maintenant = _maintenant()
+    nouveau = conn.execute("SELECT 1 FROM symboles_sans_donnees WHERE ticker_yahoo=?", (ticker_yahoo,)).fetchone() is None
+    with conn:
+        conn.execute("""
+            INSERT INTO symboles_sans_donnees VALUES (?, ?, ?, 1)
+            ON CONFLICT (ticker_yahoo) DO UPDATE SET dernier_echec=excluded.dernier_echec, nb_echecs=nb_echecs + 1
+        """, (ticker_yahoo, maintenant, maintenant))
+    return nouveau
+
+def noter_resolu(conn, ticker_yahoo):
+    """Le ticker a renvoyé des cours : il sort du cache négatif"""
+    with conn:
+        conn.execute("DELETE FROM symboles_sans_donnees WHERE ticker_yahoo=?", (ticker_yahoo,))
+
+def afficher_non_resolus(nouveaux, evites):
+    if evites:
+        print(f"{len(evites)} symbole(s) sans données ignoré(s) (cache négatif, {TTL_JOURS} jours) : {', '.join(sorted(evites))}")
+    if nouveaux:
+        print(f"  ⚠ Nouveaux symboles sans données : {', '.join(sorted(nouveaux))}")
+        print("    Corriger avec : python symboles.py ajouter MNEMO TICKER_YAHOO")
+
+if __name__ == "__main__":
+    import sqlite3
+    commande = sys.argv[1] if len(sys.argv) > 1 else None
+    if commande == "lister":
+        conn = sqlite3.connect(sys.argv[2] if len(sys.argv) > 2 else "cac40_data.db")
+        initialiser(conn)
+        for mnemo, ticker, provenance, date_maj in conn.execute(
+                "SELECT * FROM symboles_yahoo WHERE provenance != 'défaut' ORDER BY mnemo"):
+            print(f"{mnemo:<8} -> {ticker:<12} {provenance:<18} {date_maj}")
+        print("\nSymboles sans données :")
+        for ticker, premier, dernier, nb in conn.execute("SELECT * FROM symboles_sans_donnees ORDER BY ticker_yahoo"):
+            print(f"{ticker:<12} depuis {premier}, dernier essai {dernier} ({nb} essai(s))")
+    elif commande == "ajouter" and len(sys.argv) >= 4:
+        conn = sqlite3.connect(sys.argv[4] if len(sys.argv) > 4 else "cac40_data.db")
+        ajouter_correspondance(conn, sys.argv[2], sys.argv[3])
+        print(f"{sys.argv[2]} -> {sys.argv[3]}")
+    else:
+        print("Utilisation : python symboles.py lister [cac40_data.db] | ajouter MNEMO TICKER [cac40_data.db]")
+        sys.exit(1)
+    conn.close()
@@ -0,0 +1,196 @@
+#
+# Téléchargement concurrent des PDF de composition des indices Euronext
+#
+# Les 8 PDF sont demandés en parallèle (pool de threads) au travers d'un limiteur de débit
+# par hôte (seau à jetons / token bucket) qui remplace les pauses fixes time.sleep(2).
+# Chaque PDF est analysé dès qu'il est reçu, pendant que les autres sont encore en cours
+# de téléchargement. L'insertion SQLite reste faite par le thread principal.
+#
+# Cache local adressé par contenu (SHA-256) : les requêtes sont conditionnelles (ETag / Last-Modified)
+# et si le PDF n'a pas changé, les lignes déjà extraites sont réutilisées sans relancer pdfplumber.
+# Les lignes sont enregistrées avec la version de l'extracteur : après un changement d'extracteur, elles sont
+# ignorées et le PDF est réanalysé.
+#
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+class LimiteurDebit:
+    """Seau à jetons par hôte : `capacite` requêtes immédiates, puis `debit` requêtes par seconde"""
+
+    def __init__(self, debit=1.0, capacite=4):
+        self.debit    = debit
+        self.capacite = capacite
+        self._seaux   = {}   # hôte -> [jetons disponibles, instant du dernier remplissage]
+        self._verrou  = threading.Lock()
+
+    def acquerir(self, url):
+        """Bloque jusqu'à obtention d'un jeton pour l'hôte de l'url, retourne le temps d'attente en secondes"""
+        hote  = urlparse(url).netloc
+        debut = time.monotonic()
+        while True:
+            with self._verrou:
+                maintenant = time.monotonic()
+                jetons, dernier = self._seaux.get(hote, [self.capacite, maintenant])
+                jetons = min(self.capacite, jetons + (maintenant - dernier) * self.debit)
+                if jetons >= 1:
+                    self._seaux[hote] = [jetons - 1, maintenant]
+                    return maintenant - debut
+                self._seaux[hote] = [jetons, maintenant]
+                attente = (1 - jetons) / self.debit
+            time.sleep(attente)
+
+class CachePDF:
+    """
+    Stockage des PDF par empreinte SHA-256 : objets/<sha256>.pdf et objets/<sha256>.json (lignes extraites
+    et version_parser, la version de l'extracteur qui les a produites).
+    index.json associe chaque url à sa dernière empreinte, son ETag et son Last-Modified.
+    """
+
+    def __init__(self, repertoire="cache_pdf", version_parser=None):
+        self.repertoire = repertoire
+        self.version_parser = version_parser
+        self.repertoire_objets = os.path.join(repertoire, "objets")
+        self.fichier_index = os.path.join(repertoire, "index.json")
+        os.makedirs(self.repertoire_objets, exist_ok=True)
+        self._verrou = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.fichier_index):
+            with open(self.fichier_index, encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def entetes_conditionnelles(self, url):
+        """En-têtes If-None-Match / If-Modified-Since pour une url déjà téléchargée"""
+        with self._verrou:
+            entree = self.index.get(url)
+        if entree is None or not os.path.exists(self._chemin(entree['sha256'], '.pdf')):
+            return {}
+        entetes = {}
+        if entree.get('etag'):
+            entetes['If-None-Match'] = entree['etag']
+        if entree.get('last_modified'):
+            entetes['If-Modified-Since'] = entree['last_modified']
+        return entetes
+
+    def empreinte(self, url):
+        with self._verrou:
+            entree = self.index.get(url)
+        return entree['sha256'] if entree else None
+
+    def enregistrer(self, url, contenu, etag=None, last_modified=None):
+        """Stocke le PDF sous son empreinte et met à jour l'index, retourne l'empreinte"""
+        sha256 = hashlib.sha256(contenu).hexdigest()
+        chemin = self._chemin(sha256, '.pdf')
+        if not os.path.exists(chemin):
+            with open(chemin, 'wb') as f:
+                f.write(contenu)
+        with self._verrou:
+            self.index[url] = {
+                'sha256': sha256,
+                'etag': etag,
+                'last_modified': last_modified,
+                'date_telechargement': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._sauver_index()
+        return sha256
+
+    def lire_pdf(self, sha256):
+        with open(self._chemin(sha256, '.pdf'), 'rb') as f:
+            return f.read()
+
+    def lignes(self, sha256):
+        """Lignes déjà extraites pour ce contenu, None si le PDF n'a jamais été analysé par cette version de l'extracteur"""
+        chemin = self._chemin(sha256, '.json')
+        if not os.path.exists(chemin):
+            return None
+        with open(chemin, encoding='utf-8') as f:
+            extraction = json.load(f)
+        # Ancien format (liste de lignes sans version) ou autre version : à réanalyser
+        if not isinstance(extraction, dict) or extraction.get('version_parser') != self.version_parser:
+            return None
+        return extraction['lignes']
+
+    def enregistrer_lignes(self, sha256, rows):
+        with open(self._chemin(sha256, '.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version_parser': self.version_parser, 'lignes': rows}, f, ensure_ascii=False)
+
+    def _chemin(self, sha256, extension):
+        return os.path.join(self.repertoire_objets, sha256 + extension)
+
+    def _sauver_index(self):
+        with open(self.fichier_index + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(self.fichier_index + '.tmp', self.fichier_index)
+
+def _telecharger_et_parser(url, parser, limiteur, cache=None):
+    """Travail d'un thread : attente du jeton, téléchargement (conditionnel si cache) puis analyse du PDF"""
+    temps = {}
+    debut = time.perf_counter()
+    temps['attente'] = limiteur.acquerir(url)
+
+    t0 = time.perf_counter()
+    entetes = cache.entetes_conditionnelles(url) if cache is not None else {}
+    response = requests.get(url, headers=entetes, timeout=60)
+    response.raise_for_status()
+    temps['telechargement'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if cache is None:
+        rows = parser(response.content)
+        temps['statut'] = "nouveau"
+    else:
+        if response.status_code == 304:
+            sha256 = cache.empreinte(url)
+            temps['statut'] = "304"
+        else:
+            sha256 = cache.enregistrer(url, response.content,
+                                       response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            temps['statut'] = "nouveau"
+        rows = cache.lignes(sha256)
+        if rows is None:
+            contenu = response.content if response.status_code != 304 else cache.lire_pdf(sha256)
+            rows = parser(contenu)
+            cache.enregistrer_lignes(sha256, rows)
+        elif temps['statut'] == "nouveau":
+            temps['statut'] = "identique"   # Nouveau téléchargement mais contenu déjà connu
+    temps['analyse'] = time.perf_counter() - t0
+    temps['total']   = time.perf_counter() - debut
+    return rows, temps
+
+def telecharger_indices(urls, parser, limiteur=None, nb_threads=8, cache=None):
+    """
+    Télécharge et analyse tous les PDF en parallèle (requêtes conditionnelles si un CachePDF est fourni).
+    Générateur : retourne (url, rows, temps, erreur) au fur et à mesure que les PDF sont prêts,
+    ce qui permet à l'appelant d'insérer en base pendant que les autres téléchargements continuent.
+    """
+    if limiteur is None:
+        limiteur = LimiteurDebit()
+    with ThreadPoolExecutor(max_workers=nb_threads) as executor:
+        futures = {executor.submit(_telecharger_et_parser, url, parser, limiteur, cache): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                rows, temps = future.result()
+                yield url, rows, temps, None
+            except Exception as e:
+                yield url, None, {}, e
+
+def afficher_temps(temps_par_indice):
+    """Affiche les temps mesurés pour chaque indice"""
+    print(f"\n{'Indice':<25} {'Cache':>10} {'Attente':>9} {'Téléch.':>9} {'Analyse':>9} {'Insertion':>10} {'Total':>9}")
+    for nom_indice, temps in temps_par_indice.items():
+        print(f"{nom_indice:<25} "
+              f"{temps.get('statut', ''):>10} "
+              f"{temps.get('attente', 0):>8.2f}s "
+              f"{temps.get('telechargement', 0):>8.2f}s "
+              f"{temps.get('analyse', 0):>8.2f}s "
+              f"{temps.get('insertion', 0):>9.2f}s "
+              f"{temps.get('total', 0):>8.2f}s")
@@ -0,0 +1,189 @@
+#
+# Téléchargement des cours par lots
+#
+# Les actions qui ont besoin de la même fenêtre de dates sont regroupées dans des requêtes
+# multi-symboles (yf.download), exécutées par un pool de threads borné. En cas de limitation
+# par Yahoo, la pause entre requêtes augmente (backoff adaptatif) puis redescend progressivement.
+# Toutes les écritures passent par un unique thread d'écriture : SQLite n'a jamais deux écrivains.
+#
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import sqlite3
+import yfinance as yf
+
+from chargement_sqlite import configurer_connexion, lignes_actions
+
+def regrouper_par_fenetre(fenetres, taille_lot=50):
+    """
+    fenetres : {action: (debut, fin)} ou {action: None} pour un historique complet.
+    Retourne la liste des lots [(debut, fin, [actions])] de taille_lot actions au maximum.
+    """
+    groupes = {}
+    for action, fenetre in fenetres.items():
+        groupes.setdefault(fenetre, []).append(action)
+
+    lots = []
+    for fenetre, actions in groupes.items():
+        debut, fin = fenetre if fenetre is not None else (None, None)
+        for i in range(0, len(actions), taille_lot):
+            lots.append((debut, fin, actions[i:i + taille_lot]))
+    return lots
+
+class Regulateur:
+    """Pause adaptative partagée entre les threads : doublée en cas de limitation, réduite après chaque succès"""
+
+    def __init__(self, pause_min=0.0, pause_max=120.0):
+        self.pause     = pause_min
+        self.pause_min = pause_min
+        self.pause_max = pause_max
+        self.nb_limitations = 0
+        self._verrou   = threading.Lock()
+
+    def attendre(self):
+        with self._verrou:
+            pause = self.pause
+        if pause > 0:
+            time.sleep(pause)
+
+    def limitation(self):
+        with self._verrou:
+            self.nb_limitations += 1
+            self.pause = min(self.pause_max, max(2.0, self.pause * 2))
+
+    def succes(self):
+        with self._verrou:
+            self.pause = max(self.pause_min, self.pause * 0.75)
+
+def est_limitation(erreur):
+    """Reconnaît une réponse de limitation de Yahoo (YFRateLimitError, HTTP 429)"""
+    texte = f"{type(erreur).__name__} {erreur}".lower()
+    return 'ratelimit' in texte or 'rate limit' in texte or 'too many requests' in texte or '429' in texte
+
+class EcrivainSQLite(threading.Thread):
+    """
+    Unique thread d'écriture : reçoit (action, lignes) par une file et les insère avec sa propre connexion.
+    Les lignes de plusieurs actions sont regroupées jusqu'à taille_lot lignes par transaction.
+    """
+
+    FIN = None
+
+    def __init__(self, db_file, inserer, taille_file=16, taille_lot=50000):
+        super().__init__(daemon=True)
+        self.db_file = db_file
+        self.inserer = inserer
+        self.taille_lot = taille_lot
+        self.file    = queue.Queue(maxsize=taille_file)
+        self.nb_lignes_inserees = 0
+
+    def run(self):
+        conn = sqlite3.connect(self.db_file)
+        configurer_connexion(conn)
+        try:
+            termine = False
+            while not termine:
+                # Attente d'un élément puis récupération de tout ce qui est déjà disponible
+                lot, actions = [], []
+                element = self.file.get()
+                while True:
+                    if element is self.FIN:
+                        termine = True
+                        break
+                    action, data_to_insert = element
+                    lot.extend(data_to_insert)
+                    actions.append(action)
+                    if len(lot) >= self.taille_lot or self.file.empty():
+                        break
+                    element = self.file.get()
+                if lot:
+                    inserted_count = self.inserer(conn, lot)
+                    self.nb_lignes_inserees += inserted_count
+                    print(f"{inserted_count} nouvelles lignes insérées pour {len(actions)} action(s) : {', '.join(actions)}")
+        finally:
+            conn.close()
+
+    def ecrire(self, action, data_to_insert):
+        self.file.put((action, data_to_insert))
+
+    def terminer(self):
+        self.file.put(self.FIN)
+        self.join()
+
+def _telecharger_lot(debut, fin, actions, regulateur, max_tentatives):
+    """Télécharge un lot d'actions sur la même fenêtre, avec nouvelle tentative en cas de limitation"""
+    for tentative in range(max_tentatives):
+        regulateur.attendre()
+        try:
+            if debut is None:
+                donnees = yf.download(actions, period="max", interval="1d", group_by='ticker',
+                                      actions=True, auto_adjust=True, threads=False, progress=False)
+            else:
+                donnees = yf.download(actions, start=debut, end=fin, interval="1d", group_by='ticker',
+                                      actions=True, auto_adjust=True, threads=False, progress=False)
+        except Exception as e:
+            if est_limitation(e) and tentative + 1 < max_tentatives:
+                regulateur.limitation()
+                continue
+            raise
+
+        # Un lot vide n'est pas une limitation : fenêtre sur un jour férié d'Euronext, symboles sans cotation...
+        # Seules les erreurs de limitation (est_limitation) augmentent la pause ; le lot vide compte 0 ligne.
+        regulateur.succes()
+        return donnees, tentative + 1
+
+def historique_action(donnees, action):
+    """Extrait l'historique d'une action d'un résultat multi-symboles de yf.download"""
+    if donnees is None or donnees.empty:
+        return None
+    if action.upper() not in donnees.columns.get_level_values(0):
+        return None
+    historique = donnees[action.upper()].dropna(how='all')
+    for colonne in ('Dividends', 'Stock Splits'):
+        if colonne not in historique.columns:
+            historique[colonne] = 0.0
+    return historique
+
+def telecharger_par_lots(fenetres, db_file, inserer, taille_lot=50, nb_workers=4, max_tentatives=5):
+    """
+    Télécharge les cours de toutes les actions par lots sur un pool de nb_workers threads.
+    Les résultats sont transmis au thread d'écriture unique au fur et à mesure.
+    Retourne le nombre de lignes reçues par action, le nombre de lignes insérées et les actions en échec.
+    """
+    lots = regrouper_par_fenetre(fenetres, taille_lot)
+    regulateur = Regulateur()
+    ecrivain = EcrivainSQLite(db_file, inserer)
+    ecrivain.start()
+
+    debut_total = time.perf_counter()
+    lignes_recues = {}
+    actions_en_echec = []
+    try:
+        with ThreadPoolExecutor(max_workers=nb_workers) as executor:
+            futures = {executor.submit(_telecharger_lot, debut, fin, actions, regulateur, max_tentatives): (debut, fin, actions)
+                       for debut, fin, actions in lots}
+            for future in as_completed(futures):
+                debut, fin, actions = futures[future]
+                fenetre = "historique complet" if debut is None else f"{debut} -> {fin}"
+                try:
+                    donnees, nb_tentatives = future.result()
+                except Exception as e:
+                    print(f"  ⚠ Lot de {len(actions)} actions ({fenetre}): {e}")
+                    actions_en_echec.extend(actions)
+                    continue
+                print(f"Lot de {len(actions)} actions ({fenetre}) reçu en {nb_tentatives} tentative(s)")
+                for action in actions:
+                    historique = historique_action(donnees, action)
+                    if historique is None or historique.empty:
+                        lignes_recues[action] = 0
+                        continue
+                    lignes_recues[action] = len(historique)
+                    ecrivain.ecrire(action, lignes_actions(historique, action))
+    finally:
+        ecrivain.terminer()
+
+    print(f"{len(lots)} lots téléchargés en {time.perf_counter() - debut_total:.1f}s "
+          f"({regulateur.nb_limitations} limitation(s), pause finale {regulateur.pause:.1f}s)")
+    return lignes_recues, ecrivain.nb_lignes_inserees, actions_en_echec